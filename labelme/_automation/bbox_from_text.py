@@ -57,20 +57,27 @@ def nms_bboxes(
     score_threshold: float,
     max_num_detections: int,
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
-    num_classes: int = max(labels) + 1
+    if len(boxes) == 0:
+        return (
+            np.empty((0, 4), dtype=np.float32),
+            np.empty((0,), dtype=np.float32),
+            np.empty((0,), dtype=np.int64),
+        )
+    labels = np.asarray(labels)
+    num_classes: int = labels.max() + 1
     scores_of_all_classes: npt.NDArray[np.float32] = np.zeros(
         (len(boxes), num_classes), dtype=np.float32
     )
-    for i, (score, label) in enumerate(zip(scores, labels)):
-        scores_of_all_classes[i, label] = score
+    scores_of_all_classes[np.arange(len(boxes)), labels] = scores
     logger.debug(f"Input: num_boxes={len(boxes)}")
+    # newer osam also returns the indices of the boxes kept
     boxes, scores, labels = osam.apis.non_maximum_suppression(
         boxes=boxes,
         scores=scores_of_all_classes,
         iou_threshold=iou_threshold,
         score_threshold=score_threshold,
         max_num_detections=max_num_detections,
-    )
+    )[:3]
     logger.debug(f"Output: num_boxes={len(boxes)}")
     return boxes, scores, labels
 
@@ -1,40 +1,56 @@
-import imgviz
+from typing import Literal
+
+import cv2
 import numpy as np
 import numpy.typing as npt
-import skimage
 from loguru import logger
 
+_CONTOUR_METHODS: dict[str, int] = {
+    "dp": cv2.CHAIN_APPROX_NONE,
+    "simple": cv2.CHAIN_APPROX_SIMPLE,
+    "none": cv2.CHAIN_APPROX_NONE,
+}
 
-def _get_contour_length(contour: npt.NDArray[np.float32]) -> float:
-    contour_start: npt.NDArray[np.float32] = contour
-    contour_end: npt.NDArray[np.float32] = np.r_[contour[1:], contour[0:1]]
-    return np.linalg.norm(contour_end - contour_start, axis=1).sum()
 
+def compute_polygon_from_mask(
+    mask: npt.NDArray[np.bool_],
+    approximation: Literal["dp", "simple", "none"] = "dp",
+) -> npt.NDArray[np.float32]:
+    """Return the polygon (N, 2) in xy of the longest outer contour of `mask`.
 
-def compute_polygon_from_mask(mask: npt.NDArray[np.bool_]) -> npt.NDArray[np.float32]:
-    contours: npt.NDArray[np.float32] = skimage.measure.find_contours(
-        np.pad(mask, pad_width=1)
-    )
-    if len(contours) == 0:
+    The contour is traced by OpenCV on the bounding box of the mask only, and
+    approximated by Douglas-Peucker ("dp"), merged straight runs ("simple"),
+    or kept pixel by pixel ("none").
+    """
+    if approximation not in _CONTOUR_METHODS:
+        raise ValueError(f"Unsupported approximation: {approximation!r}")
+
+    rows: npt.NDArray[np.intp] = np.flatnonzero(mask.any(axis=1))
+    if len(rows) == 0:
         logger.warning("No contour found, so returning empty polygon.")
         return np.empty((0, 2), dtype=np.float32)
+    cols: npt.NDArray[np.intp] = np.flatnonzero(mask.any(axis=0))
+    y1, y2 = rows[0], rows[-1]
+    x1, x2 = cols[0], cols[-1]
 
-    contour: npt.NDArray[np.float32] = max(contours, key=_get_contour_length)
-    POLYGON_APPROX_TOLERANCE: float = 0.004
-    polygon: npt.NDArray[np.float32] = skimage.measure.approximate_polygon(
-        coords=contour,
-        tolerance=np.ptp(contour, axis=0).max() * POLYGON_APPROX_TOLERANCE,
+    # padded so that the contours along the bounding box are closed
+    crop: npt.NDArray[np.uint8] = np.pad(
+        mask[y1 : y2 + 1, x1 : x2 + 1].astype(np.uint8), pad_width=1
+    )
+    contours, _ = cv2.findContours(
+        crop, cv2.RETR_EXTERNAL, _CONTOUR_METHODS[approximation]
+    )
+    contour: npt.NDArray[np.int32] = max(
+        contours, key=lambda contour: cv2.arcLength(contour, True)
     )
-    polygon = np.clip(polygon, (0, 0), (mask.shape[0] - 1, mask.shape[1] - 1))
-    polygon = polygon[:-1]  # drop last point that is duplicate of first point
-
-    if 0:
-        import PIL.Image
-
-        image_pil = PIL.Image.fromarray(imgviz.gray2rgb(imgviz.bool2ubyte(mask)))
-        imgviz.draw.line_(image_pil, yx=polygon, fill=(0, 255, 0))
-        for point in polygon:
-            imgviz.draw.circle_(image_pil, center=point, diameter=10, fill=(0, 255, 0))
-        imgviz.io.imsave("contour.jpg", np.asarray(image_pil))
 
-    return polygon[:, ::-1]  # yx -> xy
+    if approximation == "dp":
+        POLYGON_APPROX_TOLERANCE: float = 0.004
+        contour = cv2.approxPolyDP(
+            contour,
+            epsilon=float(np.ptp(contour, axis=0).max()) * POLYGON_APPROX_TOLERANCE,
+            closed=True,
+        )
+    polygon: npt.NDArray[np.float32] = contour.reshape(-1, 2).astype(np.float32)
+    polygon += (x1 - 1, y1 - 1)  # crop -> image
+    return polygon
@@ -0,0 +1,172 @@
+import os
+import os.path as osp
+import threading
+import time
+from typing import Callable
+from typing import Optional
+
+import orjson
+from loguru import logger
+
+from labelme.label_file import LabelFile
+from labelme.label_file import LabelFileError
+
+
+def _shape_key(label: str, points) -> tuple:
+    return label, tuple((round(float(x), 2), round(float(y), 2)) for x, y in points)
+
+
+def _is_avm_label_file(label_file: str) -> bool:
+    # as LabelFile.save(): Slot_ and 2D-OD_ folders have their own formats
+    dir_name: str = osp.basename(osp.dirname(osp.dirname(label_file)))
+    return not dir_name.startswith(("Slot_", "2D-OD_"))
+
+
+def _merge_annotations(shapes: list[dict], label_file: str) -> int:
+    # the "anno" list only: no image decoded, no segmentation drawn
+    with open(label_file, "rb") as f:
+        data: dict = orjson.loads(f.read())
+    annotations: list[dict] = data.setdefault("anno", [])
+    keys: set[tuple] = {
+        _shape_key(
+            annotation["category"]["type"],
+            zip(annotation["data"]["allPointsX"], annotation["data"]["allPointsY"]),
+        )
+        for annotation in annotations
+        if "allPointsX" in annotation.get("data", {})
+    }
+    new_shapes: list[dict] = [
+        shape
+        for shape in shapes
+        if _shape_key(shape["label"], shape["points"]) not in keys
+    ]
+    if not new_shapes:
+        return 0
+    annotations.extend(
+        LabelFile.annotation_of(shape, num)
+        for num, shape in enumerate(new_shapes, start=len(annotations))
+    )
+    # not to be read half written by the GUI
+    tmp_file: str = label_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, label_file)
+    return len(new_shapes)
+
+
+def _merge_shapes(shapes: list[dict], label_file: str) -> int:
+    existing: list[dict] = LabelFile(label_file).shapes
+    keys: set[tuple] = {_shape_key(s["label"], s["points"]) for s in existing}
+    new_shapes: list[dict] = [
+        s for s in shapes if _shape_key(s["label"], s["points"]) not in keys
+    ]
+    if new_shapes:
+        LabelFile().save(filename=label_file, shapes=existing + new_shapes)
+    return len(new_shapes)
+
+
+def propagate_to_file(shapes: list[dict], label_file: str) -> bool:
+    """Add `shapes` to `label_file`, and return whether it was written.
+
+    Shapes already in the file (same label and points) are not added again,
+    so propagating twice does not duplicate them, and a file where nothing is
+    added is not rewritten. In AVM label files only the annotations are
+    merged: the vis_avm image is left to LabelFile.update_vis().
+    """
+    t_start: float = time.time()
+    try:
+        if _is_avm_label_file(label_file):
+            num_added: int = _merge_annotations(shapes, label_file)
+        else:
+            num_added = _merge_shapes(shapes, label_file)
+    except (LabelFileError, OSError, KeyError, ValueError) as e:
+        logger.warning(f"Failed to propagate shapes to {label_file!r}: {e}")
+        return False
+    if not num_added:
+        return False
+    logger.debug(
+        f"Propagated {num_added} shapes to {label_file!r}, "
+        f"elapsed_time={time.time() - t_start:.3f} [s]"
+    )
+    return True
+
+
+def propagate_shapes(
+    shapes: list[dict],
+    label_files: list[str],
+    stop_event: Optional[threading.Event] = None,
+) -> list[str]:
+    """Add `shapes` to each of `label_files`, see propagate_to_file().
+
+    Returns:
+        The label files that were written.
+    """
+    written: list[str] = []
+    for label_file in label_files:
+        if stop_event is not None and stop_event.is_set():
+            break
+        if propagate_to_file(shapes, label_file):
+            written.append(label_file)
+    return written
+
+
+class PropagateShapesJob(threading.Thread):
+    """Run propagate_to_file() over `label_files` in the background.
+
+    `callback` is called from the job thread with the job once it is done.
+    wait_for() waits for a single file, which is then propagated next.
+    """
+
+    def __init__(
+        self,
+        shapes: list[dict],
+        label_files: list[str],
+        callback: Optional[Callable[["PropagateShapesJob"], None]] = None,
+    ):
+        super().__init__(daemon=True)
+        self.shapes = shapes
+        self.label_files = label_files
+        self.callback = callback
+        self.written: list[str] = []
+        # written without redrawing their vis_avm image
+        self.stale_vis: list[str] = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: list[str] = list(label_files)
+        self._done: dict[str, threading.Event] = {
+            label_file: threading.Event() for label_file in label_files
+        }
+
+    def run(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                with self._lock:
+                    if not self._pending:
+                        break
+                    label_file: str = self._pending.pop(0)
+                if propagate_to_file(self.shapes, label_file):
+                    self.written.append(label_file)
+                    if _is_avm_label_file(label_file):
+                        self.stale_vis.append(label_file)
+                self._done[label_file].set()
+        finally:
+            # cancelled: the files left are not to be waited for
+            for event in self._done.values():
+                event.set()
+        if self.callback is not None:
+            self.callback(self)
+
+    def wait_for(self, label_file: str, timeout: Optional[float] = None) -> bool:
+        """Wait until `label_file` is propagated, or is not to be."""
+        event: Optional[threading.Event] = self._done.get(label_file)
+        if event is None:
+            return True
+        with self._lock:
+            if label_file in self._pending:
+                self._pending.remove(label_file)
+                self._pending.insert(0, label_file)
+        return event.wait(timeout)
+
+    def cancel(self) -> None:
+        """Stop after the label file being written."""
+        self._stop_event.set()
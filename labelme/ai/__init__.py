@@ -1,9 +1,19 @@
 import gdown
 
+from ._embedding_cache import configure_embedding_cache  # NOQA: F401
+from ._embedding_cache import get_embedding_cache  # NOQA: F401
+from ._model_process import ModelProcess  # NOQA: F401
+from ._model_process import ModelProcessError  # NOQA: F401
+from ._pre_encoder import PreEncoder  # NOQA: F401
+from ._prediction_worker import PredictionWorker  # NOQA: F401
+from ._session_manager import configure_sessions  # NOQA: F401
+from ._session_manager import get_session_manager  # NOQA: F401
+from ._session_manager import warm_up  # NOQA: F401
 from .efficient_sam import EfficientSam
 from .segment_anything_model import SegmentAnythingModel
 from .text_to_annotation import get_rectangles_from_texts  # NOQA: F401
 from .text_to_annotation import get_shapes_from_annotations  # NOQA: F401
+from .text_to_annotation import merge_detections  # NOQA: F401
 from .text_to_annotation import non_maximum_suppression  # NOQA: F401
 
 
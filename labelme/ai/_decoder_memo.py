@@ -0,0 +1,76 @@
+import collections
+import threading
+
+import numpy as np
+from loguru import logger
+
+
+class DecoderMemo:
+    """Results of the decoder for the prompts of the current image.
+
+    Adding and removing points often goes back to a set of points already
+    decoded, e.g. after undoing a point. The points are rounded to
+    `decimals` for the key, and the `max_items` most recently used results
+    are kept. The results are shared, so they are made read-only.
+    """
+
+    def __init__(self, max_items=32, decimals=0):
+        self.max_items = max_items
+        self.decimals = decimals
+        self.num_hits = 0
+        self.num_misses = 0
+
+        self._lock = threading.Lock()
+        self._results = collections.OrderedDict()
+        self._generation = 0  # bumped by clear()
+
+    def key(self, method, points, point_labels):
+        points = np.round(np.asarray(points, dtype=np.float64), self.decimals)
+        return (
+            method,
+            points.tobytes(),
+            np.asarray(point_labels, dtype=np.int64).tobytes(),
+        )
+
+    def get_or_compute(self, method, points, point_labels, compute):
+        """Return the memoized result of `method`, or compute() it."""
+        key = self.key(method, points, point_labels)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.num_hits += 1
+                logger.debug(
+                    "Decoder memo hit: {} ({} hits, {} misses)",
+                    method,
+                    self.num_hits,
+                    self.num_misses,
+                )
+                return result
+            self.num_misses += 1
+            logger.debug(
+                "Decoder memo miss: {} ({} hits, {} misses)",
+                method,
+                self.num_hits,
+                self.num_misses,
+            )
+            generation = self._generation
+
+        result = compute()
+        result.setflags(write=False)
+        with self._lock:
+            if generation != self._generation:
+                return result  # of the previous image
+            self._results[key] = result
+            while len(self._results) > self.max_items:
+                self._results.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._generation += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
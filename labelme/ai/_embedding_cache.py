@@ -0,0 +1,172 @@
+import collections
+import hashlib
+import os
+import os.path as osp
+import threading
+import uuid
+
+import numpy as np
+from loguru import logger
+
+DEFAULT_CACHE_DIR = osp.expanduser("~/.cache/labelme/embeddings")
+
+
+class EmbeddingCache:
+    """Image embeddings of the AI models, shared by all of them.
+
+    Embeddings are keyed by the model and a hash of the image content. They
+    are saved as .npy files in `cache_dir` and memory-mapped when read, and
+    the least recently used files are removed once they take more than
+    `max_bytes`. Files may also be written by other processes (e.g. the
+    pre-encoding worker), which is why a miss of the index looks at the disk.
+    Without `cache_dir`, only the `max_memory_items` latest are kept.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=2 << 30, max_memory_items=10):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_memory_items = max_memory_items
+
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()  # key -> embedding
+        self._files = collections.OrderedDict()  # key -> size, oldest first
+        self._total_bytes = 0
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._scan()
+
+    @staticmethod
+    def key(model_name, image):
+        # not for security: sha1 is among the fastest of hashlib on images
+        h = hashlib.sha1()
+        h.update(model_name.encode("utf-8"))
+        h.update(str((image.shape, image.dtype.str)).encode("utf-8"))
+        # hashed in place, unlike image.tobytes()
+        h.update(memoryview(np.ascontiguousarray(image)).cast("B"))
+        return h.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                if key in self._files:
+                    self._files.move_to_end(key)
+                    self._touch(key)
+                return embedding
+            if self.cache_dir is None:
+                return None
+            path = self._path(key)
+            try:
+                embedding = np.load(path, mmap_mode="r")
+                os.utime(path)
+            except (OSError, ValueError):
+                if key in self._files:
+                    self._total_bytes -= self._files.pop(key)
+                return None
+            if key not in self._files:
+                self._files[key] = osp.getsize(path)
+                self._total_bytes += self._files[key]
+            self._files.move_to_end(key)
+            self._remember(key, embedding)
+            return embedding
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._memory:
+                return True
+            return self.cache_dir is not None and osp.exists(self._path(key))
+
+    def put(self, key, embedding):
+        with self._lock:
+            if self.cache_dir is None:
+                self._remember(key, embedding)
+                return
+            path = self._path(key)
+            # written aside then renamed, so readers never see a partial file
+            tmp_path = "{}.{}.tmp.npy".format(path[: -len(".npy")], uuid.uuid4().hex)
+            try:
+                np.save(tmp_path, embedding)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning("Failed to cache image embedding: {}", e)
+                self._remember(key, embedding)
+                return
+            if key in self._files:
+                self._total_bytes -= self._files.pop(key)
+            self._files[key] = osp.getsize(path)
+            self._total_bytes += self._files[key]
+            self._evict()
+            self._remember(key, embedding)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            while self._files:
+                key, _ = self._files.popitem()
+                self._remove(key)
+            self._total_bytes = 0
+
+    def _path(self, key):
+        return osp.join(self.cache_dir, key + ".npy")
+
+    def _remember(self, key, embedding):
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _scan(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".npy"):
+                continue
+            if ".tmp." in entry.name:  # being written by put()
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, entry.name[: -len(".npy")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._files) > 1:
+            key, size = self._files.popitem(last=False)
+            self._total_bytes -= size
+            self._memory.pop(key, None)
+            self._remove(key)
+
+    def _touch(self, key):
+        # the modification time orders the files of the next sessions
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _remove(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:  # already removed, or still mapped on Windows
+            pass
+
+
+_cache = EmbeddingCache()
+
+
+def configure_embedding_cache(persist=True, cache_dir=None, max_bytes=2 << 30):
+    """Set the cache used by the models, on disk if `persist`.
+
+    `cache_dir` defaults to DEFAULT_CACHE_DIR.
+    """
+    global _cache
+    if persist:
+        cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    else:
+        cache_dir = None
+    _cache = EmbeddingCache(cache_dir=cache_dir, max_bytes=max_bytes)
+    return _cache
+
+
+def get_embedding_cache():
+    return _cache
@@ -0,0 +1,216 @@
+import concurrent.futures
+import multiprocessing
+import threading
+import traceback
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+import numpy as np
+from loguru import logger
+
+from . import _utils
+from ._embedding_cache import configure_embedding_cache
+from ._embedding_cache import get_embedding_cache
+from ._session_manager import configure_sessions
+from ._session_manager import get_session_manager
+
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # owned by the GUI process, which unlinks it: not to be tracked here too
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _serve(model_class, cache_dir, max_bytes, session_config, connection):
+    configure_embedding_cache(
+        persist=cache_dir is not None, cache_dir=cache_dir, max_bytes=max_bytes
+    )
+    configure_sessions(**session_config)
+    model = model_class()
+
+    while True:
+        try:
+            method, kwargs = connection.recv()
+        except EOFError:
+            return
+        result = None
+        try:
+            if method == "set_image":
+                shm = _attach(kwargs["shm_name"])
+                image = np.ndarray(kwargs["shape"], dtype=np.uint8, buffer=shm.buf)
+                model.set_image(image=image.copy())
+                shm.close()
+            elif method == "predict_mask_from_points":
+                mask = model.predict_mask_from_points(
+                    points=kwargs["points"], point_labels=kwargs["point_labels"]
+                )
+                shm = _attach(kwargs["shm_name"])
+                np.ndarray(mask.shape, dtype=bool, buffer=shm.buf)[:] = mask
+                shm.close()
+            elif method == "predict_low_res_mask_from_points":
+                # small enough to be pickled
+                result = model.predict_low_res_mask_from_points(
+                    points=kwargs["points"], point_labels=kwargs["point_labels"]
+                )
+            else:
+                raise ValueError("Unsupported method: %r" % method)
+            connection.send((None, result))
+        except Exception:
+            connection.send((traceback.format_exc(), None))
+
+
+class ModelProcessError(Exception):
+    pass
+
+
+class ModelProcess:
+    """An AI model of class `model_class` hosted in a worker process.
+
+    It has the interface of the models (set_image, predict_*_from_points),
+    plus submit() for asynchronous requests. The image and the returned
+    masks go through shared memory, so the GUI process neither encodes nor
+    decodes, and only pays for the copies. The process is restarted if it
+    dies, up to `max_restarts` times, and then the model is run in process.
+    """
+
+    def __init__(self, model_class, max_restarts=3):
+        self.model_class = model_class
+        self.name = model_class.name
+        self.max_restarts = max_restarts
+
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._image = None
+        self._num_restarts = 0
+        self._process = None
+        self._connection = None
+        self._fallback = None
+        self._start()
+
+    def _start(self):
+        # not forked: the GUI process runs Qt and threads
+        context = multiprocessing.get_context("spawn")
+        self._connection, child_connection = context.Pipe()
+        cache = get_embedding_cache()
+        self._process = context.Process(
+            target=_serve,
+            args=(
+                self.model_class,
+                cache.cache_dir,
+                cache.max_bytes,
+                get_session_manager().config,
+                child_connection,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+        child_connection.close()
+
+    def _restart(self):
+        self._stop_process()
+        self._num_restarts += 1
+        if self._num_restarts > self.max_restarts:
+            logger.warning(
+                "AI model process of {!r} crashed {} times, running it in process",
+                self.name,
+                self._num_restarts,
+            )
+            self._fallback = self.model_class()
+            if self._image is not None:
+                self._fallback.set_image(self._image)
+            return
+        logger.warning("Restarting the AI model process of {!r}", self.name)
+        self._start()
+        if self._image is not None:
+            try:
+                self._call_once("set_image", image=self._image)
+            except (EOFError, OSError):
+                pass  # died again, see _call()
+
+    def _call_once(self, method, image=None, mask_shape=None, **kwargs):
+        shm = None
+        try:
+            if image is not None:
+                shm = shared_memory.SharedMemory(create=True, size=image.nbytes)
+                np.ndarray(image.shape, dtype=np.uint8, buffer=shm.buf)[:] = image
+                kwargs.update(shm_name=shm.name, shape=image.shape)
+            elif mask_shape is not None:
+                shm = shared_memory.SharedMemory(
+                    create=True, size=max(1, int(np.prod(mask_shape)))
+                )
+                kwargs.update(shm_name=shm.name)
+            self._connection.send((method, kwargs))
+            error, result = self._connection.recv()
+            if error is not None:
+                raise ModelProcessError(error)
+            if mask_shape is not None:
+                return np.ndarray(mask_shape, dtype=bool, buffer=shm.buf).copy()
+            return result
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def _call(self, method, **kwargs):
+        with self._lock:
+            # ends: each crash restarts, until the fallback after max_restarts
+            while self._fallback is None:
+                try:
+                    return self._call_once(method, **kwargs)
+                except (EOFError, OSError):  # the process died
+                    self._restart()
+            kwargs.pop("mask_shape", None)
+            return getattr(self._fallback, method)(**kwargs)
+
+    def submit(self, method, **kwargs):
+        """Call `method` of the model in the background, return a Future."""
+        return self._executor.submit(getattr(self, method), **kwargs)
+
+    def set_image(self, image):
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        with self._lock:
+            self._image = image
+        if self._fallback is not None:
+            self._fallback.set_image(image)
+            return
+        self._call("set_image", image=image)
+
+    def predict_mask_from_points(self, points, point_labels):
+        if self._fallback is not None:
+            return self._fallback.predict_mask_from_points(points, point_labels)
+        return self._call(
+            "predict_mask_from_points",
+            mask_shape=self._image.shape[:2],
+            points=points,
+            point_labels=point_labels,
+        )
+
+    def predict_low_res_mask_from_points(self, points, point_labels):
+        if self._fallback is not None:
+            return self._fallback.predict_low_res_mask_from_points(points, point_labels)
+        return self._call(
+            "predict_low_res_mask_from_points",
+            points=points,
+            point_labels=point_labels,
+        )
+
+    def predict_polygon_from_points(self, points, point_labels):
+        mask = self.predict_mask_from_points(points=points, point_labels=point_labels)
+        return _utils.compute_polygon_from_mask(mask=mask)
+
+    def _stop_process(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._process is not None:
+            self._process.join(1)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+
+    def close(self):
+        with self._lock:
+            self._stop_process()
+        self._executor.shutdown(wait=False)
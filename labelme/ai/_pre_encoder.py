@@ -0,0 +1,140 @@
+import multiprocessing
+import time
+
+import numpy as np
+from loguru import logger
+from qtpy import QtGui
+
+from labelme import utils
+from labelme.label_file import LabelFile
+from labelme.label_file import LabelFileError
+
+from ._embedding_cache import configure_embedding_cache
+from ._embedding_cache import get_embedding_cache
+from ._session_manager import configure_sessions
+from ._session_manager import get_session_manager
+
+
+def load_canvas_image(filename: str) -> np.ndarray:
+    """Return the image of `filename` as the canvas passes it to the models.
+
+    `filename` is a label file or an image file, as opened by
+    MainWindow.loadFile, and the image goes through the same QImage formats
+    as the canvas pixmap, so that its embedding has the same cache key.
+    """
+    if LabelFile.is_label_file(filename):
+        image_data = LabelFile(filename).imageData
+    else:
+        image_data = LabelFile.load_image_file(filename)
+    image = QtGui.QImage.fromData(image_data)
+    if image.isNull():
+        raise LabelFileError("Failed to load image of {!r}".format(filename))
+    image = image.convertToFormat(
+        QtGui.QImage.Format_ARGB32_Premultiplied
+        if image.hasAlphaChannel()
+        else QtGui.QImage.Format_RGB32
+    )
+    return utils.img_qt_to_arr(image)
+
+
+def _next_index(remaining: set[int], cursor: int) -> int:
+    # nearest first, and the upcoming frame before the previous one
+    return min(remaining, key=lambda index: (abs(index - cursor), index < cursor))
+
+
+def _pre_encode(
+    model_name,
+    cache_dir,
+    max_bytes,
+    session_config,
+    filenames,
+    cursor,
+    running,
+    stopped,
+):
+    from labelme.ai import MODELS
+
+    configure_embedding_cache(cache_dir=cache_dir, max_bytes=max_bytes)
+    configure_sessions(**session_config)
+    model = [model for model in MODELS if model.name == model_name][0]()
+
+    remaining: set[int] = set(range(len(filenames)))
+    while remaining and not stopped.is_set():
+        if not running.wait(timeout=0.5):
+            continue
+        index: int = _next_index(remaining, cursor.value)
+        remaining.discard(index)
+        t_start: float = time.time()
+        try:
+            image: np.ndarray = load_canvas_image(filenames[index])
+        except (LabelFileError, OSError) as e:
+            logger.warning(f"Skipping {filenames[index]!r} for pre-encoding: {e}")
+            continue
+        key: str = model.image_key(image)
+        if key in get_embedding_cache():
+            continue
+        get_embedding_cache().put(key, model.encode_image(image))
+        logger.debug(
+            f"Pre-encoded {filenames[index]!r} ({len(remaining)} remaining), "
+            f"elapsed_time={time.time() - t_start:.3f} [s]"
+        )
+    logger.debug(f"Done pre-encoding {len(filenames)} frames with {model_name!r}")
+
+
+class PreEncoder:
+    """Encode the frames of a sequence ahead of the annotator.
+
+    The encoder of the model runs in a worker process over `filenames`, the
+    frames nearest the cursor (see set_cursor) first, and writes the
+    embeddings into the on-disk embedding cache, where set_image() finds
+    them. It can be paused and resumed.
+    """
+
+    def __init__(self, model_name: str, filenames: list[str], cursor: int = 0):
+        cache = get_embedding_cache()
+        if cache.cache_dir is None:
+            raise ValueError("Pre-encoding needs the embedding cache on disk")
+        self.model_name = model_name
+
+        # not forked: the GUI process runs Qt and threads
+        context = multiprocessing.get_context("spawn")
+        self._cursor = context.Value("i", cursor)
+        self._running = context.Event()
+        self._running.set()
+        self._stopped = context.Event()
+        self._process = context.Process(
+            target=_pre_encode,
+            args=(
+                model_name,
+                cache.cache_dir,
+                cache.max_bytes,
+                get_session_manager().config,
+                filenames,
+                self._cursor,
+                self._running,
+                self._stopped,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+
+    def set_cursor(self, index: int) -> None:
+        self._cursor.value = index
+
+    def pause(self) -> None:
+        self._running.clear()
+
+    def resume(self) -> None:
+        self._running.set()
+
+    def is_alive(self) -> bool:
+        return self._process.is_alive()
+
+    def stop(self, timeout: float = 5) -> None:
+        """Stop after the frame being encoded, or kill after `timeout`."""
+        self._stopped.set()
+        self._running.set()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
@@ -0,0 +1,53 @@
+import threading
+
+from loguru import logger
+
+
+class PredictionWorker:
+    """Run predictions in a thread, the latest request only.
+
+    A request submitted while another is running replaces the pending one, so
+    requests made faster than they are computed (e.g. at every mouse move)
+    are dropped instead of queued. `callback(key, result)` is called from
+    the worker thread with the result of each request that is run.
+    """
+
+    def __init__(self, callback):
+        self._callback = callback
+        self._condition = threading.Condition()
+        self._pending = None
+        self._stopped = False
+        self.num_dropped = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, key, function, *args, **kwargs):
+        with self._condition:
+            if self._pending is not None:
+                self.num_dropped += 1
+            self._pending = (key, function, args, kwargs)
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._pending = None
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                key, function, args, kwargs = self._pending
+                self._pending = None
+            try:
+                result = function(*args, **kwargs)
+            except Exception:
+                logger.exception("Prediction failed")
+                continue
+            self._callback(key, result)
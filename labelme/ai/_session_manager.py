@@ -0,0 +1,110 @@
+import collections
+import threading
+import time
+
+import onnxruntime
+from loguru import logger
+
+_GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+class SessionManager:
+    """ONNX Runtime sessions of the AI models, created with shared options.
+
+    The `max_sessions` most recently used sessions are kept alive, so that
+    switching back to a model (which creates a new model object) does not
+    load its files again.
+    """
+
+    def __init__(
+        self,
+        intra_op_num_threads=0,
+        inter_op_num_threads=0,
+        graph_optimization_level="all",
+        enable_cpu_mem_arena=True,
+        max_sessions=4,
+    ):
+        if graph_optimization_level not in _GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(
+                "Unsupported graph_optimization_level: %r" % graph_optimization_level
+            )
+        # to configure the sessions of another process the same way
+        self.config = dict(
+            intra_op_num_threads=intra_op_num_threads,
+            inter_op_num_threads=inter_op_num_threads,
+            graph_optimization_level=graph_optimization_level,
+            enable_cpu_mem_arena=enable_cpu_mem_arena,
+            max_sessions=max_sessions,
+        )
+        self.max_sessions = max_sessions
+
+        self._lock = threading.Lock()
+        self._sessions = collections.OrderedDict()  # path -> session
+
+    def session_options(self):
+        options = onnxruntime.SessionOptions()
+        # 0 lets onnxruntime choose
+        options.intra_op_num_threads = self.config["intra_op_num_threads"]
+        options.inter_op_num_threads = self.config["inter_op_num_threads"]
+        options.graph_optimization_level = _GRAPH_OPTIMIZATION_LEVELS[
+            self.config["graph_optimization_level"]
+        ]
+        options.enable_cpu_mem_arena = self.config["enable_cpu_mem_arena"]
+        return options
+
+    def get(self, path):
+        """Return the session of the model file `path`, loading it if needed."""
+        with self._lock:
+            session = self._sessions.get(path)
+            if session is not None:
+                self._sessions.move_to_end(path)
+                return session
+            t_start = time.time()
+            session = onnxruntime.InferenceSession(
+                path, sess_options=self.session_options()
+            )
+            logger.debug(
+                "Loaded {!r}, elapsed_time={:.3f} [s]", path, time.time() - t_start
+            )
+            self._sessions[path] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def __contains__(self, path):
+        with self._lock:
+            return path in self._sessions
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+def warm_up(model):
+    """Run `model` once on a dummy image, to pay the first-run costs early."""
+    t_start = time.time()
+    model.warm_up()
+    logger.debug(
+        "Warmed up {!r}, elapsed_time={:.3f} [s]",
+        getattr(model, "name", type(model).__name__),
+        time.time() - t_start,
+    )
+
+
+_manager = SessionManager()
+
+
+def configure_sessions(**kwargs):
+    """Set the options of the sessions created from now on (see SessionManager)."""
+    global _manager
+    _manager = SessionManager(**kwargs)
+    return _manager
+
+
+def get_session_manager():
+    return _manager
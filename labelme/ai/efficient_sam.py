@@ -1,66 +1,117 @@
-import collections
+import os.path as osp
 import threading
 
 import imgviz
 import numpy as np
-import onnxruntime
 import skimage
 from loguru import logger
 
 from . import _utils
+from ._decoder_memo import DecoderMemo
+from ._embedding_cache import get_embedding_cache
+from ._session_manager import get_session_manager
 
 
 class EfficientSam:
     def __init__(self, encoder_path, decoder_path):
-        self._encoder_session = onnxruntime.InferenceSession(encoder_path)
-        self._decoder_session = onnxruntime.InferenceSession(decoder_path)
+        self._encoder_session = get_session_manager().get(encoder_path)
+        self._decoder_session = get_session_manager().get(decoder_path)
+
+        # embeddings are cached per encoder
+        self._encoder_name = osp.basename(encoder_path)
 
         self._lock = threading.Lock()
-        self._image_embedding_cache = collections.OrderedDict()
+        self._memo = DecoderMemo()
 
         self._thread = None
 
     def set_image(self, image: np.ndarray):
         with self._lock:
             self._image = image
-            self._image_embedding = self._image_embedding_cache.get(
-                self._image.tobytes()
-            )
-
-        if self._image_embedding is None:
-            self._thread = threading.Thread(
-                target=self._compute_and_cache_image_embedding
-            )
-            self._thread.start()
+            self._image_key = self.image_key(image)
+            self._image_embedding = get_embedding_cache().get(self._image_key)
+            self._memo.clear()
+
+            # under the lock, for _get_image_embedding() not to see the image
+            # without its embedding nor the thread computing it
+            if self._image_embedding is None:
+                self._thread = threading.Thread(
+                    target=self._compute_and_cache_image_embedding
+                )
+                self._thread.start()
 
     def _compute_and_cache_image_embedding(self):
         with self._lock:
             logger.debug("Computing image embedding...")
-            image = imgviz.rgba2rgb(self._image)
-            batched_images = image.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
-            (self._image_embedding,) = self._encoder_session.run(
-                output_names=None,
-                input_feed={"batched_images": batched_images},
-            )
-            if len(self._image_embedding_cache) > 10:
-                self._image_embedding_cache.popitem(last=False)
-            self._image_embedding_cache[self._image.tobytes()] = self._image_embedding
+            self._image_embedding = self.encode_image(self._image)
+            get_embedding_cache().put(self._image_key, self._image_embedding)
             logger.debug("Done computing image embedding.")
 
+    def image_key(self, image):
+        """Return the key of the embedding of `image` in the embedding cache."""
+        return get_embedding_cache().key(self._encoder_name, image)
+
+    def encode_image(self, image):
+        """Return the embedding of `image`, without caching it."""
+        image = imgviz.rgba2rgb(image)
+        batched_images = image.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+        (image_embedding,) = self._encoder_session.run(
+            output_names=None,
+            input_feed={"batched_images": batched_images},
+        )
+        return image_embedding
+
+    def warm_up(self):
+        """Run the encoder and the decoder once on a dummy image."""
+        image = np.zeros((64, 64, 4), dtype=np.uint8)
+        _compute_mask_from_points(
+            decoder_session=self._decoder_session,
+            image=image,
+            image_embedding=self.encode_image(image),
+            points=[[32, 32]],
+            point_labels=[1],
+        )
+
     def _get_image_embedding(self):
-        if self._thread is not None:
-            self._thread.join()
-            self._thread = None
-        with self._lock:
-            return self._image_embedding
+        # also called from the prediction worker thread, while set_image() may
+        # start the thread of another image on the GUI thread
+        while True:
+            with self._lock:
+                thread = self._thread
+                if thread is None:
+                    return self._image_embedding
+            thread.join()
+            with self._lock:
+                if self._thread is thread:
+                    self._thread = None
 
     def predict_mask_from_points(self, points, point_labels):
-        return _compute_mask_from_points(
-            decoder_session=self._decoder_session,
-            image=self._image,
-            image_embedding=self._get_image_embedding(),
-            points=points,
-            point_labels=point_labels,
+        return self._memo.get_or_compute(
+            "mask",
+            points,
+            point_labels,
+            lambda: _compute_mask_from_points(
+                decoder_session=self._decoder_session,
+                image=self._image,
+                image_embedding=self._get_image_embedding(),
+                points=points,
+                point_labels=point_labels,
+            ),
+        )
+
+    def predict_low_res_mask_from_points(self, points, point_labels):
+        """Return the mask subsampled to about 256 pixels on its long side."""
+        return self._memo.get_or_compute(
+            "low_res_mask",
+            points,
+            point_labels,
+            lambda: _compute_low_res_mask_from_points(
+                decoder_session=self._decoder_session,
+                image=self._image,
+                image_embedding=self._get_image_embedding(),
+                points=points,
+                point_labels=point_labels,
+            ),
         )
 
     def predict_polygon_from_points(self, points, point_labels):
@@ -68,9 +119,7 @@ class EfficientSam:
         return _utils.compute_polygon_from_mask(mask=mask)
 
 
-def _compute_mask_from_points(
-    decoder_session, image, image_embedding, points, point_labels
-):
+def _run_decoder(decoder_session, image, image_embedding, points, point_labels):
     input_point = np.array(points, dtype=np.float32)
     input_label = np.array(point_labels, dtype=np.float32)
 
@@ -87,14 +136,44 @@ def _compute_mask_from_points(
     }
 
     masks, _, _ = decoder_session.run(None, decoder_inputs)
-    mask = masks[0, 0, 0, :, :]  # (1, 1, 3, H, W) -> (H, W)
-    mask = mask > 0.0
+    return masks[0, 0, 0, :, :]  # (1, 1, 3, H, W) -> (H, W)
+
 
+def _remove_small_objects(mask):
     MIN_SIZE_RATIO = 0.05
     skimage.morphology.remove_small_objects(
         mask, min_size=mask.sum() * MIN_SIZE_RATIO, out=mask
     )
+    return mask
+
+
+def _compute_mask_from_points(
+    decoder_session, image, image_embedding, points, point_labels
+):
+    mask = _run_decoder(
+        decoder_session=decoder_session,
+        image=image,
+        image_embedding=image_embedding,
+        points=points,
+        point_labels=point_labels,
+    )
+    mask = _remove_small_objects(mask > 0.0)
 
     if 0:
         imgviz.io.imsave("mask.jpg", imgviz.label2rgb(mask, imgviz.rgb2gray(image)))
     return mask
+
+
+def _compute_low_res_mask_from_points(
+    decoder_session, image, image_embedding, points, point_labels, max_size=256
+):
+    mask = _run_decoder(
+        decoder_session=decoder_session,
+        image=image,
+        image_embedding=image_embedding,
+        points=points,
+        point_labels=point_labels,
+    )
+    # the decoder outputs the image resolution only: subsampled
+    step = max(1, int(np.ceil(max(mask.shape) / max_size)))
+    return _remove_small_objects(mask[::step, ::step] > 0.0)
@@ -1,68 +1,123 @@
-import collections
+import os.path as osp
 import threading
 
 import imgviz
 import numpy as np
-import onnxruntime
 import skimage
 from loguru import logger
 
 from . import _utils
+from ._decoder_memo import DecoderMemo
+from ._embedding_cache import get_embedding_cache
+from ._session_manager import get_session_manager
 
 
 class SegmentAnythingModel:
     def __init__(self, encoder_path, decoder_path):
         self._image_size = 1024
 
-        self._encoder_session = onnxruntime.InferenceSession(encoder_path)
-        self._decoder_session = onnxruntime.InferenceSession(decoder_path)
+        self._encoder_session = get_session_manager().get(encoder_path)
+        self._decoder_session = get_session_manager().get(decoder_path)
+
+        # embeddings are cached per encoder
+        self._encoder_name = osp.basename(encoder_path)
 
         self._lock = threading.Lock()
-        self._image_embedding_cache = collections.OrderedDict()
+        self._memo = DecoderMemo()
 
         self._thread = None
 
     def set_image(self, image: np.ndarray):
         with self._lock:
             self._image = image
-            self._image_embedding = self._image_embedding_cache.get(
-                self._image.tobytes()
-            )
+            self._image_key = self.image_key(image)
+            self._image_embedding = get_embedding_cache().get(self._image_key)
+            self._memo.clear()
 
-        if self._image_embedding is None:
-            self._thread = threading.Thread(
-                target=self._compute_and_cache_image_embedding
-            )
-            self._thread.start()
+            # under the lock, for _get_image_embedding() not to see the image
+            # without its embedding nor the thread computing it
+            if self._image_embedding is None:
+                self._thread = threading.Thread(
+                    target=self._compute_and_cache_image_embedding
+                )
+                self._thread.start()
 
     def _compute_and_cache_image_embedding(self):
         with self._lock:
             logger.debug("Computing image embedding...")
-            self._image_embedding = _compute_image_embedding(
-                image_size=self._image_size,
-                encoder_session=self._encoder_session,
-                image=self._image,
-            )
-            if len(self._image_embedding_cache) > 10:
-                self._image_embedding_cache.popitem(last=False)
-            self._image_embedding_cache[self._image.tobytes()] = self._image_embedding
+            self._image_embedding = self.encode_image(self._image)
+            get_embedding_cache().put(self._image_key, self._image_embedding)
             logger.debug("Done computing image embedding.")
 
-    def _get_image_embedding(self):
-        if self._thread is not None:
-            self._thread.join()
-            self._thread = None
-        with self._lock:
-            return self._image_embedding
+    def image_key(self, image):
+        """Return the key of the embedding of `image` in the embedding cache."""
+        return get_embedding_cache().key(self._encoder_name, image)
 
-    def predict_mask_from_points(self, points, point_labels):
-        return _compute_mask_from_points(
+    def encode_image(self, image):
+        """Return the embedding of `image`, without caching it."""
+        return _compute_image_embedding(
+            image_size=self._image_size,
+            encoder_session=self._encoder_session,
+            image=image,
+        )
+
+    def warm_up(self):
+        """Run the encoder and the decoder once on a dummy image."""
+        image = np.zeros((64, 64, 4), dtype=np.uint8)
+        _compute_mask_from_points(
             image_size=self._image_size,
             decoder_session=self._decoder_session,
-            image=self._image,
-            image_embedding=self._get_image_embedding(),
-            points=points,
-            point_labels=point_labels,
+            image=image,
+            image_embedding=self.encode_image(image),
+            points=[[32, 32]],
+            point_labels=[1],
+        )
+
+    def _get_image_embedding(self):
+        # also called from the prediction worker thread, while set_image() may
+        # start the thread of another image on the GUI thread
+        while True:
+            with self._lock:
+                thread = self._thread
+                if thread is None:
+                    return self._image_embedding
+            thread.join()
+            with self._lock:
+                if self._thread is thread:
+                    self._thread = None
+
+    def predict_mask_from_points(self, points, point_labels):
+        return self._memo.get_or_compute(
+            "mask",
+            points,
+            point_labels,
+            lambda: _compute_mask_from_points(
+                image_size=self._image_size,
+                decoder_session=self._decoder_session,
+                image=self._image,
+                image_embedding=self._get_image_embedding(),
+                points=points,
+                point_labels=point_labels,
+            ),
+        )
+
+    def predict_low_res_mask_from_points(self, points, point_labels):
+        """Return the mask at the resolution of the decoder, for previews.
+
+        It covers the whole image, and is about 256 pixels on its long side.
+        """
+        return self._memo.get_or_compute(
+            "low_res_mask",
+            points,
+            point_labels,
+            lambda: _compute_low_res_mask_from_points(
+                image_size=self._image_size,
+                decoder_session=self._decoder_session,
+                image=self._image,
+                image_embedding=self._get_image_embedding(),
+                points=points,
+                point_labels=point_labels,
+            ),
         )
 
     def predict_polygon_from_points(self, points, point_labels):
@@ -119,7 +174,7 @@ def _compute_image_embedding(image_size, encoder_session, image):
     return image_embedding
 
 
-def _compute_mask_from_points(
+def _run_decoder(
     image_size, decoder_session, image, image_embedding, points, point_labels
 ):
     input_point = np.array(points, dtype=np.float32)
@@ -152,15 +207,54 @@ def _compute_mask_from_points(
         "orig_im_size": np.array(image.shape[:2], dtype=np.float32),
     }
 
-    masks, _, _ = decoder_session.run(None, decoder_inputs)
-    mask = masks[0, 0]  # (1, 1, H, W) -> (H, W)
-    mask = mask > 0.0
+    masks, _, low_res_masks = decoder_session.run(None, decoder_inputs)
+    # (1, 1, H, W) -> (H, W), (1, 1, 256, 256) -> (256, 256)
+    return masks[0, 0], low_res_masks[0, 0]
 
+
+def _remove_small_objects(mask):
     MIN_SIZE_RATIO = 0.05
     skimage.morphology.remove_small_objects(
         mask, min_size=mask.sum() * MIN_SIZE_RATIO, out=mask
     )
+    return mask
+
+
+def _compute_mask_from_points(
+    image_size, decoder_session, image, image_embedding, points, point_labels
+):
+    mask, _ = _run_decoder(
+        image_size=image_size,
+        decoder_session=decoder_session,
+        image=image,
+        image_embedding=image_embedding,
+        points=points,
+        point_labels=point_labels,
+    )
+    mask = _remove_small_objects(mask > 0.0)
 
     if 0:
         imgviz.io.imsave("mask.jpg", imgviz.label2rgb(mask, imgviz.rgb2gray(image)))
     return mask
+
+
+def _compute_low_res_mask_from_points(
+    image_size, decoder_session, image, image_embedding, points, point_labels
+):
+    _, low_res_mask = _run_decoder(
+        image_size=image_size,
+        decoder_session=decoder_session,
+        image=image,
+        image_embedding=image_embedding,
+        points=points,
+        point_labels=point_labels,
+    )
+    # the low resolution mask covers the padded input of the encoder
+    _, new_height, new_width = _compute_scale_to_resize_image(
+        image_size=image_size, image=image
+    )
+    ratio = low_res_mask.shape[0] / image_size
+    low_res_mask = low_res_mask[
+        : int(np.ceil(new_height * ratio)), : int(np.ceil(new_width * ratio))
+    ]
+    return _remove_small_objects(low_res_mask > 0.0)
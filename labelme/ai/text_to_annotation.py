@@ -56,21 +56,73 @@ def non_maximum_suppression(
     score_threshold: float,
     max_num_detections: int,
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-    num_classes = np.max(labels) + 1
+    if len(boxes) == 0:
+        return (
+            np.empty((0, 4), dtype=np.float32),
+            np.empty((0,), dtype=np.float32),
+            np.empty((0,), dtype=np.int64),
+        )
+    labels = np.asarray(labels)
+    num_classes = labels.max() + 1
     scores_of_all_classes = np.zeros((len(boxes), num_classes), dtype=np.float32)
-    for i, (score, label) in enumerate(zip(scores, labels)):
-        scores_of_all_classes[i, label] = score
+    scores_of_all_classes[np.arange(len(boxes)), labels] = scores
     logger.debug(f"Input: num_boxes={len(boxes)}")
+    # newer osam also returns the indices of the boxes kept
     boxes, scores, labels = osam.apis.non_maximum_suppression(
-        boxes=boxes,
+        boxes=np.asarray(boxes, dtype=np.float32),
         scores=scores_of_all_classes,
         iou_threshold=iou_threshold,
         score_threshold=score_threshold,
         max_num_detections=max_num_detections,
-    )
+    )[:3]
     logger.debug(f"Output: num_boxes={len(boxes)}")
     return boxes, scores, labels
- 
+
+
+# the scores of the detections are at most _MAX_DETECTION_SCORE, and those
+# given to the existing boxes in merge_detections() are above it
+_MAX_DETECTION_SCORE = 1.0
+_EXISTING_SCORE = 1.01
+
+
+def merge_detections(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    labels: np.ndarray,
+    existing_boxes: np.ndarray,
+    existing_labels: np.ndarray,
+    iou_threshold: float,
+    score_threshold: float,
+    max_num_detections: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the detections left by the NMS with the existing boxes.
+
+    The existing boxes, (N, 4) in any corner order, are given a score above
+    any detection, so that they suppress the detections they overlap, and
+    are not returned.
+    """
+    existing_boxes = np.asarray(existing_boxes, dtype=np.float32).reshape(-1, 4)
+    existing_boxes = np.concatenate(
+        [
+            np.minimum(existing_boxes[:, :2], existing_boxes[:, 2:]),
+            np.maximum(existing_boxes[:, :2], existing_boxes[:, 2:]),
+        ],
+        axis=1,
+    )
+    boxes, scores, labels = non_maximum_suppression(
+        boxes=np.concatenate([boxes, existing_boxes]),
+        scores=np.concatenate(
+            [scores, np.full(len(existing_boxes), _EXISTING_SCORE, dtype=np.float32)]
+        ),
+        labels=np.concatenate([labels, existing_labels]).astype(np.int64),
+        iou_threshold=iou_threshold,
+        score_threshold=score_threshold,
+        max_num_detections=max_num_detections + len(existing_boxes),
+    )
+    keep = scores <= _MAX_DETECTION_SCORE
+    return boxes[keep], scores[keep], labels[keep]
+
+
 def get_shapes_from_annotations(
     boxes: np.ndarray,
     scores: np.ndarray,
@@ -78,12 +130,13 @@ def get_shapes_from_annotations(
     texts: List[str]
 ) -> List[dict]:
     shapes: List[dict] = []
-    for box, score, label in zip(boxes.tolist(), scores.tolist(), labels.tolist()):
+    # converted at once, not box by box
+    points_of_all = np.asarray(boxes).reshape(-1, 2, 2).tolist()
+    for points, score, label in zip(points_of_all, scores.tolist(), labels.tolist()):
         text = texts[label]
-        xmin, ymin, xmax, ymax = box
         shape = {
             "label": text,
-            "points": [[xmin, ymin], [xmax, ymax]],
+            "points": points,
             "group_id": None,
             "shape_type": "rectangle",
             "flags": {},
@@ -7,10 +7,10 @@ import pyperclip
 import os
 import os.path as osp
 import re
+import threading
 import webbrowser
 import datetime
 
-import imgviz
 import natsort
 import numpy as np
 from loguru import logger
@@ -22,14 +22,19 @@ from qtpy.QtCore import Qt
 from labelme import PY2
 from labelme import __appname__
 from labelme import ai
+from labelme._automation.propagate_shapes import PropagateShapesJob
 from labelme.ai import MODELS
 from labelme.config import get_config
 from labelme.label_file import LabelFile
 from labelme.label_file import LabelFileError
+from labelme.label_file import need_show_list
+from labelme.label_registry import LabelRegistry
 from labelme.shape import Shape
+from labelme.view_state import ViewStateStore
 from labelme.widgets import AiPromptWidget
 from labelme.widgets import BrightnessContrastDialog
 from labelme.widgets import Canvas
+from labelme.widgets import brightness_contrast_dialog
 from labelme.widgets import FileDialogPreview
 from labelme.widgets import LabelDialog
 from labelme.widgets import LabelListWidget
@@ -48,12 +53,14 @@ from . import utils
 
 # __appname__ = "Aperdata.AI.labelavm"
 
-LABEL_COLORMAP = imgviz.label_colormap()
 
 
 class MainWindow(QtWidgets.QMainWindow):
     FIT_WINDOW, FIT_WIDTH, MANUAL_ZOOM = 0, 1, 2
 
+    # emitted from the propagation job thread with the job, once done
+    shapesPropagated = QtCore.Signal(object)
+
     def __init__(
         self,
         config=None,
@@ -73,23 +80,44 @@ class MainWindow(QtWidgets.QMainWindow):
         self._config = config
 
         # set default shape colors
-        Shape.line_color = QtGui.QColor(*self._config["shape"]["line_color"])
-        Shape.fill_color = QtGui.QColor(*self._config["shape"]["fill_color"])
-        Shape.select_line_color = QtGui.QColor(
+        Shape.default_line_color = QtGui.QColor(*self._config["shape"]["line_color"])
+        Shape.default_fill_color = QtGui.QColor(*self._config["shape"]["fill_color"])
+        Shape.default_select_line_color = QtGui.QColor(
             *self._config["shape"]["select_line_color"]
         )
-        Shape.select_fill_color = QtGui.QColor(
+        Shape.default_select_fill_color = QtGui.QColor(
             *self._config["shape"]["select_fill_color"]
         )
-        Shape.vertex_fill_color = QtGui.QColor(
+        Shape.default_vertex_fill_color = QtGui.QColor(
             *self._config["shape"]["vertex_fill_color"]
         )
-        Shape.hvertex_fill_color = QtGui.QColor(
+        Shape.default_hvertex_fill_color = QtGui.QColor(
             *self._config["shape"]["hvertex_fill_color"]
         )
 
         # Set point size from config file
         Shape.point_size = self._config["shape"]["point_size"]
+        # Level of detail for shapes that are not being edited
+        Shape.lod_tolerance = self._config["canvas"]["lod"]["tolerance"]
+        Shape.lod_vertex_spacing = self._config["canvas"]["lod"]["vertex_spacing"]
+
+        # Image embeddings of the AI models, reused across frames and sessions
+        embedding_cache = self._config["ai"]["embedding_cache"]
+        ai.configure_embedding_cache(
+            persist=embedding_cache["persist"],
+            cache_dir=embedding_cache["dir"],
+            max_bytes=embedding_cache["max_size_mb"] << 20,
+        )
+        # ONNX Runtime sessions of the AI models, shared by all of them
+        onnxruntime_config = dict(self._config["ai"]["onnxruntime"])
+        warm_up = onnxruntime_config.pop("warm_up")
+        ai.configure_sessions(**onnxruntime_config)
+        if warm_up:
+            threading.Thread(
+                target=self._warmUpAiModel,
+                args=(self._config["ai"]["default"],),
+                daemon=True,
+            ).start()
 
         super(MainWindow, self).__init__()
         # self.setWindowTitle(__appname__)
@@ -99,8 +127,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.dirty = False
 
         self._noSelectionSlot = False
+        self._noVisibilitySlot = False
 
         self._copied_shapes = None
+        self._propagateJob = None
+        # label files propagated to, whose vis_avm image is to be redrawn
+        self._staleVisFiles = set()
+        self._preEncoder = None
 
         # Main widgets and related state.
         self.labelDialog = LabelDialog(
@@ -129,10 +162,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.labelList.itemDoubleClicked.connect(self._edit_label)
         self.labelList.itemChanged.connect(self.labelItemChanged)
         self.labelList.itemDropped.connect(self.labelOrderChanged)
+        self.shapesPropagated.connect(self._onShapesPropagated)
         self.shape_dock = QtWidgets.QDockWidget(self.tr("Polygon Labels"), self)
         self.shape_dock.setObjectName("Labels")
         self.shape_dock.setWidget(self.labelList)
 
+        self.labelRegistry = LabelRegistry(
+            shape_color=self._config["shape_color"],
+            label_colors=self._config["label_colors"],
+            default_shape_color=self._config["default_shape_color"],
+            shift_auto_shape_color=self._config["shift_auto_shape_color"],
+        )
         self.uniqLabelList = UniqueLabelQListWidget()
         self.uniqLabelList.setToolTip(
             self.tr(
@@ -141,10 +181,7 @@ class MainWindow(QtWidgets.QMainWindow):
         )
         if self._config["labels"]:
             for label in self._config["labels"]:
-                item = self.uniqLabelList.createItemFromLabel(label)
-                self.uniqLabelList.addItem(item)
-                rgb = self._get_rgb_by_label(label)
-                self.uniqLabelList.setItemLabel(item, label, rgb)
+                self._registerLabel(label)
         self.label_dock = QtWidgets.QDockWidget(self.tr("Label List"), self)
         self.label_dock.setObjectName("Label List")
         self.label_dock.setWidget(self.uniqLabelList)
@@ -179,6 +216,9 @@ class MainWindow(QtWidgets.QMainWindow):
             double_click=self._config["canvas"]["double_click"],
             num_backups=self._config["canvas"]["num_backups"],
             crosshair=self._config["canvas"]["crosshair"],
+            max_fps=self._config["canvas"]["max_fps"],
+            ai_process=self._config["ai"]["process_isolation"],
+            ai_low_res_preview=self._config["ai"]["low_res_preview"],
         )
         self.canvas.zoomRequest.connect(self.zoomRequest)
         self.canvas.mouseMoved.connect(
@@ -476,6 +516,26 @@ class MainWindow(QtWidgets.QMainWindow):
             self.tr("Paste copied polygons"),
             enabled=False,
         )
+        propagate = action(
+            self.tr("Propagate to Next Frames"),
+            self.propagateSelectedShapes,
+            None,
+            "copy",
+            self.tr("Add the selected polygons to the label files of the next frames"),
+            enabled=False,
+        )
+        preEncode = action(
+            self.tr("Pre-encode Folder"),
+            self.togglePreEncoding,
+            None,
+            "objects",
+            self.tr(
+                "Compute the AI model image embeddings of the frames of the folder "
+                "in the background, nearest frames first (uncheck to pause)"
+            ),
+            checkable=True,
+            enabled=False,
+        )
         undoLastPoint = action(
             self.tr("Undo last point"),
             self.canvas.undoLastPoint,
@@ -501,6 +561,14 @@ class MainWindow(QtWidgets.QMainWindow):
             self.tr("Undo last add and edit of shape"),
             enabled=False,
         )
+        redo = action(
+            self.tr("Redo"),
+            self.redoShapeEdit,
+            shortcuts["redo"],
+            None,
+            self.tr("Redo last undone add and edit of shape"),
+            enabled=False,
+        )
 
         hideAll = action(
             self.tr("&Hide\nPolygons"),
@@ -660,6 +728,59 @@ class MainWindow(QtWidgets.QMainWindow):
         self.labelList.setContextMenuPolicy(Qt.CustomContextMenu)
         self.labelList.customContextMenuRequested.connect(self.popLabelListMenu)
 
+        # Unique label list context menu, to show and hide whole classes.
+        showLabels = action(
+            self.tr("Show Class"),
+            functools.partial(self.setSelectedLabelsVisible, True),
+            None,
+            "eye",
+            self.tr("Show the shapes of the selected classes"),
+        )
+        hideLabels = action(
+            self.tr("Hide Class"),
+            functools.partial(self.setSelectedLabelsVisible, False),
+            None,
+            "eye",
+            self.tr("Hide the shapes of the selected classes"),
+        )
+        showOnlyLabels = action(
+            self.tr("Show Only Class"),
+            lambda: self.showOnlyLabels(self._selectedUniqLabels()),
+            None,
+            "eye",
+            self.tr("Hide the shapes of all other classes"),
+        )
+        showListedLabels = action(
+            self.tr("Show Only Listed Classes"),
+            functools.partial(self.showOnlyLabels, need_show_list),
+            None,
+            "eye",
+            self.tr("Hide the shapes of the classes that are not in the show list"),
+        )
+        showAllLabels = action(
+            self.tr("Show All Classes"),
+            self.showAllLabels,
+            None,
+            "eye",
+            self.tr("Show the shapes of all classes"),
+        )
+        uniqLabelMenu = QtWidgets.QMenu()
+        utils.addActions(
+            uniqLabelMenu,
+            (
+                showLabels,
+                hideLabels,
+                showOnlyLabels,
+                None,
+                showListedLabels,
+                showAllLabels,
+            ),
+        )
+        self.uniqLabelList.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.uniqLabelList.customContextMenuRequested.connect(
+            self.popUniqLabelListMenu
+        )
+
         # Store actions for further handling.
         self.actions = utils.struct(
             saveAuto=saveAuto,
@@ -676,8 +797,11 @@ class MainWindow(QtWidgets.QMainWindow):
             duplicate=duplicate,
             copy=copy,
             paste=paste,
+            propagate=propagate,
+            preEncode=preEncode,
             undoLastPoint=undoLastPoint,
             undo=undo,
+            redo=redo,
             removePoint=removePoint,
             createMode=createMode,
             createFileLog = createFileLog,
@@ -712,11 +836,14 @@ class MainWindow(QtWidgets.QMainWindow):
                 delete,
                 None,
                 undo,
+                redo,
                 undoLastPoint,
                 None,
                 removePoint,
                 None,
                 toggle_keep_prev_mode,
+                propagate,
+                preEncode,
             ),
             # menu shown at right click
             menu=(
@@ -735,6 +862,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 paste,
                 delete,
                 undo,
+                redo,
                 undoLastPoint,
                 removePoint,
             ),
@@ -752,6 +880,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 createAiMaskMode,
                 editMode,
                 brightnessContrast,
+                preEncode,
             ),
             onShapesPresent=(saveAs, hideAll, showAll, toggleAll),
         )
@@ -765,6 +894,7 @@ class MainWindow(QtWidgets.QMainWindow):
             help=self.menu(self.tr("&Help")),
             recentFiles=QtWidgets.QMenu(self.tr("Open &Recent")),
             labelList=labelMenu,
+            uniqLabelList=uniqLabelMenu,
         )
 
         utils.addActions(
@@ -937,12 +1067,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.otherData = None
         self.zoom_level = 100
         self.fit_window = False
-        self.zoom_values = {}  # key=filename, value=(zoom_mode, zoom_value)
-        self.brightnessContrast_values = {}
-        self.scroll_values = {
-            Qt.Horizontal: {},
-            Qt.Vertical: {},
-        }  # key=filename, value=scroll_value
+        # zoom, scroll and brightness/contrast of the recently viewed frames
+        self.viewStates = ViewStateStore(
+            max_size=self._config["view_state"]["max_frames"]
+        )
+        self._zoomInitialized = False
+        # (imageData, RGB array, histograms), see _decodedImage
+        self._decoded_image = None
 
         if filename is not None and osp.isdir(filename):
             self.importDirImages(filename, load=False)
@@ -1160,6 +1291,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def setDirty(self):
         # Even if we autosave the file, we keep the ability to undo
         self.actions.undo.setEnabled(self.canvas.isShapeRestorable)
+        self.actions.redo.setEnabled(self.canvas.isShapeRedoable)
 
         if self._config["auto_save"] or self.actions.saveAuto.isChecked():
             label_file = osp.splitext(self.imagePath)[0] + ".json"
@@ -1217,36 +1349,29 @@ class MainWindow(QtWidgets.QMainWindow):
             texts=texts,
         )
 
-        for shape in self.canvas.shapes:
-            if shape.shape_type != "rectangle" or shape.label not in texts:
-                continue
-            box = np.array(
-                [
-                    shape.points[0].x(),
-                    shape.points[0].y(),
-                    shape.points[1].x(),
-                    shape.points[1].y(),
-                ],
-                dtype=np.float32,
-            )
-            boxes = np.r_[boxes, [box]]
-            scores = np.r_[scores, [1.01]]
-            labels = np.r_[labels, [texts.index(shape.label)]]
-
-        boxes, scores, labels = ai.non_maximum_suppression(
+        existing: list[Shape] = [
+            shape
+            for shape in self.canvas.shapes
+            if shape.shape_type == "rectangle"
+            and len(shape) == 2
+            and shape.label in texts
+        ]
+        # the existing boxes suppress the new ones they overlap
+        boxes, scores, labels = ai.merge_detections(
             boxes=boxes,
             scores=scores,
             labels=labels,
+            existing_boxes=np.array(
+                [shape.vertices for shape in existing], dtype=np.float32
+            ).reshape(-1, 4),
+            existing_labels=np.array(
+                [texts.index(shape.label) for shape in existing], dtype=np.int64
+            ),
             iou_threshold=self._ai_prompt_widget.get_iou_threshold(),
             score_threshold=self._ai_prompt_widget.get_score_threshold(),
             max_num_detections=100,
         )
 
-        keep = scores != 1.01
-        boxes = boxes[keep]
-        scores = scores[keep]
-        labels = labels[keep]
-
         shape_dicts: list[dict] = ai.get_shapes_from_annotations(
             boxes=boxes,
             scores=scores,
@@ -1254,18 +1379,20 @@ class MainWindow(QtWidgets.QMainWindow):
             texts=texts,
         )
 
+        # read-only, so that each shape shares its row instead of a copy
+        vertices = boxes.astype(np.float64).reshape(-1, 2, 2)
+        vertices.flags.writeable = False
         shapes: list[Shape] = []
-        for shape_dict in shape_dicts:
+        for shape_dict, points in zip(shape_dicts, vertices):
             shape = Shape(
                 label=shape_dict["label"],
                 shape_type=shape_dict["shape_type"],
                 description=shape_dict["description"],
             )
-            for point in shape_dict["points"]:
-                shape.addPoint(QtCore.QPointF(*point))
+            shape.vertices = points
+            shape.point_labels = [1, 1]
             shapes.append(shape)
 
-        self.canvas.storeShapes()
         self.loadShapes(shapes, replace=False)
         self.setDirty()
 
@@ -1294,10 +1421,43 @@ class MainWindow(QtWidgets.QMainWindow):
     # Callbacks
 
     def undoShapeEdit(self):
-        self.canvas.restoreShape()
-        self.labelList.clear()
-        self.loadShapes(self.canvas.shapes)
+        self._applyShapeChanges(self.canvas.restoreShape())
+
+    def redoShapeEdit(self):
+        self._applyShapeChanges(self.canvas.redoShape())
+
+    def _applyShapeChanges(self, changes):
+        """Update the label list for the ShapeChange of an undo or redo.
+
+        Only the rows of the shapes involved are touched, so the cost does not
+        depend on the number of shapes of the frame.
+        """
+        self._noSelectionSlot = True
+        self._noVisibilitySlot = True
+        for change in changes:
+            if change.kind == "add":
+                item = self._createLabelListItem(change.shape)
+                self.labelList.insertItem(change.index, item)
+            elif change.kind == "remove":
+                self.labelList.removeItem(
+                    self.labelList.findItemByShape(change.shape)
+                )
+            elif change.kind == "change":
+                item = self.labelList.findItemByShape(change.shape)
+                item.setText(self._labelItemText(change.shape))
+            elif change.kind == "reorder":
+                self.labelList.clear()
+                self.labelList.addItems(
+                    [self._createLabelListItem(s) for s in self.canvas.shapes]
+                )
+        self.labelList.clearSelection()
+        self._noVisibilitySlot = False
+        self._noSelectionSlot = False
+        if self.canvas.shapes:
+            for action in self.actions.onShapesPresent:
+                action.setEnabled(True)
         self.actions.undo.setEnabled(self.canvas.isShapeRestorable)
+        self.actions.redo.setEnabled(self.canvas.isShapeRedoable)
 
     def tutorial(self):
         url = "https://aperdata.ai/"  # NOQA
@@ -1311,6 +1471,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.actions.editMode.setEnabled(not drawing)
         self.actions.undoLastPoint.setEnabled(drawing)
         self.actions.undo.setEnabled(not drawing)
+        self.actions.redo.setEnabled(not drawing and self.canvas.isShapeRedoable)
         self.actions.delete.setEnabled(not drawing)
 
     def toggleDrawMode(self, edit=True, createMode="polygon"):
@@ -1360,6 +1521,52 @@ class MainWindow(QtWidgets.QMainWindow):
     def popLabelListMenu(self, point):
         self.menus.labelList.exec_(self.labelList.mapToGlobal(point))
 
+    def popUniqLabelListMenu(self, point):
+        self.menus.uniqLabelList.exec_(self.uniqLabelList.mapToGlobal(point))
+
+    def _selectedUniqLabels(self):
+        return [item.data(Qt.UserRole) for item in self.uniqLabelList.selectedItems()]
+
+    def setSelectedLabelsVisible(self, value):
+        self.setLabelsVisible(self._selectedUniqLabels(), value)
+
+    def setLabelsVisible(self, labels, value):
+        self.canvas.setLabelsVisible(labels, value)
+        self._updateUniqLabelsVisibility()
+
+    def showOnlyLabels(self, labels):
+        self.canvas.showOnlyLabels(labels)
+        self._updateUniqLabelsVisibility()
+
+    def showAllLabels(self):
+        self.canvas.showAllLabels()
+        self._updateUniqLabelsVisibility()
+
+    def _updateUniqLabelsVisibility(self):
+        # hidden classes are greyed out in the unique label list
+        for i in range(self.uniqLabelList.count()):
+            item = self.uniqLabelList.item(i)
+            widget = self.uniqLabelList.itemWidget(item)
+            if widget is not None:
+                widget.setEnabled(self.canvas.isLabelVisible(item.data(Qt.UserRole)))
+        self._noVisibilitySlot = True
+        for item in self.labelList:
+            self._updateLabelItemCheck(item)
+        self._noVisibilitySlot = False
+
+    def _updateLabelItemCheck(self, item):
+        # the shapes of a hidden class show unchecked, and cannot be checked
+        # until the class is shown again
+        shape = item.shape()
+        labelVisible = self.canvas.isLabelVisible(shape.label)
+        item.setCheckState(
+            Qt.Checked if shape.visible and labelVisible else Qt.Unchecked
+        )
+        if labelVisible:
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+        else:
+            item.setFlags(item.flags() & ~Qt.ItemIsUserCheckable)
+
     def validateLabel(self, label):
         # no validation
         if self._config["validate_label"] is None:
@@ -1442,7 +1649,7 @@ class MainWindow(QtWidgets.QMainWindow):
             )
             return
 
-        self.canvas.storeShapes()
+        self.canvas.beginShapeEdit([item.shape() for item in items])
         for item in items:
             shape: Shape = item.shape()
 
@@ -1464,12 +1671,9 @@ class MainWindow(QtWidgets.QMainWindow):
                 )
             else:
                 item.setText("{} ({})".format(shape.label, shape.group_id))
-            self.setDirty()
-            if self.uniqLabelList.findItemByLabel(shape.label) is None:
-                item = self.uniqLabelList.createItemFromLabel(shape.label)
-                self.uniqLabelList.addItem(item)
-                rgb = self._get_rgb_by_label(shape.label)
-                self.uniqLabelList.setItemLabel(item, shape.label, rgb)
+            self._registerLabel(shape.label)
+        self.canvas.commitShapeEdit()
+        self.setDirty()
 
     def fileSearchChanged(self):
         self.importDirImages(
@@ -1518,19 +1722,20 @@ class MainWindow(QtWidgets.QMainWindow):
             shape.selected = False
         self.labelList.clearSelection()
         self.canvas.selectedShapes = selected_shapes
+        items = []
         for shape in self.canvas.selectedShapes:
             shape.selected = True
-            item = self.labelList.findItemByShape(shape)
-            # print("===========item================", item)
-            self.labelList.selectItem(item)
-            # print("=========preventScroll===========", self.preventScroll)
-            if self.preventScroll:  # 只有在允许滚动时才执行
-                self.labelList.scrollToItem(item)
+            items.append(self.labelList.findItemByShape(shape))
+        self.labelList.selectItems(items)
+        # print("=========preventScroll===========", self.preventScroll)
+        if items and self.preventScroll:  # 只有在允许滚动时才执行
+            self.labelList.scrollToItem(items[-1])
         self._noSelectionSlot = False
         n_selected = len(selected_shapes)
         self.actions.delete.setEnabled(n_selected)
         self.actions.duplicate.setEnabled(n_selected)
         self.actions.copy.setEnabled(n_selected)
+        self.actions.propagate.setEnabled(n_selected)
         self.actions.edit.setEnabled(n_selected)
 
     def mousePressEvent(self, event):
@@ -1546,60 +1751,45 @@ class MainWindow(QtWidgets.QMainWindow):
         self.preventScroll = True
 
     def addLabel(self, shape):
+        self.labelList.addItem(self._createLabelListItem(shape))
+        for action in self.actions.onShapesPresent:
+            action.setEnabled(True)
+
+    def _createLabelListItem(self, shape):
+        item = LabelListWidgetItem(self._labelItemText(shape), shape)
+        self._updateLabelItemCheck(item)
+        return item
+
+    def _labelItemText(self, shape):
+        """Return the label list text of `shape`, registering its label."""
         if shape.group_id is None:
             text = shape.label
         else:
             text = "{} ({})".format(shape.label, shape.group_id)
-        # print("=======sl==============", text, shape)
-        label_list_item = LabelListWidgetItem(text, shape)
-        self.labelList.addItem(label_list_item)
-        if self.uniqLabelList.findItemByLabel(shape.label) is None:
-            item = self.uniqLabelList.createItemFromLabel(shape.label)
-            self.uniqLabelList.addItem(item)
-            rgb = self._get_rgb_by_label(shape.label)
-            self.uniqLabelList.setItemLabel(item, shape.label, rgb)
+        self._registerLabel(shape.label)
         self.labelDialog.addLabelHistory(shape.label)
-        for action in self.actions.onShapesPresent:
-            action.setEnabled(True)
 
         self._update_shape_color(shape)
-        label_list_item.setText(
-            '{} <font color="#{:02x}{:02x}{:02x}">●</font>'.format(
-                html.escape(text), *shape.fill_color.getRgb()[:3]
-            )
+        return '{} <font color="#{:02x}{:02x}{:02x}">●</font>'.format(
+            html.escape(text), *shape.fill_color.getRgb()[:3]
         )
 
+    def _registerLabel(self, label):
+        """Add `label` to the unique label list if it is new."""
+        if self.uniqLabelList.findItemByLabel(label) is None:
+            item = self.uniqLabelList.createItemFromLabel(label)
+            self.uniqLabelList.addItem(item)
+            rgb = self.labelRegistry.rgb(label)
+            self.uniqLabelList.setItemLabel(item, label, rgb)
+            # hidden already if it is not one of the classes shown only
+            self.uniqLabelList.itemWidget(item).setEnabled(
+                self.canvas.isLabelVisible(label)
+            )
+
     def _update_shape_color(self, shape):
-        r, g, b = self._get_rgb_by_label(shape.label)
-        shape.line_color = QtGui.QColor(r, g, b)
-        shape.vertex_fill_color = QtGui.QColor(r, g, b)
-        shape.hvertex_fill_color = QtGui.QColor(255, 255, 255)
-        shape.fill_color = QtGui.QColor(r, g, b, 128)
-        shape.select_line_color = QtGui.QColor(255, 255, 255)
-        shape.select_fill_color = QtGui.QColor(r, g, b, 155)
-
-    def _get_rgb_by_label(self, label):
-        if self._config["shape_color"] == "auto":
-            # print("=========a=======================")
-            item = self.uniqLabelList.findItemByLabel(label)
-            if item is None:
-                item = self.uniqLabelList.createItemFromLabel(label)
-                self.uniqLabelList.addItem(item)
-                rgb = self._get_rgb_by_label(label)
-                self.uniqLabelList.setItemLabel(item, label, rgb)
-            label_id = self.uniqLabelList.indexFromItem(item).row() + 1
-            label_id += self._config["shift_auto_shape_color"]
-            return LABEL_COLORMAP[label_id % len(LABEL_COLORMAP)]
-        elif (
-            self._config["shape_color"] == "manual"
-            and self._config["label_colors"]
-            and label in self._config["label_colors"]
-        ):
-            # print("==============m==================", self._config["label_colors"][label])
-            return self._config["label_colors"][label]
-        elif self._config["default_shape_color"]:
-            return self._config["default_shape_color"]
-        return (0, 255, 0)
+        # shapes of a label share the color objects of the registry
+        self._registerLabel(shape.label)
+        self.labelRegistry.update_shape_color(shape)
 
     def remLabels(self, shapes):
         for shape in shapes:
@@ -1608,8 +1798,10 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def loadShapes(self, shapes, replace=True):
         self._noSelectionSlot = True
-        for shape in shapes:
-            self.addLabel(shape)
+        self.labelList.addItems([self._createLabelListItem(s) for s in shapes])
+        if shapes:
+            for action in self.actions.onShapesPresent:
+                action.setEnabled(True)
         self.labelList.clearSelection()
         self._noSelectionSlot = False
         self.canvas.loadShapes(shapes, replace=replace)
@@ -1636,8 +1828,11 @@ class MainWindow(QtWidgets.QMainWindow):
                 description=description,
                 mask=shape["mask"],
             )
-            for x, y in points:
-                shape.addPoint(QtCore.QPointF(x, y))
+            # as addPoint(): a later point equal to the first one is dropped
+            points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+            points = points[np.r_[True, np.any(points[1:] != points[0], axis=1)]]
+            shape.vertices = points
+            shape.point_labels = [1] * len(points)
             shape.close()
 
             default_flags = {}
@@ -1661,27 +1856,29 @@ class MainWindow(QtWidgets.QMainWindow):
             item.setCheckState(Qt.Checked if flag else Qt.Unchecked)
             self.flag_widget.addItem(item)
 
+    @staticmethod
+    def _formatShape(s):
+        """Return `s` as a shape dict of LabelFile.save."""
+        data = s.other_data.copy()
+        data.update(
+            dict(
+                label=s.label.encode("utf-8") if PY2 else s.label,
+                points=s.vertices.tolist(),
+                group_id=s.group_id,
+                description=s.description,
+                shape_type=s.shape_type,
+                flags=s.flags,
+                mask=None
+                if s.mask is None
+                else utils.img_arr_to_b64(s.mask.astype(np.uint8)),
+            )
+        )
+        return data
+
     def saveLabels(self, filename):
         lf = LabelFile()
 
-        def format_shape(s):
-            data = s.other_data.copy()
-            data.update(
-                dict(
-                    label=s.label.encode("utf-8") if PY2 else s.label,
-                    points=[(p.x(), p.y()) for p in s.points],
-                    group_id=s.group_id,
-                    description=s.description,
-                    shape_type=s.shape_type,
-                    flags=s.flags,
-                    mask=None
-                    if s.mask is None
-                    else utils.img_arr_to_b64(s.mask.astype(np.uint8)),
-                )
-            )
-            return data
-
-        shapes = [format_shape(item.shape()) for item in self.labelList]
+        shapes = [self._formatShape(item.shape()) for item in self.labelList]
         flags = {}
         for i in range(self.flag_widget.count()):
             item = self.flag_widget.item(i)
@@ -1732,6 +1929,130 @@ class MainWindow(QtWidgets.QMainWindow):
             )
             return False
 
+    def propagateSelectedShapes(self, _value=False):
+        """Add the selected shapes to the next frames, in the background."""
+        if not self.canvas.selectedShapes or self.filename not in self.imageList:
+            return
+        if self._propagateJob is not None and self._propagateJob.is_alive():
+            self.status(self.tr("Shapes are already being propagated"))
+            return
+        index = self.imageList.index(self.filename)
+        n_remaining = len(self.imageList) - index - 1
+        if n_remaining <= 0:
+            return
+        n_frames, ok = QtWidgets.QInputDialog.getInt(
+            self,
+            self.tr("Propagate to Next Frames"),
+            self.tr("Number of next frames:"),
+            min(10, n_remaining),
+            1,
+            n_remaining,
+        )
+        if not ok:
+            return
+        label_files = [
+            self._labelFileOf(filename)
+            for filename in self.imageList[index + 1 : index + 1 + n_frames]
+        ]
+        missing = [f for f in label_files if not osp.exists(f)]
+        label_files = [f for f in label_files if osp.exists(f)]
+        if missing:
+            logger.warning(
+                "Not propagating to {} frames without label file: {}",
+                len(missing),
+                missing,
+            )
+        if not label_files:
+            self.status(self.tr("No label file to propagate shapes to"))
+            return
+        self._propagateJob = PropagateShapesJob(
+            shapes=[self._formatShape(s) for s in self.canvas.selectedShapes],
+            label_files=label_files,
+            callback=self.shapesPropagated.emit,
+        )
+        self._propagateJob.start()
+        message = self.tr("Propagating %d shapes to %d frames...") % (
+            len(self.canvas.selectedShapes),
+            len(label_files),
+        )
+        if missing:
+            skipped = self.tr("%d frames without label file skipped")
+            message = "%s (%s)" % (message, skipped % len(missing))
+        self.status(message)
+
+    def _warmUpAiModel(self, name):
+        # run in a thread: the sessions are kept by the session manager for
+        # the model created by the canvas later
+        models = [model for model in MODELS if model.name == name]
+        if not models:
+            return
+        try:
+            ai.warm_up(models[0]())
+        except Exception:
+            logger.exception("Failed to warm up AI model {!r}", name)
+
+    def togglePreEncoding(self, checked):
+        """Start, pause or resume the pre-encoding of the opened folder."""
+        model_name = self._selectAiModelComboBox.currentText()
+        if self._preEncoder is not None and self._preEncoder.is_alive():
+            if not checked:
+                self._preEncoder.pause()
+                return
+            if self._preEncoder.model_name == model_name:
+                self._preEncoder.resume()
+                return
+        self._stopPreEncoding()
+        if not checked or not self.imageList:
+            return
+        filenames = []
+        for filename in self.imageList:
+            label_file = self._labelFileOf(filename)
+            filenames.append(label_file if osp.exists(label_file) else filename)
+        cursor = 0
+        if self.filename in self.imageList:
+            cursor = self.imageList.index(self.filename)
+        try:
+            self._preEncoder = ai.PreEncoder(
+                model_name=model_name, filenames=filenames, cursor=cursor
+            )
+        except ValueError as e:
+            self.actions.preEncode.setChecked(False)
+            self.errorMessage(self.tr("Cannot pre-encode the folder"), str(e))
+            return
+        self.status(
+            self.tr("Pre-encoding %d frames with %s") % (len(filenames), model_name)
+        )
+
+    def _stopPreEncoding(self):
+        if self._preEncoder is not None:
+            self._preEncoder.stop()
+            self._preEncoder = None
+
+    def _onShapesPropagated(self, job):
+        self._staleVisFiles.update(job.stale_vis)
+        self.status(self.tr("Propagated shapes to %d frames") % len(job.written))
+
+    def _waitPropagation(self, label_file):
+        job = self._propagateJob
+        if job is not None and job.is_alive():
+            # propagated next if still pending, the other files are not waited
+            job.wait_for(label_file)
+            self._staleVisFiles.update(job.stale_vis)
+        if label_file in self._staleVisFiles:
+            # deferred by the propagation to the frames actually opened
+            self._staleVisFiles.discard(label_file)
+            try:
+                LabelFile().update_vis(label_file)
+            except Exception as e:
+                logger.warning("Failed to redraw vis_avm of {!r}: {}", label_file, e)
+
+    def _labelFileOf(self, filename):
+        label_file = osp.splitext(filename)[0] + ".json"
+        if self.output_dir:
+            label_file_without_path = osp.basename(label_file)
+            label_file = osp.join(self.output_dir, label_file_without_path)
+        return label_file
+
     def duplicateSelectedShape(self):
         self.copySelectedShape()
         self.pasteSelectedShape()
@@ -1757,12 +2078,14 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.canvas.deSelectShape()
 
     def labelItemChanged(self, item):
+        if self._noVisibilitySlot:
+            return
         shape = item.shape()
         self.canvas.setShapeVisible(shape, item.checkState() == Qt.Checked)
 
     def labelOrderChanged(self):
+        self.canvas.reorderShapes([item.shape() for item in self.labelList])
         self.setDirty()
-        self.canvas.loadShapes([item.shape() for item in self.labelList])
 
     # Callback functions:
 
@@ -1804,7 +2127,6 @@ class MainWindow(QtWidgets.QMainWindow):
             self.setDirty()
         else:
             self.canvas.undoLastLine()
-            self.canvas.shapesBackups.pop()
 
     def scrollRequest(self, delta, orientation):
         units = -delta * 0.1  # natural scroll
@@ -1814,14 +2136,22 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def setScroll(self, orientation, value):
         self.scrollBars[orientation].setValue(int(value))
-        self.scroll_values[orientation][self.filename] = value
+        self.viewStates.set(self.filename, self._scrollKey(orientation), value)
+
+    @staticmethod
+    def _scrollKey(orientation):
+        return "scroll_x" if orientation == Qt.Horizontal else "scroll_y"
+
+    def _setZoomValue(self, value):
+        self._zoomInitialized = True
+        self.viewStates.set(self.filename, "zoom", (self.zoomMode, value))
 
     def setZoom(self, value):
         self.actions.fitWidth.setChecked(False)
         self.actions.fitWindow.setChecked(False)
         self.zoomMode = self.MANUAL_ZOOM
         self.zoomWidget.setValue(value)
-        self.zoom_values[self.filename] = (self.zoomMode, value)
+        self._setZoomValue(value)
 
     def addZoom(self, increment=1.1):
         zoom_value = self.zoomWidget.value() * increment
@@ -1873,31 +2203,57 @@ class MainWindow(QtWidgets.QMainWindow):
     def onNewBrightnessContrast(self, qimage):
         self.canvas.loadPixmap(QtGui.QPixmap.fromImage(qimage), clear_shapes=False)
 
+    def _decodedImage(self):
+        """Return the RGB array of the current image and its histograms.
+
+        They are decoded on first use and kept until another image is loaded.
+        """
+        if self._decoded_image is None or self._decoded_image[0] is not (
+            self.imageData
+        ):
+            img = np.asarray(utils.img_data_to_pil(self.imageData).convert("RGB"))
+            self._decoded_image = (
+                self.imageData,
+                img,
+                brightness_contrast_dialog.channel_histograms(img),
+            )
+        return self._decoded_image[1:]
+
     def brightnessContrast(self, value):
+        img, histograms = self._decodedImage()
         dialog = BrightnessContrastDialog(
-            utils.img_data_to_pil(self.imageData),
+            img,
             self.onNewBrightnessContrast,
             parent=self,
+            histograms=histograms,
         )
-        brightness, contrast = self.brightnessContrast_values.get(
-            self.filename, (None, None)
+        brightness, contrast = self.viewStates.get(
+            self.filename, "brightness_contrast", (None, None)
         )
-        if brightness is not None:
-            dialog.slider_brightness.setValue(brightness)
-        if contrast is not None:
-            dialog.slider_contrast.setValue(contrast)
+        dialog.setValues(brightness, contrast)
         dialog.exec_()
 
         brightness = dialog.slider_brightness.value()
         contrast = dialog.slider_contrast.value()
-        self.brightnessContrast_values[self.filename] = (brightness, contrast)
+        self.viewStates.set(
+            self.filename, "brightness_contrast", (brightness, contrast)
+        )
 
     def togglePolygons(self, value):
         flag = value
+        shown, hidden = [], []
+        # update the canvas once for all items rather than once per item
+        self._noVisibilitySlot = True
         for item in self.labelList:
+            if not item.flags() & Qt.ItemIsUserCheckable:
+                continue  # of a hidden class
             if value is None:
                 flag = item.checkState() == Qt.Unchecked
             item.setCheckState(Qt.Checked if flag else Qt.Unchecked)
+            (shown if flag else hidden).append(item.shape())
+        self._noVisibilitySlot = False
+        self.canvas.setShapesVisible(shown, True)
+        self.canvas.setShapesVisible(hidden, False)
 
     def loadFile(self, filename=None):
         """Load the specified file, or the last opened file if None."""
@@ -1953,10 +2309,9 @@ class MainWindow(QtWidgets.QMainWindow):
             return False
         # assumes same name, but json extension
         self.status(str(self.tr("Loading %s...")) % osp.basename(str(filename)))
-        label_file = osp.splitext(filename)[0] + ".json"
-        if self.output_dir:
-            label_file_without_path = osp.basename(label_file)
-            label_file = osp.join(self.output_dir, label_file_without_path)
+        label_file = self._labelFileOf(filename)
+        # the propagation job may be writing it
+        self._waitPropagation(label_file)
         if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(label_file):
             self.labelFile = LabelFile(label_file)
             try:
@@ -2014,6 +2369,8 @@ class MainWindow(QtWidgets.QMainWindow):
             return False
         self.image = image
         self.filename = filename
+        if self._preEncoder is not None and filename in self.imageList:
+            self._preEncoder.set_cursor(self.imageList.index(filename))
         if self.filename:
             self.canvas.current_filename = self.filename
         if self._config["keep_prev"]:
@@ -2032,42 +2389,41 @@ class MainWindow(QtWidgets.QMainWindow):
             self.setClean()
         self.canvas.setEnabled(True)
         # set zoom values
-        is_initial_load = not self.zoom_values
-        if self.filename in self.zoom_values:
-            self.zoomMode = self.zoom_values[self.filename][0]
-            self.setZoom(self.zoom_values[self.filename][1])
+        is_initial_load = not self._zoomInitialized
+        zoom = self.viewStates.get(self.filename, "zoom")
+        if zoom is not None:
+            self.zoomMode = zoom[0]
+            self.setZoom(zoom[1])
         elif is_initial_load or not self._config["keep_prev_scale"]:
             self.adjustScale(initial=True)
         # set scroll values
-        for orientation in self.scroll_values:
-            if self.filename in self.scroll_values[orientation]:
-                self.setScroll(
-                    orientation, self.scroll_values[orientation][self.filename]
-                )
+        for orientation in [Qt.Horizontal, Qt.Vertical]:
+            value = self.viewStates.get(self.filename, self._scrollKey(orientation))
+            if value is not None:
+                self.setScroll(orientation, value)
         # set brightness contrast values
-        dialog = BrightnessContrastDialog(
-            utils.img_data_to_pil(self.imageData),
-            self.onNewBrightnessContrast,
-            parent=self,
-        )
-        brightness, contrast = self.brightnessContrast_values.get(
-            self.filename, (None, None)
+        brightness, contrast = self.viewStates.get(
+            self.filename, "brightness_contrast", (None, None)
         )
         if self._config["keep_prev_brightness"] and self.recentFiles:
-            brightness, _ = self.brightnessContrast_values.get(
-                self.recentFiles[0], (None, None)
+            brightness, _ = self.viewStates.get(
+                self.recentFiles[0], "brightness_contrast", (None, None)
             )
         if self._config["keep_prev_contrast"] and self.recentFiles:
-            _, contrast = self.brightnessContrast_values.get(
-                self.recentFiles[0], (None, None)
+            _, contrast = self.viewStates.get(
+                self.recentFiles[0], "brightness_contrast", (None, None)
             )
-        if brightness is not None:
-            dialog.slider_brightness.setValue(brightness)
-        if contrast is not None:
-            dialog.slider_contrast.setValue(contrast)
-        self.brightnessContrast_values[self.filename] = (brightness, contrast)
+        self.viewStates.set(
+            self.filename, "brightness_contrast", (brightness, contrast)
+        )
         if brightness is not None or contrast is not None:
-            dialog.onNewValue(None)
+            # applied without building the dialog, which is only for editing
+            img, histograms = self._decodedImage()
+            self.onNewBrightnessContrast(
+                BrightnessContrastDialog.adjustImage(
+                    img, brightness, contrast, histograms=histograms
+                )
+            )
         self.paintCanvas()
         self.addRecentFile(self.filename)
         self.toggleActions(True)
@@ -2088,13 +2444,13 @@ class MainWindow(QtWidgets.QMainWindow):
         assert not self.image.isNull(), "cannot paint null image"
         self.canvas.scale = 0.01 * self.zoomWidget.value()
         self.canvas.adjustSize()
-        self.canvas.update()
+        self.canvas.requestRepaint()
 
     def adjustScale(self, initial=False):
         value = self.scalers[self.FIT_WINDOW if initial else self.zoomMode]()
         value = int(100 * value)
         self.zoomWidget.setValue(value)
-        self.zoom_values[self.filename] = (self.zoomMode, value)
+        self._setZoomValue(value)
 
     def scaleFitWindow(self):
         """Figure out the size of the pixmap to fit the main widget."""
@@ -2127,9 +2483,19 @@ class MainWindow(QtWidgets.QMainWindow):
         self.settings.setValue("window/position", self.pos())
         self.settings.setValue("window/state", self.saveState())
         self.settings.setValue("recentFiles", self.recentFiles)
+        self._saveViewStates()
+        if self._propagateJob is not None:
+            # not to leave a label file half written
+            self._propagateJob.cancel()
+            self._propagateJob.join()
+        self._stopPreEncoding()
         # ask the use for where to save the labels
         # self.settings.setValue('window/geometry', self.saveGeometry())
 
+    def _saveViewStates(self):
+        if self._config["view_state"]["persist"] and self.lastOpenDir:
+            self.viewStates.save(self.lastOpenDir)
+
     def dragEnterEvent(self, event):
         extensions = [
             ".%s" % fmt.data().decode().lower()
@@ -2536,7 +2902,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def removeSelectedPoint(self):
         self.canvas.removeSelectedPoint()
-        self.canvas.update()
+        self.canvas.commitShapeEdit()
+        self.canvas.requestRepaint()
         if not self.canvas.hShape.points:
             self.canvas.deleteShape(self.canvas.hShape)
             self.remLabels([self.canvas.hShape])
@@ -2698,7 +3065,12 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.mayContinue() or not dirpath:
             return
 
+        self._saveViewStates()
+        self._stopPreEncoding()
+        self.actions.preEncode.setChecked(False)
         self.lastOpenDir = dirpath
+        if self._config["view_state"]["persist"]:
+            self.viewStates.load(dirpath)
         self.filename = None
         self.fileListWidget.clear()
 
@@ -0,0 +1,190 @@
+import argparse
+import concurrent.futures
+import multiprocessing
+import os
+import os.path as osp
+import time
+
+import natsort
+import numpy as np
+import orjson
+import PIL.Image
+from loguru import logger
+
+from labelme import ai
+from labelme.label_file import LabelFile
+
+# frames already processed, including those without any detection
+DONE_FILENAME = ".preannotate_2dod.done"
+
+
+def find_frames(folder: str) -> list[tuple[str, str]]:
+    """Return the (label file, image file) pairs of a 2D-OD_ folder.
+
+    The label files are the JSON files of its subfolders, as listed by the
+    GUI, and their images are image/<name>.jpg.
+    """
+    frames: list[tuple[str, str]] = []
+    for dir_name in sorted(os.listdir(folder)):
+        dir_path: str = osp.join(folder, dir_name)
+        if not osp.isdir(dir_path) or dir_name in ["image", "vis_avm"]:
+            continue
+        for file_name in os.listdir(dir_path):
+            if not file_name.lower().endswith(".json"):
+                continue
+            image_file: str = osp.join(
+                folder, "image", osp.splitext(file_name)[0] + ".jpg"
+            )
+            if not osp.exists(image_file):
+                logger.warning(f"Skipping {file_name!r}: no image {image_file!r}")
+                continue
+            frames.append((osp.join(dir_path, file_name), image_file))
+    return natsort.natsorted(frames)
+
+
+def is_annotated(label_file: str) -> bool:
+    with open(label_file, "rb") as f:
+        return bool(orjson.loads(f.read()).get("anno"))
+
+
+def _load_done(done_file: str) -> set[str]:
+    if not osp.exists(done_file):
+        return set()
+    with open(done_file) as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def pending_frames(folder: str) -> list[tuple[str, str]]:
+    """Return the frames left to pre-annotate, see main()."""
+    done: set[str] = _load_done(osp.join(folder, DONE_FILENAME))
+    frames: list[tuple[str, str]] = []
+    for label_file, image_file in find_frames(folder):
+        if osp.relpath(label_file, folder) in done or is_annotated(label_file):
+            continue
+        frames.append((label_file, image_file))
+    return frames
+
+
+def _preannotate(
+    label_file: str,
+    image_file: str,
+    model: str,
+    texts: list[str],
+    iou_threshold: float,
+    score_threshold: float,
+    max_num_detections: int,
+) -> tuple[int, float, float]:
+    t_start: float = time.time()
+    image: np.ndarray = np.asarray(PIL.Image.open(image_file).convert("RGB"))
+    boxes, scores, labels = ai.get_rectangles_from_texts(
+        model=model, image=image, texts=texts
+    )
+    boxes, scores, labels = ai.non_maximum_suppression(
+        boxes=boxes,
+        scores=scores,
+        labels=labels,
+        iou_threshold=iou_threshold,
+        score_threshold=score_threshold,
+        max_num_detections=max_num_detections,
+    )
+    shapes: list[dict] = ai.get_shapes_from_annotations(
+        boxes=boxes, scores=scores, labels=labels, texts=texts
+    )
+    t_detect: float = time.time() - t_start
+
+    t_start = time.time()
+    LabelFile().save_2dod(label_file, shapes)
+    return len(shapes), t_detect, time.time() - t_start
+
+
+def preannotate_frames(
+    executor: concurrent.futures.Executor,
+    folder: str,
+    frames: list[tuple[str, str]],
+    **kwargs,
+) -> int:
+    """Pre-annotate `frames` of `folder` on `executor`, see _preannotate().
+
+    The frames saved are added to DONE_FILENAME as they complete, and those
+    that failed are left to the next run.
+
+    Returns:
+        The number of frames saved.
+    """
+    num_done: int = 0
+    with open(osp.join(folder, DONE_FILENAME), "a") as done_file:
+        futures = {
+            executor.submit(_preannotate, label_file, image_file, **kwargs): label_file
+            for label_file, image_file in frames
+        }
+        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            label_file: str = futures[future]
+            try:
+                num_shapes, t_detect, t_save = future.result()
+            except Exception as e:
+                logger.error(f"Failed to pre-annotate {label_file!r}: {e}")
+                continue
+            done_file.write(osp.relpath(label_file, folder) + "\n")
+            done_file.flush()
+            num_done += 1
+            logger.info(
+                f"[{i + 1}/{len(frames)}] {osp.basename(label_file)}: "
+                f"{num_shapes} boxes, detect={t_detect:.3f} [s], "
+                f"save={t_save:.3f} [s]"
+            )
+    return num_done
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-annotate the frames of a 2D-OD_ folder with boxes "
+        "detected from text prompts. Frames already annotated are skipped, and "
+        "an interrupted run resumes where it stopped."
+    )
+    parser.add_argument("folder", help="2D-OD_ folder")
+    parser.add_argument(
+        "--texts", required=True, help="comma separated labels, e.g. car,pillar"
+    )
+    parser.add_argument("--model", default="yoloworld")
+    parser.add_argument("--score-threshold", type=float, default=0.1)
+    parser.add_argument("--iou-threshold", type=float, default=0.5)
+    parser.add_argument("--max-detections", type=int, default=100)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="processes, each with its model"
+    )
+    args = parser.parse_args()
+
+    if not osp.basename(osp.normpath(args.folder)).startswith("2D-OD_"):
+        parser.error(f"Not a 2D-OD_ folder: {args.folder!r}")
+    texts: list[str] = [text.strip() for text in args.texts.split(",")]
+
+    frames: list[tuple[str, str]] = pending_frames(args.folder)
+    logger.info(f"Pre-annotating {len(frames)} frames of {args.folder!r}")
+    t_start: float = time.time()
+    # not forked: onnxruntime in the model is not fork safe
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        try:
+            num_done: int = preannotate_frames(
+                executor,
+                args.folder,
+                frames,
+                model=args.model,
+                texts=texts,
+                iou_threshold=args.iou_threshold,
+                score_threshold=args.score_threshold,
+                max_num_detections=args.max_detections,
+            )
+        except KeyboardInterrupt:
+            executor.shutdown(cancel_futures=True)
+            logger.info("Interrupted, run again to resume")
+            return
+    logger.info(
+        f"Pre-annotated {num_done}/{len(frames)} frames, "
+        f"elapsed_time={time.time() - t_start:.3f} [s]"
+    )
+
+
+if __name__ == "__main__":
+    main()
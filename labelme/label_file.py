@@ -852,6 +852,32 @@ class LabelFile(object):
         except Exception as e:
             raise LabelFileError(e)
 
+    @staticmethod
+    def annotation_of(shape, num):
+        """Return the "anno" entry of `shape`, the `num`-th of its file."""
+        description = shape["description"].split("+")
+        return {
+            "attrs": {description[0]: description[1]},
+            "category": {
+                "child": {
+                    "attributes": {"Attribute": description[2]},
+                    "type": shape["label"],
+                },
+                "type": shape["label"],
+            },
+            "create": "0",  # 根据需要设置创建时间或状态
+            "data": {
+                "allPointsX": [point[0] for point in shape["points"]],
+                "allPointsY": [point[1] for point in shape["points"]],
+                "name": "polygon_close",
+            },
+            "fileMetaUuid": "0",
+            "id": num + 1,
+            "objectId": num + 1,
+            "preAnnotationId": num + 1,
+            "shapeKey": "polygon_close",
+        }
+
     def save(self, filename, shapes):
         # 检查目录名称
         dir_name = osp.basename(osp.dirname(osp.dirname(filename)))
@@ -872,28 +898,7 @@ class LabelFile(object):
         ]
         data = {
             "anno": [
-                {
-                    "attrs": {shapes[num]["description"].split("+")[0]: shapes[num]["description"].split("+")[1]},
-                    "category": {
-                        "child": {
-                            "attributes": {"Attribute": shapes[num]["description"].split("+")[2]},
-                            "type": shapes[num]["label"],
-                        },
-                        "type": shapes[num]["label"],
-                    },
-                    "create": "0",  # 根据需要设置创建时间或状态
-                    "data": {
-                        "allPointsX": [point[0] for point in shapes[num]["points"]],
-                        "allPointsY": [point[1] for point in shapes[num]["points"]],
-                        "name": "polygon_close"
-                    },
-                    "fileMetaUuid": "0",
-                    "id": num + 1,
-                    "objectId": num + 1,
-                    "preAnnotationId": num + 1,
-                    "shapeKey": "polygon_close"
-                }
-                for num in range(len(shapes))
+                self.annotation_of(shapes[num], num) for num in range(len(shapes))
             ],
         }
 
@@ -918,6 +923,10 @@ class LabelFile(object):
         except Exception as e:
             raise LabelFileError(e)
         
+        self.update_vis(filename)
+
+    def update_vis(self, filename):
+        """Redraw the vis_avm image of the label file `filename`."""
         # 获取JSON文件的上一级文件夹
         parent_dir = osp.dirname(osp.abspath(filename))
         new_seg_img = self.draw_seg(filename)
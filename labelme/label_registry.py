@@ -0,0 +1,163 @@
+import imgviz
+from qtpy import QtGui
+
+from labelme.shape import Shape
+
+LABEL_COLORMAP = imgviz.label_colormap()
+
+
+class LabelStyle(object):
+    """Colors, pens and brushes of the shapes of one label, shared by all.
+
+    Shapes hold references to these objects, which must therefore never be
+    modified in place.
+    """
+
+    __slots__ = (
+        "label",
+        "id",
+        "rgb",
+        "line_color",
+        "fill_color",
+        "select_line_color",
+        "select_fill_color",
+        "vertex_fill_color",
+        "hvertex_fill_color",
+        "line_pen",
+        "select_line_pen",
+        "fill_brush",
+        "select_fill_brush",
+        "vertex_fill_brush",
+        "hvertex_fill_brush",
+    )
+
+    def __init__(self, label, id, rgb):
+        r, g, b = (int(c) for c in rgb)
+        self.label = label
+        self.id = id
+        self.rgb = (r, g, b)
+        self.line_color = QtGui.QColor(r, g, b)
+        self.fill_color = QtGui.QColor(r, g, b, 128)
+        self.select_line_color = QtGui.QColor(255, 255, 255)
+        self.select_fill_color = QtGui.QColor(r, g, b, 155)
+        self.vertex_fill_color = self.line_color
+        self.hvertex_fill_color = self.select_line_color
+        self.line_pen = _pen(self.line_color)
+        self.select_line_pen = _pen(self.select_line_color)
+        self.fill_brush = QtGui.QBrush(self.fill_color)
+        self.select_fill_brush = QtGui.QBrush(self.select_fill_color)
+        self.vertex_fill_brush = QtGui.QBrush(self.vertex_fill_color)
+        self.hvertex_fill_brush = QtGui.QBrush(self.hvertex_fill_color)
+
+    def pen(self, color):
+        """Return the pen of `color` if it is a line color of the style."""
+        if color is self.line_color:
+            return self.line_pen
+        if color is self.select_line_color:
+            return self.select_line_pen
+        return None
+
+    def brush(self, color):
+        """Return the brush of `color` if it is a fill color of the style."""
+        if color is self.fill_color:
+            return self.fill_brush
+        if color is self.select_fill_color:
+            return self.select_fill_brush
+        if color is self.vertex_fill_color:
+            return self.vertex_fill_brush
+        if color is self.hvertex_fill_color:
+            return self.hvertex_fill_brush
+        return None
+
+
+def _pen(color):
+    pen = QtGui.QPen(color)
+    # Try using integer sizes for smoother drawing(?)
+    pen.setWidth(Shape.PEN_WIDTH)
+    return pen
+
+
+class LabelRegistry(object):
+    """Ids and colors of the labels, resolved once per label.
+
+    Labels get ids 1, 2, ... in the order they are registered, which is the
+    order of the unique label list. Ids never change, so the cached styles
+    only need to be dropped when the color settings change (see configure).
+    """
+
+    def __init__(
+        self,
+        shape_color=None,
+        label_colors=None,
+        default_shape_color=None,
+        shift_auto_shape_color=0,
+    ):
+        self._ids = {}
+        self._styles = {}
+        self.configure(
+            shape_color=shape_color,
+            label_colors=label_colors,
+            default_shape_color=default_shape_color,
+            shift_auto_shape_color=shift_auto_shape_color,
+        )
+
+    def configure(
+        self,
+        shape_color=None,
+        label_colors=None,
+        default_shape_color=None,
+        shift_auto_shape_color=0,
+    ):
+        """Set how colors are chosen: 'auto', 'manual' or None (default)."""
+        self._shape_color = shape_color
+        self._label_colors = label_colors or {}
+        self._default_shape_color = default_shape_color
+        self._shift_auto_shape_color = shift_auto_shape_color
+        self._styles.clear()
+
+    def __contains__(self, label):
+        return label in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def labels(self):
+        return list(self._ids)
+
+    def register(self, label):
+        """Register `label` if it is new, and return its id."""
+        if label not in self._ids:
+            self._ids[label] = len(self._ids) + 1
+        return self._ids[label]
+
+    def rgb(self, label):
+        return self.style(label).rgb
+
+    def style(self, label):
+        """Return the LabelStyle of `label`, registering it if it is new."""
+        style = self._styles.get(label)
+        if style is None:
+            label_id = self.register(label)
+            style = LabelStyle(label, label_id, self._resolve_rgb(label, label_id))
+            self._styles[label] = style
+        return style
+
+    def update_shape_color(self, shape):
+        style = self.style(shape.label)
+        shape.style = style
+        shape.line_color = style.line_color
+        shape.fill_color = style.fill_color
+        shape.select_line_color = style.select_line_color
+        shape.select_fill_color = style.select_fill_color
+        shape.vertex_fill_color = style.vertex_fill_color
+        shape.hvertex_fill_color = style.hvertex_fill_color
+
+    def _resolve_rgb(self, label, label_id):
+        if self._shape_color == "auto":
+            label_id += self._shift_auto_shape_color
+            return LABEL_COLORMAP[label_id % len(LABEL_COLORMAP)]
+        elif self._shape_color == "manual" and label in self._label_colors:
+            return self._label_colors[label]
+        elif self._default_shape_color:
+            return self._default_shape_color
+        return (0, 255, 0)
@@ -1,4 +1,5 @@
 import copy
+import math
 
 import numpy as np
 import skimage.measure
@@ -12,7 +13,54 @@ import labelme.utils
 # - [opt] Store paths instead of creating new ones at each paint.
 
 
+def _as_vertices(points):
+    """Return `points` as a read-only (N, 2) float array.
+
+    Read-only arrays are shared as is: vertices are never modified in place,
+    every edit builds a new array, so shapes can share them safely.
+    """
+    if (
+        isinstance(points, np.ndarray)
+        and points.dtype == np.float64
+        and points.ndim == 2
+        and not points.flags.writeable
+    ):
+        return points
+    if len(points) and isinstance(points[0], QtCore.QPointF):
+        points = [(p.x(), p.y()) for p in points]
+    vertices = np.array(points, dtype=np.float64).reshape(-1, 2)
+    vertices.flags.writeable = False
+    return vertices
+
+
 class Shape(object):
+    __slots__ = (
+        "label",
+        "group_id",
+        "point_labels",
+        "fill",
+        "selected",
+        "visible",
+        "flags",
+        "description",
+        "other_data",
+        "mask",
+        "line_color",
+        "fill_color",
+        "select_line_color",
+        "select_fill_color",
+        "vertex_fill_color",
+        "hvertex_fill_color",
+        "style",
+        "_vertices",
+        "_shape_type",
+        "_shape_raw",
+        "_closed",
+        "_highlightIndex",
+        "_highlightMode",
+        "_lod",
+    )
+
     # Render handles as squares
     P_SQUARE = 0
 
@@ -28,15 +76,25 @@ class Shape(object):
     PEN_WIDTH = 2
 
     # The following class variables influence the drawing of all shape objects.
-    line_color = None
-    fill_color = None
-    select_line_color = None
-    select_fill_color = None
-    vertex_fill_color = None
-    hvertex_fill_color = None
+    # Colors are copied to each new shape, which may then override them.
+    default_line_color = None
+    default_fill_color = None
+    default_select_line_color = None
+    default_select_fill_color = None
+    default_vertex_fill_color = None
+    default_hvertex_fill_color = None
     point_type = P_ROUND
     point_size = 8
     scale = 1.0
+    # Level of detail for shapes painted with simplified=True, in screen
+    # pixels: outline tolerance and minimum spacing to draw vertex handles.
+    lod_tolerance = 0.5
+    lod_vertex_spacing = 4.0
+
+    _highlightSettings = {
+        NEAR_VERTEX: (4, P_ROUND),
+        MOVE_VERTEX: (1.5, P_SQUARE),
+    }
 
     def __init__(
         self,
@@ -54,10 +112,10 @@ class Shape(object):
         self.point_labels = []
         self.shape_type = shape_type
         self._shape_raw = None
-        self._points_raw = []
-        self._shape_type_raw = None
         self.fill = False
         self.selected = False
+        # shown on the canvas, unless its label is hidden (see Canvas.isVisible)
+        self.visible = True
         self.flags = flags
         self.description = description
         self.other_data = {}
@@ -65,24 +123,48 @@ class Shape(object):
 
         self._highlightIndex = None
         self._highlightMode = self.NEAR_VERTEX
-        self._highlightSettings = {
-            self.NEAR_VERTEX: (4, self.P_ROUND),
-            self.MOVE_VERTEX: (1.5, self.P_SQUARE),
-        }
 
         self._closed = False
 
-        if line_color is not None:
-            # Override the class line_color attribute
-            # with an object attribute. Currently this
-            # is used for drawing the pending line a different color.
-            self.line_color = line_color
+        # Override the class line_color attribute with an object attribute.
+        # Currently this is used for drawing the pending line a different color.
+        self.line_color = self.default_line_color if line_color is None else line_color
+        self.fill_color = self.default_fill_color
+        self.select_line_color = self.default_select_line_color
+        self.select_fill_color = self.default_select_fill_color
+        self.vertex_fill_color = self.default_vertex_fill_color
+        self.hvertex_fill_color = self.default_hvertex_fill_color
+        # LabelStyle of the colors above, with their pens and brushes, if any
+        self.style = None
 
     def _scale_point(self, point: QtCore.QPointF) -> QtCore.QPointF:
         return QtCore.QPointF(point.x() * self.scale, point.y() * self.scale)
 
+    @property
+    def points(self):
+        """The vertices as a new list of QPointF.
+
+        Editing the returned list does not change the shape; assign a new list
+        or use addPoint(), moveVertexBy(), `shape[i] = point`, etc. instead.
+        """
+        return [QtCore.QPointF(x, y) for x, y in self._vertices.tolist()]
+
+    @points.setter
+    def points(self, value):
+        self.vertices = value
+
+    @property
+    def vertices(self):
+        """The vertices as a read-only (N, 2) float array of x, y."""
+        return self._vertices
+
+    @vertices.setter
+    def vertices(self, value):
+        self._vertices = _as_vertices(value)
+        self._lod = {}
+
     def setShapeRefined(self, shape_type, points, point_labels, mask=None):
-        self._shape_raw = (self.shape_type, self.points, self.point_labels)
+        self._shape_raw = (self.shape_type, self._vertices, self.point_labels)
         self.shape_type = shape_type
         self.points = points
         self.point_labels = point_labels
@@ -91,7 +173,7 @@ class Shape(object):
     def restoreShapeRaw(self):
         if self._shape_raw is None:
             return
-        self.shape_type, self.points, self.point_labels = self._shape_raw
+        self.shape_type, self.vertices, self.point_labels = self._shape_raw
         self._shape_raw = None
 
     @property
@@ -119,24 +201,26 @@ class Shape(object):
         self._closed = True
 
     def addPoint(self, point, label=1):
-        if self.points and point == self.points[0]:
+        if len(self._vertices) and point == self[0]:
             self.close()
         else:
-            self.points.append(point)
+            self.vertices = np.concatenate([self._vertices, [[point.x(), point.y()]]])
             self.point_labels.append(label)
 
     def canAddPoint(self):
         return self.shape_type in ["polygon", "linestrip"]
 
     def popPoint(self):
-        if self.points:
+        if len(self._vertices):
             if self.point_labels:
                 self.point_labels.pop()
-            return self.points.pop()
+            point = self[-1]
+            self.vertices = self._vertices[:-1]
+            return point
         return None
 
     def insertPoint(self, i, point, label=1):
-        self.points.insert(i, point)
+        self.vertices = np.insert(self._vertices, i, [point.x(), point.y()], axis=0)
         self.point_labels.insert(i, label)
 
     def removePoint(self, i):
@@ -147,23 +231,23 @@ class Shape(object):
             )
             return
 
-        if self.shape_type == "polygon" and len(self.points) <= 3:
+        if self.shape_type == "polygon" and len(self) <= 3:
             logger.warning(
                 "Cannot remove point from: shape_type=%r, len(points)=%d",
                 self.shape_type,
-                len(self.points),
+                len(self),
             )
             return
 
-        if self.shape_type == "linestrip" and len(self.points) <= 2:
+        if self.shape_type == "linestrip" and len(self) <= 2:
             logger.warning(
                 "Cannot remove point from: shape_type=%r, len(points)=%d",
                 self.shape_type,
-                len(self.points),
+                len(self),
             )
             return
 
-        self.points.pop(i)
+        self.vertices = np.delete(self._vertices, i, axis=0)
         self.point_labels.pop(i)
 
     def isClosed(self):
@@ -172,15 +256,19 @@ class Shape(object):
     def setOpen(self):
         self._closed = False
 
-    def paint(self, painter):
-        if self.mask is None and not self.points:
+    def paint(self, painter, simplified=False):
+        """Paint the shape.
+
+        Args:
+            painter (QPainter): The painter
+            simplified (bool): Draw a level-of-detail outline of polygons and
+            linestrips for the current scale. Stored points are unchanged.
+        """
+        if self.mask is None and not len(self._vertices):
             return
 
         color = self.select_line_color if self.selected else self.line_color
-        pen = QtGui.QPen(color)
-        # Try using integer sizes for smoother drawing(?)
-        pen.setWidth(self.PEN_WIDTH)
-        painter.setPen(pen)
+        painter.setPen(self._pen(color))
 
         if self.mask is not None:
             image_to_draw = np.zeros(self.mask.shape + (4,), dtype=np.uint8)
@@ -197,12 +285,12 @@ class Shape(object):
                 QtCore.Qt.SmoothTransformation,
             )
 
-            painter.drawImage(self._scale_point(point=self.points[0]), qimage)
+            painter.drawImage(self._scale_point(point=self[0]), qimage)
 
             line_path = QtGui.QPainterPath()
             contours = skimage.measure.find_contours(np.pad(self.mask, pad_width=1))
             for contour in contours:
-                contour += [self.points[0].y(), self.points[0].x()]
+                contour += [self[0].y(), self[0].x()]
                 line_path.moveTo(
                     self._scale_point(QtCore.QPointF(contour[0, 1], contour[0, 0]))
                 )
@@ -212,82 +300,137 @@ class Shape(object):
                     )
             painter.drawPath(line_path)
 
-        if self.points:
+        if len(self._vertices):
             line_path = QtGui.QPainterPath()
             vrtx_path = QtGui.QPainterPath()
             negative_vrtx_path = QtGui.QPainterPath()
 
             if self.shape_type in ["rectangle", "mask"]:
-                assert len(self.points) in [1, 2]
-                if len(self.points) == 2:
+                assert len(self) in [1, 2]
+                if len(self) == 2:
                     rectangle = QtCore.QRectF(
-                        self._scale_point(self.points[0]),
-                        self._scale_point(self.points[1]),
+                        self._scale_point(self[0]),
+                        self._scale_point(self[1]),
                     )
                     line_path.addRect(rectangle)
                 if self.shape_type == "rectangle":
-                    for i in range(len(self.points)):
+                    for i in range(len(self)):
                         self.drawVertex(vrtx_path, i)
             elif self.shape_type == "circle":
-                assert len(self.points) in [1, 2]
-                if len(self.points) == 2:
+                assert len(self) in [1, 2]
+                if len(self) == 2:
                     raidus = labelme.utils.distance(
-                        self._scale_point(self.points[0] - self.points[1])
-                    )
-                    line_path.addEllipse(
-                        self._scale_point(self.points[0]), raidus, raidus
+                        self._scale_point(self[0] - self[1])
                     )
-                for i in range(len(self.points)):
+                    line_path.addEllipse(self._scale_point(self[0]), raidus, raidus)
+                for i in range(len(self)):
                     self.drawVertex(vrtx_path, i)
             elif self.shape_type == "linestrip":
-                line_path.moveTo(self._scale_point(self.points[0]))
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(self._scale_point(p))
-                    self.drawVertex(vrtx_path, i)
+                outline, draw_vertices = self._outlineToPaint(simplified)
+                line_path.moveTo(outline[0])
+                for p in outline:
+                    line_path.lineTo(p)
+                if draw_vertices:
+                    for i in range(len(self)):
+                        self.drawVertex(vrtx_path, i)
             elif self.shape_type == "points":
-                assert len(self.points) == len(self.point_labels)
+                assert len(self) == len(self.point_labels)
                 for i, point_label in enumerate(self.point_labels):
                     if point_label == 1:
                         self.drawVertex(vrtx_path, i)
                     else:
                         self.drawVertex(negative_vrtx_path, i)
             else:
-                line_path.moveTo(self._scale_point(self.points[0]))
+                outline, draw_vertices = self._outlineToPaint(simplified)
+                line_path.moveTo(outline[0])
                 # Uncommenting the following line will draw 2 paths
                 # for the 1st vertex, and make it non-filled, which
                 # may be desirable.
                 # self.drawVertex(vrtx_path, 0)
 
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(self._scale_point(p))
-                    self.drawVertex(vrtx_path, i)
+                for p in outline:
+                    line_path.lineTo(p)
+                if draw_vertices:
+                    for i in range(len(self)):
+                        self.drawVertex(vrtx_path, i)
                 if self.isClosed():
-                    line_path.lineTo(self._scale_point(self.points[0]))
+                    line_path.lineTo(outline[0])
 
             painter.drawPath(line_path)
             if vrtx_path.length() > 0:
                 painter.drawPath(vrtx_path)
-                painter.fillPath(vrtx_path, self._vertex_fill_color)
+                if self._highlightIndex is not None:
+                    painter.fillPath(vrtx_path, self._brush(self.hvertex_fill_color))
+                else:
+                    painter.fillPath(vrtx_path, self._brush(self.vertex_fill_color))
             if self.fill and self.mask is None:
                 color = self.select_fill_color if self.selected else self.fill_color
-                painter.fillPath(line_path, color)
-
-            pen.setColor(QtGui.QColor(255, 0, 0, 255))
-            painter.setPen(pen)
-            painter.drawPath(negative_vrtx_path)
-            painter.fillPath(negative_vrtx_path, QtGui.QColor(255, 0, 0, 255))
+                painter.fillPath(line_path, self._brush(color))
+
+            if not negative_vrtx_path.isEmpty():
+                color = QtGui.QColor(255, 0, 0, 255)
+                painter.setPen(self._pen(color))
+                painter.drawPath(negative_vrtx_path)
+                painter.fillPath(negative_vrtx_path, color)
+
+    def _pen(self, color):
+        # shared by the shapes of a label, built at each paint otherwise
+        pen = None if self.style is None else self.style.pen(color)
+        if pen is None:
+            pen = QtGui.QPen(color)
+            # Try using integer sizes for smoother drawing(?)
+            pen.setWidth(self.PEN_WIDTH)
+        return pen
+
+    def _brush(self, color):
+        brush = None if self.style is None else self.style.brush(color)
+        return color if brush is None else brush
+
+    def _outlineToPaint(self, simplified):
+        """Return the scaled outline and whether vertex handles are drawn."""
+        if (
+            not simplified
+            or self.lod_tolerance <= 0
+            or len(self) < 4
+            or self.shape_type not in ["polygon", "linestrip"]
+        ):
+            outline = self._vertices
+            draw_vertices = True
+        else:
+            # Zoom buckets are half an octave wide, and the tolerance is taken
+            # at the bottom of the bucket so the on-screen error stays bounded.
+            bucket = math.floor(math.log2(self.scale) * 2)
+            if bucket not in self._lod:
+                self._lod[bucket] = self._simplify(
+                    tolerance=self.lod_tolerance / 2 ** (bucket / 2)
+                )
+            outline, spacing = self._lod[bucket]
+            draw_vertices = spacing * self.scale >= self.lod_vertex_spacing
+        return (
+            [QtCore.QPointF(x, y) for x, y in (outline * self.scale).tolist()],
+            draw_vertices,
+        )
+
+    def _simplify(self, tolerance):
+        xy = self._vertices
+        closed = self.shape_type == "polygon"
+        if closed:
+            xy = np.concatenate([xy, xy[:1]])
+        spacing = np.linalg.norm(np.diff(xy, axis=0), axis=1).mean()
+        outline = skimage.measure.approximate_polygon(xy, tolerance=tolerance)
+        if closed:
+            xy, outline = xy[:-1], outline[:-1]
+        if len(outline) < (3 if closed else 2):
+            outline = xy
+        return outline, spacing
 
     def drawVertex(self, path, i):
         d = self.point_size
         shape = self.point_type
-        point = self._scale_point(self.points[i])
+        point = self._scale_point(self[i])
         if i == self._highlightIndex:
             size, shape = self._highlightSettings[self._highlightMode]
             d *= size
-        if self._highlightIndex is not None:
-            self._vertex_fill_color = self.hvertex_fill_color
-        else:
-            self._vertex_fill_color = self.vertex_fill_color
         if shape == self.P_SQUARE:
             path.addRect(point.x() - d / 2, point.y() - d / 2, d, d)
         elif shape == self.P_ROUND:
@@ -296,42 +439,47 @@ class Shape(object):
             assert False, "unsupported vertex shape"
 
     def nearestVertex(self, point, epsilon):
-        min_distance = float("inf")
-        min_i = None
-        point = QtCore.QPointF(point.x() * self.scale, point.y() * self.scale)
-        for i, p in enumerate(self.points):
-            p = QtCore.QPointF(p.x() * self.scale, p.y() * self.scale)
-            dist = labelme.utils.distance(p - point)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                min_i = i
-        return min_i
+        if not len(self._vertices):
+            return None
+        dist = np.linalg.norm(
+            (self._vertices - (point.x(), point.y())) * self.scale, axis=1
+        )
+        i = int(np.argmin(dist))
+        if dist[i] <= epsilon:
+            return i
+        return None
 
     def nearestEdge(self, point, epsilon):
-        min_distance = float("inf")
-        post_i = None
-        point = QtCore.QPointF(point.x() * self.scale, point.y() * self.scale)
-        for i in range(len(self.points)):
-            start = self.points[i - 1]
-            end = self.points[i]
-            start = QtCore.QPointF(start.x() * self.scale, start.y() * self.scale)
-            end = QtCore.QPointF(end.x() * self.scale, end.y() * self.scale)
-            line = [start, end]
-            dist = labelme.utils.distancetoline(point, line)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                post_i = i
-        return post_i
+        if not len(self._vertices):
+            return None
+        # edge i goes from vertex i - 1 to vertex i
+        start = np.roll(self._vertices, 1, axis=0) * self.scale
+        end = self._vertices * self.scale
+        p = np.array([point.x(), point.y()]) * self.scale
+        direction = end - start
+        length2 = (direction**2).sum(axis=1)
+        t = np.divide(
+            ((p - start) * direction).sum(axis=1),
+            length2,
+            out=np.zeros_like(length2),
+            where=length2 > 0,
+        )
+        nearest = start + np.clip(t, 0, 1)[:, None] * direction
+        dist = np.linalg.norm(p - nearest, axis=1)
+        i = int(np.argmin(dist))
+        if dist[i] <= epsilon:
+            return i
+        return None
 
     def containsPoint(self, point):
         if self.mask is not None:
             y = np.clip(
-                int(round(point.y() - self.points[0].y())),
+                int(round(point.y() - self._vertices[0, 1])),
                 0,
                 self.mask.shape[0] - 1,
             )
             x = np.clip(
-                int(round(point.x() - self.points[0].x())),
+                int(round(point.x() - self._vertices[0, 0])),
                 0,
                 self.mask.shape[1] - 1,
             )
@@ -341,27 +489,33 @@ class Shape(object):
     def makePath(self):
         if self.shape_type in ["rectangle", "mask"]:
             path = QtGui.QPainterPath()
-            if len(self.points) == 2:
-                path.addRect(QtCore.QRectF(self.points[0], self.points[1]))
+            if len(self) == 2:
+                path.addRect(QtCore.QRectF(self[0], self[1]))
         elif self.shape_type == "circle":
             path = QtGui.QPainterPath()
-            if len(self.points) == 2:
-                raidus = labelme.utils.distance(self.points[0] - self.points[1])
-                path.addEllipse(self.points[0], raidus, raidus)
+            if len(self) == 2:
+                raidus = labelme.utils.distance(self[0] - self[1])
+                path.addEllipse(self[0], raidus, raidus)
         else:
-            path = QtGui.QPainterPath(self.points[0])
-            for p in self.points[1:]:
-                path.lineTo(p)
+            path = QtGui.QPainterPath()
+            path.addPolygon(QtGui.QPolygonF(self.points))
         return path
 
     def boundingRect(self):
-        return self.makePath().boundingRect()
+        if self.shape_type == "circle" and len(self) == 2:
+            return self.makePath().boundingRect()
+        if not len(self._vertices):
+            return QtCore.QRectF()
+        (x1, y1), (x2, y2) = self._vertices.min(axis=0), self._vertices.max(axis=0)
+        return QtCore.QRectF(x1, y1, x2 - x1, y2 - y1)
 
     def moveBy(self, offset):
-        self.points = [p + offset for p in self.points]
+        self.vertices = self._vertices + (offset.x(), offset.y())
 
     def moveVertexBy(self, i, offset):
-        self.points[i] = self.points[i] + offset
+        vertices = self._vertices.copy()
+        vertices[i] += (offset.x(), offset.y())
+        self.vertices = vertices
 
     def highlightVertex(self, i, action):
         """Highlight a vertex appropriately based on the current action
@@ -378,14 +532,115 @@ class Shape(object):
         """Clear the highlighted point"""
         self._highlightIndex = None
 
+    def saveState(self):
+        """Return the editable state of the shape, e.g. for undo."""
+        return dict(
+            label=self.label,
+            group_id=self.group_id,
+            description=self.description,
+            flags=None if self.flags is None else dict(self.flags),
+            shape_type=self.shape_type,
+            points=self._vertices,
+            point_labels=list(self.point_labels),
+            mask=self.mask,
+            closed=self._closed,
+        )
+
+    def restoreState(self, state):
+        self.label = state["label"]
+        self.group_id = state["group_id"]
+        self.description = state["description"]
+        self.flags = None if state["flags"] is None else dict(state["flags"])
+        self.shape_type = state["shape_type"]
+        self.vertices = state["points"]
+        self.point_labels = list(state["point_labels"])
+        self.mask = state["mask"]
+        self._closed = state["closed"]
+
     def copy(self):
-        return copy.deepcopy(self)
+        shape = Shape.__new__(Shape)
+        for name in self.__slots__:
+            setattr(shape, name, getattr(self, name))
+        # vertices, colors and the level of detail cache are never modified
+        # in place, so only the mutable containers are duplicated
+        shape.point_labels = list(self.point_labels)
+        shape.flags = None if self.flags is None else dict(self.flags)
+        shape.other_data = copy.deepcopy(self.other_data)
+        shape.mask = None if self.mask is None else self.mask.copy()
+        shape._lod = dict(self._lod)
+        shape.visible = True
+        return shape
+
+    def __getstate__(self):
+        # the style is not pickled, its pens are then built at each paint
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["style"] = None
+        return state
+
+    def __setstate__(self, state):
+        # e.g. items moved by drag and drop in the label list are pickled
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.vertices = self._vertices
 
     def __len__(self):
-        return len(self.points)
+        return len(self._vertices)
 
     def __getitem__(self, key):
-        return self.points[key]
+        x, y = self._vertices[key]
+        return QtCore.QPointF(x, y)
 
     def __setitem__(self, key, value):
-        self.points[key] = value
+        vertices = self._vertices.copy()
+        vertices[key] = (value.x(), value.y())
+        self.vertices = vertices
+
+
+# shapes whose points are not free vertices: only their centre is transformed,
+# so rotating or scaling a selection moves them without distorting them
+_RIGID_SHAPE_TYPES = ["rectangle", "circle", "mask"]
+
+
+def transform_shapes(shapes, matrix, offset=(0, 0)):
+    """Apply `p' = matrix @ p + offset` to the vertices of all `shapes` at once.
+
+    Args:
+        shapes (list[Shape]): The shapes to transform.
+        matrix (array-like): 2x2 linear part of the transform.
+        offset (array-like): Translation applied after `matrix`.
+    """
+    shapes = [shape for shape in shapes if len(shape)]
+    if not shapes:
+        return
+    matrix = np.asarray(matrix, dtype=np.float64)
+    offset = np.asarray(offset, dtype=np.float64)
+    vertices = np.concatenate([shape.vertices for shape in shapes])
+    sections = np.cumsum([len(shape) for shape in shapes])[:-1]
+
+    anchors = vertices.copy()
+    for shape, rows in zip(shapes, np.split(anchors, sections)):
+        if shape.shape_type == "circle":
+            rows[:] = shape.vertices[0]
+        elif shape.shape_type in _RIGID_SHAPE_TYPES:
+            rows[:] = shape.vertices.mean(axis=0)
+    vertices = vertices + (anchors @ matrix.T + offset - anchors)
+    vertices.flags.writeable = False
+    for shape, part in zip(shapes, np.split(vertices, sections)):
+        shape.vertices = part
+
+
+def shapes_bounding_rect(shapes):
+    """Bounding rectangle of all `shapes`, None if they have no vertex."""
+    shapes = [shape for shape in shapes if len(shape)]
+    if not shapes:
+        return None
+    circles = [s for s in shapes if s.shape_type == "circle" and len(s) == 2]
+    others = [s for s in shapes if not (s.shape_type == "circle" and len(s) == 2)]
+    rect = QtCore.QRectF()
+    if others:
+        vertices = np.concatenate([shape.vertices for shape in others])
+        (x1, y1), (x2, y2) = vertices.min(axis=0), vertices.max(axis=0)
+        rect = QtCore.QRectF(x1, y1, x2 - x1, y2 - y1)
+    for shape in circles:
+        rect = rect.united(shape.boundingRect())
+    return rect
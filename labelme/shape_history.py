@@ -0,0 +1,162 @@
+import collections
+
+import numpy as np
+
+# What undo() and redo() did to one shape, for views to update incrementally:
+# kind is "add" or "remove" (index in the list after the add, or before the
+# remove), "change" (edited in place, index is None) or "reorder" (the whole
+# list was reordered, shape and index are None).
+ShapeChange = collections.namedtuple("ShapeChange", ["kind", "shape", "index"])
+
+
+def _is_same_state(a, b):
+    # masks are replaced, never edited in place, so identity is enough
+    return (
+        a["mask"] is b["mask"]
+        and np.array_equal(a["points"], b["points"])
+        and all(a[key] == b[key] for key in a if key not in ["mask", "points"])
+    )
+
+
+class _AddShapes(object):
+    def __init__(self, items):
+        # (index, shape) pairs sorted by index, as in the list after the edit
+        self.items = sorted(items, key=lambda item: item[0])
+
+    def undo(self, shapes):
+        changes = []
+        for index, shape in reversed(self.items):
+            shapes.remove(shape)
+            changes.append(ShapeChange("remove", shape, index))
+        return changes
+
+    def redo(self, shapes):
+        changes = []
+        for index, shape in self.items:
+            shapes.insert(index, shape)
+            changes.append(ShapeChange("add", shape, index))
+        return changes
+
+
+class _RemoveShapes(_AddShapes):
+    # (index, shape) pairs are as in the list before the edit
+    undo = _AddShapes.redo
+    redo = _AddShapes.undo
+
+
+class _ChangeShapes(object):
+    def __init__(self, changes):
+        # (shape, state_before, state_after) triples
+        self.changes = changes
+
+    def undo(self, shapes):
+        for shape, before, _ in self.changes:
+            shape.restoreState(before)
+        return [ShapeChange("change", shape, None) for shape, _, _ in self.changes]
+
+    def redo(self, shapes):
+        for shape, _, after in self.changes:
+            shape.restoreState(after)
+        return [ShapeChange("change", shape, None) for shape, _, _ in self.changes]
+
+
+class _ReorderShapes(object):
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+
+    def undo(self, shapes):
+        shapes[:] = self.before
+        return [ShapeChange("reorder", None, None)]
+
+    def redo(self, shapes):
+        shapes[:] = self.after
+        return [ShapeChange("reorder", None, None)]
+
+
+class ShapeHistory(object):
+    """Undo/redo history of the edits made to a list of shapes.
+
+    Each entry only holds the shapes touched by one edit: the shapes and their
+    indices for additions and removals, and the states before and after for
+    in-place edits (see Shape.saveState), so the memory used does not depend
+    on how many other shapes are on the frame.
+    """
+
+    def __init__(self, max_size=10):
+        self._undo = collections.deque(maxlen=max_size)
+        self._redo = []
+
+    def __len__(self):
+        return len(self._undo)
+
+    def canUndo(self):
+        return len(self._undo) > 0
+
+    def canRedo(self):
+        return len(self._redo) > 0
+
+    def clear(self):
+        self._undo.clear()
+        self._redo = []
+
+    def _push(self, command):
+        self._undo.append(command)
+        self._redo = []
+
+    def recordAdd(self, items):
+        """Record shapes added to the list, given as (index, shape) pairs."""
+        if items:
+            self._push(_AddShapes(items))
+
+    def recordRemove(self, items):
+        """Record shapes removed from the list, given as (index, shape) pairs."""
+        if items:
+            self._push(_RemoveShapes(items))
+
+    def recordChange(self, changes):
+        """Record in-place edits, given as (shape, before, after) states.
+
+        Returns True if any of the shapes actually changed.
+        """
+        changes = [
+            (shape, before, after)
+            for shape, before, after in changes
+            if not _is_same_state(before, after)
+        ]
+        if changes:
+            self._push(_ChangeShapes(changes))
+        return bool(changes)
+
+    def recordReorder(self, before, after):
+        self._push(_ReorderShapes(list(before), list(after)))
+
+    def discard(self):
+        """Forget the latest edit without reverting it."""
+        if self._undo:
+            self._undo.pop()
+
+    def undo(self, shapes):
+        """Revert the latest edit on the list `shapes` in place.
+
+        Returns the list of ShapeChange applied, empty if there is nothing to
+        undo.
+        """
+        if not self._undo:
+            return []
+        command = self._undo.pop()
+        changes = command.undo(shapes)
+        self._redo.append(command)
+        return changes
+
+    def redo(self, shapes):
+        """Re-apply the latest reverted edit on the list `shapes` in place.
+
+        Returns the list of ShapeChange applied, as undo().
+        """
+        if not self._redo:
+            return []
+        command = self._redo.pop()
+        changes = command.redo(shapes)
+        self._undo.append(command)
+        return changes
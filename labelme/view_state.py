@@ -0,0 +1,95 @@
+import collections
+import json
+import os
+import os.path as osp
+
+from loguru import logger
+
+# saved in the opened directory when view_state.persist is enabled
+VIEW_STATE_FILENAME = ".labelme_view_state.json"
+
+
+class ViewStateStore(object):
+    """View state of each frame (zoom, scroll, brightness/contrast, ...).
+
+    Only the `max_size` most recently used frames are kept, so memory stays
+    bounded over long sessions. Each frame state is a dict of JSON-compatible
+    values, which can be saved to and loaded from a file of the dataset.
+    """
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self._states = collections.OrderedDict()
+
+    def __contains__(self, filename):
+        return filename is not None and osp.normpath(filename) in self._states
+
+    def __len__(self):
+        return len(self._states)
+
+    def clear(self):
+        self._states.clear()
+
+    def get(self, filename, key, default=None):
+        if filename is None:
+            return default
+        filename = osp.normpath(filename)
+        state = self._states.get(filename)
+        if state is None or key not in state:
+            return default
+        self._states.move_to_end(filename)
+        return state[key]
+
+    def set(self, filename, key, value):
+        if filename is None:
+            return
+        filename = osp.normpath(filename)
+        state = self._states.setdefault(filename, {})
+        self._states.move_to_end(filename)
+        state[key] = value
+        while len(self._states) > self.max_size:
+            self._states.popitem(last=False)
+
+    def save(self, directory):
+        """Save the states of the frames in `directory` to its state file.
+
+        States already in the file are kept unless they are overwritten, as
+        they may have been dropped from memory.
+        """
+        states = self._read(directory)
+        for filename, state in self._states.items():
+            try:
+                path = osp.relpath(filename, directory)
+            except ValueError:  # on another drive
+                continue
+            if not path.startswith(os.pardir):
+                path = path.replace(os.sep, "/")
+                # moved to the end, as the most recently used
+                states.pop(path, None)
+                states[path] = state
+        if not states:
+            return
+        try:
+            with open(osp.join(directory, VIEW_STATE_FILENAME), "w") as f:
+                json.dump(states, f)
+        except OSError as e:
+            logger.warning("Failed to save view state: {}", e)
+
+    def load(self, directory):
+        """Load the states saved in `directory`, if any."""
+        # least recently used first, so the recent ones are the ones kept
+        for path, state in self._read(directory).items():
+            filename = osp.join(directory, path)
+            for key, value in state.items():
+                self.set(filename, key, value)
+
+    def _read(self, directory):
+        state_file = osp.join(directory, VIEW_STATE_FILENAME)
+        if not osp.exists(state_file):
+            return {}
+        try:
+            with open(state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load view state: {}", e)
+            return {}
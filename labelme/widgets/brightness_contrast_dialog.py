@@ -1,20 +1,69 @@
+import cv2
+import numpy as np
 import PIL.Image
-import PIL.ImageEnhance
 from qtpy import QtWidgets
 from qtpy.QtCore import Qt
 from qtpy.QtGui import QImage
 
 
+def _blend_lut(base, factor):
+    # as PIL.Image.blend(constant image of value base, image, factor)
+    lut = np.trunc(base + factor * (np.arange(256) - base))
+    return np.clip(lut, 0, 255).astype(np.uint8)
+
+
+def brightness_contrast_lut(brightness, contrast, histograms):
+    """Return the 256-entry table of PIL's ImageEnhance Brightness then Contrast.
+
+    Args:
+        brightness (float): Brightness factor, 1 keeps the image.
+        contrast (float): Contrast factor, 1 keeps the image.
+        histograms (numpy.ndarray): (3, 256) histograms of the R, G and B
+            channels, from which the mean gray level used by the contrast
+            is computed (it can differ from PIL's by 1 because of rounding).
+
+    Returns:
+        lut (numpy.ndarray): uint8 table to index the image with.
+    """
+    lut = np.arange(256, dtype=np.uint8)
+    if brightness != 1:
+        lut = _blend_lut(0, brightness)
+    if contrast != 1:
+        # mean of the "L" conversion of the brightened image
+        means = (histograms * lut).sum(axis=1) / histograms.sum(axis=1)
+        mean = int(np.dot([0.299, 0.587, 0.114], means) + 0.5)
+        lut = _blend_lut(mean, contrast)[lut]
+    return lut
+
+
+def channel_histograms(img):
+    return np.stack(
+        [np.bincount(img[:, :, i].ravel(), minlength=256) for i in range(3)]
+    )
+
+
+def img_to_qimage(img):
+    height, width = img.shape[:2]
+    return QImage(
+        np.ascontiguousarray(img).tobytes(),
+        width,
+        height,
+        width * 3,
+        QImage.Format_RGB888,
+    )
+
+
 class BrightnessContrastDialog(QtWidgets.QDialog):
     _base_value = 50
 
-    def __init__(self, img, callback, parent=None):
+    def __init__(self, img, callback, parent=None, histograms=None):
         super(BrightnessContrastDialog, self).__init__(parent)
         self.setModal(True)
         self.setWindowTitle("Brightness/Contrast")
 
         sliders = {}
         layouts = {}
+        self._valueLabels = {}
         for title in ["Brightness:", "Contrast:"]:
             layout = QtWidgets.QHBoxLayout()
             title_label = QtWidgets.QLabel(self.tr(title))
@@ -32,8 +81,11 @@ class BrightnessContrastDialog(QtWidgets.QDialog):
             #
             slider.valueChanged.connect(self.onNewValue)
             slider.valueChanged.connect(
-                lambda: value_label.setText(f"{slider.value() / self._base_value:.2f}")
+                lambda value, value_label=value_label: value_label.setText(
+                    f"{value / self._base_value:.2f}"
+                )
             )
+            self._valueLabels[slider] = value_label
             layouts[title] = layout
             sliders[title] = slider
 
@@ -47,21 +99,59 @@ class BrightnessContrastDialog(QtWidgets.QDialog):
         del layouts
         self.setLayout(layout)
 
-        assert isinstance(img, PIL.Image.Image)
+        if isinstance(img, PIL.Image.Image):
+            img = np.asarray(img.convert("RGB"))
         self.img = img
         self.callback = callback
+        self._histograms = histograms
 
-    def onNewValue(self, _):
-        brightness = self.slider_brightness.value() / self._base_value
-        contrast = self.slider_contrast.value() / self._base_value
+    @classmethod
+    def factor(cls, value):
+        """Enhance factor of a slider `value`, which may be None (unchanged)."""
+        return 1.0 if value is None else value / cls._base_value
+
+    def setValues(self, brightness, contrast):
+        """Set the sliders without applying them."""
+        for slider, value in [
+            (self.slider_brightness, brightness),
+            (self.slider_contrast, contrast),
+        ]:
+            if value is not None:
+                slider.blockSignals(True)
+                slider.setValue(value)
+                slider.blockSignals(False)
+                self._valueLabels[slider].setText(f"{self.factor(value):.2f}")
+
+    @classmethod
+    def adjustImage(cls, img, brightness, contrast, histograms=None):
+        """Return `img` with the slider values applied, without a dialog.
 
-        img = self.img
-        if brightness != 1:
-            img = PIL.ImageEnhance.Brightness(img).enhance(brightness)
-        if contrast != 1:
-            img = PIL.ImageEnhance.Contrast(img).enhance(contrast)
+        Args:
+            img (numpy.ndarray): (H, W, 3) RGB image.
+            brightness (int): Brightness slider value, or None.
+            contrast (int): Contrast slider value, or None.
+            histograms (numpy.ndarray): channel_histograms(img), if known.
 
-        qimage = QImage(
-            img.tobytes(), img.width, img.height, img.width * 3, QImage.Format_RGB888
+        Returns:
+            qimage (QImage): The adjusted image.
+        """
+        if histograms is None:
+            histograms = channel_histograms(img)
+        lut = brightness_contrast_lut(
+            brightness=cls.factor(brightness),
+            contrast=cls.factor(contrast),
+            histograms=histograms,
+        )
+        return img_to_qimage(cv2.LUT(img, lut))
+
+    def onNewValue(self, _):
+        if self._histograms is None:
+            self._histograms = channel_histograms(self.img)
+        self.callback(
+            self.adjustImage(
+                self.img,
+                self.slider_brightness.value(),
+                self.slider_contrast.value(),
+                histograms=self._histograms,
+            )
         )
-        self.callback(qimage)
@@ -1,6 +1,8 @@
 import contextlib
+import math
 
 import imgviz
+import numpy as np
 from loguru import logger
 from qtpy import QtCore
 from qtpy import QtGui
@@ -12,7 +14,11 @@ from qtpy.QtWidgets import QMessageBox
 import labelme.ai
 import labelme.utils
 from labelme import QT5
+from labelme._automation.polygon_from_mask import compute_polygon_from_mask
 from labelme.shape import Shape
+from labelme.shape import shapes_bounding_rect
+from labelme.shape import transform_shapes
+from labelme.shape_history import ShapeHistory
 
 # TODO(unknown):
 # - [maybe] Find optimal epsilon value.
@@ -25,6 +31,8 @@ CURSOR_MOVE = QtCore.Qt.ClosedHandCursor
 CURSOR_GRAB = QtCore.Qt.OpenHandCursor
 
 MOVE_SPEED = 5.0
+ROTATE_SPEED = 1.0  # degrees
+SCALE_SPEED = 1.02
 
 
 class Canvas(QtWidgets.QWidget):
@@ -39,6 +47,8 @@ class Canvas(QtWidgets.QWidget):
     mousePressed = QtCore.Signal(QMouseEvent)  # 定义信号，用于判断是否是在多边形标签列表中做的操作
     mouseReleased = QtCore.Signal(QMouseEvent)  # 定义信号，用于判断是否是在多边形标签列表中做的操作
     editingSaveEnable = QtCore.Signal(bool)
+    # emitted from the AI prediction worker thread
+    _aiPredicted = QtCore.Signal(object, object)
 
     CREATE, EDIT = 0, 1
 
@@ -55,6 +65,11 @@ class Canvas(QtWidgets.QWidget):
                 "Unexpected value for double_click event: {}".format(self.double_click)
             )
         self.num_backups = kwargs.pop("num_backups", 10)
+        max_fps = kwargs.pop("max_fps", 0)
+        # host the AI models in a worker process (see labelme.ai.ModelProcess)
+        self._aiProcess = kwargs.pop("ai_process", False)
+        # preview from the low resolution mask of the decoder while hovering
+        self._aiLowResPreview = kwargs.pop("ai_low_res_preview", True)
         self._crosshair = kwargs.pop(
             "crosshair",
             {
@@ -72,7 +87,9 @@ class Canvas(QtWidgets.QWidget):
         # Initialise local state.
         self.mode = self.EDIT
         self.shapes = []
-        self.shapesBackups = []
+        self._history = ShapeHistory(max_size=self.num_backups)
+        # states of the shapes being edited, see beginShapeEdit()
+        self._editStates = {}
         self.current = None
         self.selectedShapes = []  # save the selected shapes here
         self.selectedShapesCopy = []
@@ -85,9 +102,30 @@ class Canvas(QtWidgets.QWidget):
         self.prevPoint = QtCore.QPoint()
         self.prevMovePoint = QtCore.QPoint()
         self.offsets = QtCore.QPoint(), QtCore.QPoint()
+        # (key, rect) of the last selectionRect() call
+        self._selectionRect = ((), None)
         self.scale = 1.0
         self.pixmap = QtGui.QPixmap()
-        self.visible = {}
+        # bit i is set if the label with bit index i is hidden
+        self._hiddenLabels = 0
+        self._labelBits = {}
+        # labels left visible by showOnlyLabels(), the others being hidden
+        # as they are first seen, or None
+        self._shownLabels = None
+        # Offscreen layer with the image and every shape that is not being
+        # interacted with, so drags only repaint the live shapes on top.
+        self._staticLayer = None
+        self._staticLayerKey = None
+        # Downscaled copies of the pixmap, halved at each level.
+        self._pyramid = []
+        # Repaint requests are merged into a single paint of their union,
+        # at most once per event loop turn (or per frame with max_fps).
+        self._dirtyRegion = QtGui.QRegion()
+        self._frameInterval = 1000 / max_fps if max_fps else 0
+        self._lastFrame = QtCore.QElapsedTimer()
+        self._repaintTimer = QtCore.QTimer(self)
+        self._repaintTimer.setSingleShot(True)
+        self._repaintTimer.timeout.connect(self._flushRepaint)
         self._hideBackround = False
         self.hideBackround = False
         self.hShape = None
@@ -110,6 +148,13 @@ class Canvas(QtWidgets.QWidget):
         self.setFocusPolicy(QtCore.Qt.WheelFocus)
 
         self._ai_model = None
+        # previews of ai_polygon/ai_mask are predicted off the GUI thread, and
+        # the latest finished one is painted: (self.current, preview shape)
+        self._aiWorker = None
+        self._aiImageId = 0
+        self._aiPreviewKey = None
+        self._aiPreview = (None, None, None)
+        self._aiPredicted.connect(self._onAiPredicted)
 
         self.drawing_enabled = False  # 新增属性
         self._select_mode = False
@@ -126,6 +171,97 @@ class Canvas(QtWidgets.QWidget):
         self.keypoint_labels = ["keypoint"]  # 关键点标签
         self.line_labels = ["line", "entrance_line"]  # 其他标签
 
+    def requestRepaint(self, rect=None):
+        """Schedule a repaint of `rect` (widget coordinates), or everything."""
+        if rect is None:
+            rect = self.rect()
+        self._dirtyRegion = self._dirtyRegion.united(QtGui.QRegion(rect))
+        if self._repaintTimer.isActive():
+            return
+        delay = 0
+        if self._frameInterval and self._lastFrame.isValid():
+            delay = max(0, int(self._frameInterval - self._lastFrame.elapsed()))
+        self._repaintTimer.start(delay)
+
+    def _flushRepaint(self):
+        region, self._dirtyRegion = self._dirtyRegion, QtGui.QRegion()
+        self._lastFrame.start()
+        self.update(region)
+
+    def shapesRect(self, shapes):
+        """Widget rectangle covering `shapes`, including vertex handles."""
+        rect = self.selectionRect(shapes) or QtCore.QRectF()
+        offset = self.offsetToCenter()
+        margin = Shape.point_size * 2 + Shape.PEN_WIDTH
+        return (
+            QtCore.QRectF(
+                (rect.x() + offset.x()) * self.scale,
+                (rect.y() + offset.y()) * self.scale,
+                rect.width() * self.scale,
+                rect.height() * self.scale,
+            )
+            .toAlignedRect()
+            .adjusted(-margin, -margin, margin, margin)
+        )
+
+    def selectionRect(self, shapes=None):
+        """Bounding rectangle of `shapes`, the selected shapes by default.
+
+        Vertices are never edited in place, so the rectangle is cached until
+        one of the shapes gets new vertices. Returns None if there is no vertex.
+        """
+        if shapes is None:
+            shapes = self.selectedShapes
+        key = tuple((shape.vertices, shape.shape_type) for shape in shapes)
+        cached_key, rect = self._selectionRect
+        if len(key) != len(cached_key) or any(
+            a[0] is not b[0] or a[1] != b[1] for a, b in zip(key, cached_key)
+        ):
+            rect = shapes_bounding_rect(shapes)
+            self._selectionRect = key, rect
+        return rect
+
+    def translateShapes(self, shapes, offset):
+        transform_shapes(shapes, np.eye(2), (offset.x(), offset.y()))
+
+    def rotateShapes(self, shapes, angle, pivot=None):
+        """Rotate `shapes` clockwise by `angle` degrees about `pivot`.
+
+        Returns False, leaving the shapes unchanged, if the result does not
+        fit in the image (see transformShapes).
+        """
+        theta = math.radians(angle)
+        cos, sin = math.cos(theta), math.sin(theta)
+        return self.transformShapes(shapes, [[cos, -sin], [sin, cos]], pivot)
+
+    def scaleShapes(self, shapes, factor, pivot=None):
+        """Scale `shapes` by `factor` about `pivot` (see rotateShapes)."""
+        return self.transformShapes(shapes, [[factor, 0], [0, factor]], pivot)
+
+    def transformShapes(self, shapes, matrix, pivot=None):
+        """Apply the 2x2 `matrix` to all vertices of `shapes` about `pivot`.
+
+        The pivot defaults to the centroid of the vertices, which does not
+        move, so repeated small steps do not drift. Rectangles, circles and
+        masks keep their size and orientation, only their centre moves.
+        """
+        shapes = [shape for shape in shapes if len(shape)]
+        if not shapes:
+            return False
+        if pivot is None:
+            pivot = np.concatenate([s.vertices for s in shapes]).mean(axis=0)
+        else:
+            pivot = np.array([pivot.x(), pivot.y()])
+        matrix = np.asarray(matrix, dtype=np.float64)
+        vertices = [shape.vertices for shape in shapes]
+        transform_shapes(shapes, matrix, pivot - matrix @ pivot)
+        rect = self.selectionRect(shapes)
+        if self.outOfPixmap(rect.topLeft()) or self.outOfPixmap(rect.bottomRight()):
+            for shape, shape_vertices in zip(shapes, vertices):
+                shape.vertices = shape_vertices
+            return False
+        return True
+
     def setCursor(self, cursor):
         """设置光标样式"""
         self._cursor = cursor  # 保存当前光标样式
@@ -137,7 +273,7 @@ class Canvas(QtWidgets.QWidget):
         #     self.mode = self.CREATE  # 切换到绘制模式
         # else:
         #     self.mode = self.EDIT  # 切换到编辑模式
-        self.update()  # 更新画布
+        self.requestRepaint()  # 更新画布
 
     def setSelectMode(self, enable):
         """设置是否为选择模式"""
@@ -188,8 +324,19 @@ class Canvas(QtWidgets.QWidget):
                     pass
 
             # NOTE: gdown.download uses sys.stderr, so redirect it to logger.debug
-            with contextlib.redirect_stderr(new_target=LoggerIO()):
-                self._ai_model = model()
+            if isinstance(self._ai_model, labelme.ai.ModelProcess):
+                self._ai_model.close()
+            if self._aiProcess:
+                self._ai_model = labelme.ai.ModelProcess(model)
+            else:
+                with contextlib.redirect_stderr(new_target=LoggerIO()):
+                    self._ai_model = model()
+
+        if self._aiWorker is None:
+            self._aiWorker = labelme.ai.PredictionWorker(
+                callback=self._aiPredicted.emit
+            )
+        self._aiImageId += 1
 
         if self.pixmap is None:
             logger.warning("Pixmap is not set yet")
@@ -199,39 +346,75 @@ class Canvas(QtWidgets.QWidget):
             image=labelme.utils.img_qt_to_arr(self.pixmap.toImage())
         )
 
-    def storeShapes(self):
-        shapesBackup = []
-        for shape in self.shapes:
-            shapesBackup.append(shape.copy())
-        if len(self.shapesBackups) > self.num_backups:
-            self.shapesBackups = self.shapesBackups[-self.num_backups - 1 :]
-        self.shapesBackups.append(shapesBackup)
+    def beginShapeEdit(self, shapes):
+        """Remember the state of `shapes` before they are edited in place.
+
+        The edit becomes one undo step when commitShapeEdit() is called.
+        Shapes already being edited keep their first remembered state.
+        """
+        for shape in shapes:
+            if shape is not None and shape not in self._editStates:
+                self._editStates[shape] = shape.saveState()
+
+    def commitShapeEdit(self):
+        """Record the shapes changed since beginShapeEdit() as one undo step.
+
+        Returns True if any shape changed.
+        """
+        states, self._editStates = self._editStates, {}
+        changed = self._history.recordChange(
+            [
+                (shape, before, shape.saveState())
+                for shape, before in states.items()
+                if shape in self.shapes
+            ]
+        )
+        if changed:
+            self.invalidateStaticLayer()
+        return changed
+
+    def reorderShapes(self, shapes):
+        shapes = list(shapes)
+        if len(shapes) != len(self.shapes) or any(
+            a is not b for a, b in zip(shapes, self.shapes)
+        ):
+            self._history.recordReorder(self.shapes, shapes)
+        self.shapes = shapes
+        self.invalidateStaticLayer()
+        self.requestRepaint()
 
     @property
     def isShapeRestorable(self):
-        # We save the state AFTER each edit (not before) so for an
-        # edit to be undoable, we expect the CURRENT and the PREVIOUS state
-        # to be in the undo stack.
-        if len(self.shapesBackups) < 2:
-            return False
-        return True
+        return self._history.canUndo()
+
+    @property
+    def isShapeRedoable(self):
+        return self._history.canRedo()
 
     def restoreShape(self):
-        # This does _part_ of the job of restoring shapes.
-        # The complete process is also done in app.py::undoShapeEdit
-        # and app.py::loadShapes and our own Canvas::loadShapes function.
-        if not self.isShapeRestorable:
-            return
-        self.shapesBackups.pop()  # latest
+        """Undo the latest shape edit.
 
-        # The application will eventually call Canvas.loadShapes which will
-        # push this right back onto the stack.
-        shapesBackup = self.shapesBackups.pop()
-        self.shapes = shapesBackup
+        Returns the list of ShapeChange made to self.shapes, for the label
+        list to be updated accordingly (see app.py::undoShapeEdit).
+        """
+        changes = self._history.undo(self.shapes)
+        if changes:
+            self._afterHistoryChange()
+        return changes
+
+    def redoShape(self):
+        changes = self._history.redo(self.shapes)
+        if changes:
+            self._afterHistoryChange()
+        return changes
+
+    def _afterHistoryChange(self):
+        self._editStates = {}
         self.selectedShapes = []
         for shape in self.shapes:
             shape.selected = False
-        self.update()
+        self.invalidateStaticLayer()
+        self.requestRepaint()
 
     def enterEvent(self, ev):
         self.overrideCursor(self._cursor)
@@ -244,7 +427,57 @@ class Canvas(QtWidgets.QWidget):
         self.restoreCursor()
 
     def isVisible(self, shape):
-        return self.visible.get(shape, True)
+        if not shape.visible:
+            return False
+        if not self._hiddenLabels and self._shownLabels is None:
+            return True
+        return self.isLabelVisible(shape.label)
+
+    def _labelBit(self, label):
+        bit = self._labelBits.get(label)
+        if bit is None:
+            bit = self._labelBits[label] = len(self._labelBits)
+            if self._shownLabels is not None and label not in self._shownLabels:
+                self._hiddenLabels |= 1 << bit
+        return bit
+
+    def isLabelVisible(self, label):
+        # the bit first, which hides a label new to showOnlyLabels()
+        bit = self._labelBit(label)
+        return not self._hiddenLabels >> bit & 1
+
+    def setLabelsVisible(self, labels, value):
+        """Show or hide all shapes of `labels` at once, with a single repaint."""
+        mask = 0
+        for label in labels:
+            mask |= 1 << self._labelBit(label)
+        if value:
+            hidden = self._hiddenLabels & ~mask
+        else:
+            hidden = self._hiddenLabels | mask
+        if hidden != self._hiddenLabels:
+            self._hiddenLabels = hidden
+            self.invalidateStaticLayer()
+            self.requestRepaint()
+
+    def showOnlyLabels(self, labels):
+        """Hide all shapes but those of `labels`, including labels to come."""
+        self._shownLabels = frozenset(labels)
+        hidden = 0
+        for label, bit in self._labelBits.items():
+            if label not in self._shownLabels:
+                hidden |= 1 << bit
+        if hidden != self._hiddenLabels:
+            self._hiddenLabels = hidden
+            self.invalidateStaticLayer()
+            self.requestRepaint()
+
+    def showAllLabels(self):
+        self._shownLabels = None
+        if self._hiddenLabels:
+            self._hiddenLabels = 0
+            self.invalidateStaticLayer()
+            self.requestRepaint()
 
     def drawing(self):
         # return self.mode == self.CREATE
@@ -257,7 +490,7 @@ class Canvas(QtWidgets.QWidget):
         self.mode = self.EDIT if value else self.CREATE
         if self.mode == self.EDIT:
             # CREATE -> EDIT
-            self.repaint()  # clear crosshair
+            self.requestRepaint()  # clear crosshair
         else:
             # EDIT -> CREATE
             self.unHighlight()
@@ -266,7 +499,7 @@ class Canvas(QtWidgets.QWidget):
     def unHighlight(self):
         if self.hShape:
             self.hShape.highlightClear()
-            self.update()
+            self.requestRepaint()
         self.prevhShape = self.hShape
         self.prevhVertex = self.hVertex
         self.prevhEdge = self.hEdge
@@ -304,7 +537,7 @@ class Canvas(QtWidgets.QWidget):
 
             self.overrideCursor(CURSOR_DRAW)
             if not self.current:
-                self.repaint()  # draw crosshair
+                self.requestRepaint()  # draw crosshair
                 return
 
             if self.outOfPixmap(pos):
@@ -348,7 +581,7 @@ class Canvas(QtWidgets.QWidget):
                 self.line.point_labels = [1]
                 self.line.close()
             assert len(self.line.points) == len(self.line.point_labels)
-            self.repaint()
+            self.requestRepaint()
             self.current.highlightClear()
             return
 
@@ -357,22 +590,22 @@ class Canvas(QtWidgets.QWidget):
             if self.selectedShapesCopy and self.prevPoint:
                 self.overrideCursor(CURSOR_MOVE)
                 self.boundedMoveShapes(self.selectedShapesCopy, pos)
-                self.repaint()
+                self.requestRepaint()
             elif self.selectedShapes:
                 self.selectedShapesCopy = [s.copy() for s in self.selectedShapes]
-                self.repaint()
+                self.requestRepaint()
             return
 
         # Polygon/Vertex moving.
         if QtCore.Qt.LeftButton & ev.buttons():
             if self.selectedVertex():
                 self.boundedMoveVertex(pos)
-                self.repaint()
+                self.requestRepaint()
                 self.movingShape = True
             elif self.selectedShapes and self.prevPoint:
                 # self.overrideCursor(CURSOR_MOVE)
                 # self.boundedMoveShapes(self.selectedShapes, pos)
-                # self.repaint()
+                # self.requestRepaint()
                 # self.movingShape = True
                 pass
             return
@@ -403,7 +636,7 @@ class Canvas(QtWidgets.QWidget):
                     )
                 )
                 self.setStatusTip(self.toolTip())
-                self.update()
+                self.requestRepaint()
                 break
             elif index_edge is not None and shape.canAddPoint():
                 if self.selectedVertex():
@@ -415,7 +648,7 @@ class Canvas(QtWidgets.QWidget):
                 self.overrideCursor(CURSOR_POINT)
                 self.setToolTip(self.tr("ALT + Click to create point"))
                 self.setStatusTip(self.toolTip())
-                self.update()
+                self.requestRepaint()
                 break
             elif shape.containsPoint(pos):
                 if self.selectedVertex():
@@ -430,7 +663,7 @@ class Canvas(QtWidgets.QWidget):
                 )
                 self.setStatusTip(self.toolTip())
                 self.overrideCursor(CURSOR_GRAB)
-                self.update()
+                self.requestRepaint()
                 break
         else:  # Nothing found, clear highlights, reset state.
             self.unHighlight()
@@ -442,6 +675,7 @@ class Canvas(QtWidgets.QWidget):
         point = self.prevMovePoint
         if shape is None or index is None or point is None:
             return
+        self.beginShapeEdit([shape])
         shape.insertPoint(index, point)
         shape.highlightVertex(index, shape.MOVE_VERTEX)
         self.hShape = shape
@@ -454,6 +688,7 @@ class Canvas(QtWidgets.QWidget):
         index = self.prevhVertex
         if shape is None or index is None:
             return
+        self.beginShapeEdit([shape])
         shape.removePoint(index)
         shape.highlightClear()
         self.hShape = shape
@@ -491,7 +726,7 @@ class Canvas(QtWidgets.QWidget):
                             self.line.points[1],
                             label=self.line.point_labels[1],
                         )
-                        self.line.points[0] = self.current.points[-1]
+                        self.line[0] = self.current.points[-1]
                         self.line.point_labels[0] = self.current.point_labels[-1]
                         if ev.modifiers() & QtCore.Qt.ControlModifier:
                             self.finalise()
@@ -523,8 +758,10 @@ class Canvas(QtWidgets.QWidget):
                             self.line.point_labels = [1, 1]
                         self.setHiding()
                         self.drawingPolygon.emit(True)
-                        self.update()
+                        self.requestRepaint()
             elif self.editing():
+                # Anything edited until the button is released is one undo step.
+                self.beginShapeEdit([self.hShape] + self.selectedShapes)
                 if self.selectedEdge() and ev.modifiers() == QtCore.Qt.AltModifier:
                     self.addPointToEdge()
                 elif self.selectedVertex() and ev.modifiers() == (
@@ -534,18 +771,18 @@ class Canvas(QtWidgets.QWidget):
 
                 group_mode = int(ev.modifiers()) == QtCore.Qt.ControlModifier
                 self.selectShapePoint(pos, multiple_selection_mode=group_mode)
+                self.beginShapeEdit(self.selectedShapes)
                 self.prevPoint = pos
-                self.repaint()
-                self.update()
+                self.requestRepaint()
         elif ev.button() == QtCore.Qt.RightButton and self.editing():
             group_mode = int(ev.modifiers()) == QtCore.Qt.ControlModifier
             if not self.selectedShapes or (
                 self.hShape is not None and self.hShape not in self.selectedShapes
             ):
                 self.selectShapePoint(pos, multiple_selection_mode=group_mode)
-                self.repaint()
+                self.requestRepaint()
             self.prevPoint = pos
-            self.update()
+            self.requestRepaint()
 
     def ori_mouseReleaseEvent(self, ev):
         if ev.button() == QtCore.Qt.RightButton:
@@ -554,7 +791,7 @@ class Canvas(QtWidgets.QWidget):
             if not menu.exec_(self.mapToGlobal(ev.pos())) and self.selectedShapesCopy:
                 # Cancel the move by deleting the shadow copy.
                 self.selectedShapesCopy = []
-                self.repaint()
+                self.requestRepaint()
         elif ev.button() == QtCore.Qt.LeftButton:
             if self.editing():
                 if (
@@ -567,9 +804,7 @@ class Canvas(QtWidgets.QWidget):
                     )
 
         if self.movingShape and self.hShape:
-            index = self.shapes.index(self.hShape)
-            if self.shapesBackups[-1][index].points != self.shapes[index].points:
-                self.storeShapes()
+            if self.commitShapeEdit():
                 self.shapeMoved.emit()
 
             self.movingShape = False
@@ -578,16 +813,21 @@ class Canvas(QtWidgets.QWidget):
         assert self.selectedShapes and self.selectedShapesCopy
         assert len(self.selectedShapesCopy) == len(self.selectedShapes)
         if copy:
+            added = []
             for i, shape in enumerate(self.selectedShapesCopy):
+                added.append((len(self.shapes), shape))
                 self.shapes.append(shape)
                 self.selectedShapes[i].selected = False
                 self.selectedShapes[i] = shape
+            self._history.recordAdd(added)
         else:
+            self.beginShapeEdit(self.selectedShapes)
             for i, shape in enumerate(self.selectedShapesCopy):
-                self.selectedShapes[i].points = shape.points
+                self.selectedShapes[i].vertices = shape.vertices
+            self.commitShapeEdit()
         self.selectedShapesCopy = []
-        self.repaint()
-        self.storeShapes()
+        self.invalidateStaticLayer()
+        self.requestRepaint()
         return True
 
     def hideBackroundShapes(self, value):
@@ -596,7 +836,7 @@ class Canvas(QtWidgets.QWidget):
             # Only hide other shapes if there is a current selection.
             # Otherwise the user will not be able to select a shape.
             self.setHiding(True)
-            self.update()
+            self.requestRepaint()
 
     def setHiding(self, enable=True):
         self._hideBackround = self.hideBackround if enable else False
@@ -626,7 +866,7 @@ class Canvas(QtWidgets.QWidget):
         
         # 调用 mouseReleaseEvent 和 mousePressEvent，传递 event 对象
         self.selectionChanged.emit(shapes)
-        self.update()
+        self.requestRepaint()
         
         # 这里可以根据需要创建另一个 QMouseEvent 对象
         event = QMouseEvent(QtCore.QEvent.MouseButtonRelease, QtCore.QPoint(0, 0), Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
@@ -852,16 +1092,12 @@ class Canvas(QtWidgets.QWidget):
         right = 0
         top = self.pixmap.height() - 1
         bottom = 0
-        for s in self.selectedShapes:
-            rect = s.boundingRect()
-            if rect.left() < left:
-                left = rect.left()
-            if rect.right() > right:
-                right = rect.right()
-            if rect.top() < top:
-                top = rect.top()
-            if rect.bottom() > bottom:
-                bottom = rect.bottom()
+        rect = self.selectionRect()
+        if rect is not None:
+            left = min(left, rect.left())
+            right = max(right, rect.right())
+            top = min(top, rect.top())
+            bottom = max(bottom, rect.bottom())
 
         x1 = left - point.x()
         y1 = top - point.y()
@@ -931,8 +1167,7 @@ class Canvas(QtWidgets.QWidget):
         # self.calculateOffsets(self.selectedShapes, pos)
         dp = pos - self.prevPoint
         if dp:
-            for shape in shapes:
-                shape.moveBy(dp)
+            self.translateShapes(shapes, dp)
             self.prevPoint = pos
             return True
         return False
@@ -942,17 +1177,19 @@ class Canvas(QtWidgets.QWidget):
             self.setHiding(False)
             self.selectionChanged.emit([])
             self.hShapeIsSelected = False
-            self.update()
+            self.requestRepaint()
 
     def deleteSelected(self):
         deleted_shapes = []
         if self.selectedShapes:
+            removed = [(self.shapes.index(s), s) for s in self.selectedShapes]
             for shape in self.selectedShapes:
                 self.shapes.remove(shape)
                 deleted_shapes.append(shape)
-            self.storeShapes()
+            self._history.recordRemove(removed)
+            self.invalidateStaticLayer()
             self.selectedShapes = []
-            self.update()
+            self.requestRepaint()
             logger.info(f"删除了 {len(deleted_shapes)} 个形状。")
         return deleted_shapes
 
@@ -960,9 +1197,10 @@ class Canvas(QtWidgets.QWidget):
         if shape in self.selectedShapes:
             self.selectedShapes.remove(shape)
         if shape in self.shapes:
+            self._history.recordRemove([(self.shapes.index(shape), shape)])
             self.shapes.remove(shape)
-        self.storeShapes()
-        self.update()
+        self.invalidateStaticLayer()
+        self.requestRepaint()
 
     def paintEvent(self, event):
         # if not self.pixmap:
@@ -974,12 +1212,9 @@ class Canvas(QtWidgets.QWidget):
                 p.setRenderHint(QtGui.QPainter.HighQualityAntialiasing)
                 p.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
 
-                p.scale(self.scale, self.scale)
-                p.translate(self.offsetToCenter())
+                self._translateToPixmap(p)
+                self._paintImage(p, event.rect())
 
-                p.drawPixmap(0, 0, self.pixmap)
-
-                p.scale(1 / self.scale, 1 / self.scale)
                 if self.selecting and self.select_rect:
                     p = self._painter
                     p.begin(self)
@@ -1004,12 +1239,16 @@ class Canvas(QtWidgets.QWidget):
         p.setRenderHint(QtGui.QPainter.HighQualityAntialiasing)
         p.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
 
-        p.scale(self.scale, self.scale)
-        p.translate(self.offsetToCenter())
-
-        p.drawPixmap(0, 0, self.pixmap)
-
-        p.scale(1 / self.scale, 1 / self.scale)
+        Shape.scale = self.scale
+        live_shapes = self.liveShapes()
+        layer = self.staticLayer(live_shapes)
+        if layer is None:
+            self._translateToPixmap(p)
+            self._paintStaticContent(p, event.rect(), skip=live_shapes)
+        else:
+            origin, pixmap = layer
+            p.drawPixmap(origin, pixmap)
+            self._translateToPixmap(p)
 
         # draw crosshair
         if (
@@ -1032,9 +1271,8 @@ class Canvas(QtWidgets.QWidget):
                 self.height() - 1,
             )
 
-        Shape.scale = self.scale
         for shape in self.shapes:
-            if (shape.selected or not self._hideBackround) and self.isVisible(shape):
+            if shape in live_shapes and self._isShapePainted(shape):
                 shape.fill = shape.selected or shape == self.hShape
                 shape.paint(p)
         if self.current:
@@ -1057,48 +1295,33 @@ class Canvas(QtWidgets.QWidget):
                     "fill_drawing=true, but fill_color is transparent,"
                     " so forcing to be opaque."
                 )
+                drawing_shape.fill_color = QtGui.QColor(drawing_shape.fill_color)
                 drawing_shape.fill_color.setAlpha(64)
             drawing_shape.addPoint(self.line[1])
             drawing_shape.fill = True
             drawing_shape.paint(p)
-        elif self.createMode == "ai_polygon" and self.current is not None:
-            drawing_shape = self.current.copy()
-            drawing_shape.addPoint(
-                point=self.line.points[1],
-                label=self.line.point_labels[1],
-            )
-            points = self._ai_model.predict_polygon_from_points(
-                points=[[point.x(), point.y()] for point in drawing_shape.points],
-                point_labels=drawing_shape.point_labels,
-            )
-            if len(points) > 2:
-                drawing_shape.setShapeRefined(
-                    shape_type="polygon",
-                    points=[QtCore.QPointF(point[0], point[1]) for point in points],
-                    point_labels=[1] * len(points),
-                )
-                drawing_shape.fill = self.fillDrawing()
-                drawing_shape.selected = True
-                drawing_shape.paint(p)
-        elif self.createMode == "ai_mask" and self.current is not None:
+        elif (
+            self.createMode in ["ai_polygon", "ai_mask"] and self.current is not None
+        ):
             drawing_shape = self.current.copy()
             drawing_shape.addPoint(
                 point=self.line.points[1],
                 label=self.line.point_labels[1],
             )
-            mask = self._ai_model.predict_mask_from_points(
-                points=[[point.x(), point.y()] for point in drawing_shape.points],
-                point_labels=drawing_shape.point_labels,
-            )
-            y1, x1, y2, x2 = imgviz.instances.masks_to_bboxes([mask])[0].astype(int)
-            drawing_shape.setShapeRefined(
-                shape_type="mask",
-                points=[QtCore.QPointF(x1, y1), QtCore.QPointF(x2, y2)],
-                point_labels=[1, 1],
-                mask=mask[y1 : y2 + 1, x1 : x2 + 1],
-            )
-            drawing_shape.selected = True
-            drawing_shape.paint(p)
+            self._requestAiPreview(drawing_shape)
+            current, preview, maskImage = self._aiPreview
+            if current is self.current:
+                if maskImage is not None:
+                    # low resolution mask: scaled by the painter
+                    rect, image = maskImage
+                    p.drawImage(
+                        QtCore.QRectF(
+                            rect.topLeft() * self.scale, rect.size() * self.scale
+                        ),
+                        image,
+                    )
+                if preview is not None:
+                    preview.paint(p)
 
         # 绘制框选矩形
         if self.selecting and self.select_rect:
@@ -1118,10 +1341,238 @@ class Canvas(QtWidgets.QWidget):
 
         p.end()
 
+    def liveShapes(self):
+        """Shapes painted on every frame instead of from the static layer."""
+        shapes = set(self.selectedShapes)
+        if self.hShape is not None:
+            shapes.add(self.hShape)
+        return shapes
+
+    def invalidateStaticLayer(self):
+        self._staticLayer = None
+        self._staticLayerKey = None
+
+    def staticLayer(self, live_shapes):
+        """Return (origin, pixmap) of the cached image and non-live shapes.
+
+        The layer only covers the visible part of the canvas, so its size is
+        bounded by the viewport whatever the zoom. It is rebuilt when the
+        zoom, the scroll position or the set of live shapes changes, and
+        when invalidateStaticLayer() is called after an edit is committed.
+        """
+        rect = self.visibleRegion().boundingRect()
+        if rect.isEmpty():
+            return None
+        dpr = self.devicePixelRatioF()
+        key = (
+            rect,
+            self.scale,
+            dpr,
+            self.pixmap.cacheKey(),
+            self._hideBackround,
+            frozenset(id(shape) for shape in live_shapes),
+        )
+        if self._staticLayer is None or self._staticLayerKey != key:
+            pixmap = QtGui.QPixmap(rect.size() * dpr)
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(QtCore.Qt.transparent)
+            p = QtGui.QPainter(pixmap)
+            p.setRenderHint(QtGui.QPainter.Antialiasing)
+            p.setRenderHint(QtGui.QPainter.HighQualityAntialiasing)
+            p.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+            p.translate(-QtCore.QPointF(rect.topLeft()))
+            self._translateToPixmap(p)
+            self._paintStaticContent(p, rect, skip=live_shapes)
+            p.end()
+            self._staticLayer = pixmap
+            self._staticLayerKey = key
+        return rect.topLeft(), self._staticLayer
+
+    def _translateToPixmap(self, p):
+        # Shapes scale their own points, so only the offset is applied here.
+        p.translate(self.offsetToCenter() * self.scale)
+
+    def _paintStaticContent(self, p, exposed, skip):
+        self._paintImage(p, exposed)
+        for shape in self.shapes:
+            if shape not in skip and self._isShapePainted(shape):
+                shape.fill = shape.selected or shape == self.hShape
+                shape.paint(p, simplified=True)
+
+    def _paintImage(self, p, exposed):
+        """Draw the part of the pixmap under `exposed` (widget coordinates)."""
+        offset = self.offsetToCenter()
+        image_rect = (
+            QtCore.QRectF(
+                exposed.x() / self.scale - offset.x(),
+                exposed.y() / self.scale - offset.y(),
+                exposed.width() / self.scale,
+                exposed.height() / self.scale,
+            )
+            .toAlignedRect()
+            .adjusted(-1, -1, 1, 1)
+            .intersected(self.pixmap.rect())
+        )
+        if image_rect.isEmpty():
+            return
+        level = self.pyramidLevel(self.scale * self.devicePixelRatioF())
+        fx = level.width() / self.pixmap.width()
+        fy = level.height() / self.pixmap.height()
+        p.drawPixmap(
+            QtCore.QRectF(
+                image_rect.x() * self.scale,
+                image_rect.y() * self.scale,
+                image_rect.width() * self.scale,
+                image_rect.height() * self.scale,
+            ),
+            level,
+            QtCore.QRectF(
+                image_rect.x() * fx,
+                image_rect.y() * fy,
+                image_rect.width() * fx,
+                image_rect.height() * fy,
+            ),
+        )
+
+    def pyramidLevel(self, scale):
+        """Return the smallest pyramid level still sharp at `scale`.
+
+        Levels are built on demand by halving the previous one, so frames
+        that are never zoomed out do not pay for them.
+        """
+        level = self.pixmap
+        i = 0
+        while level.width() / 2 >= self.pixmap.width() * scale:
+            if i == len(self._pyramid):
+                if min(level.width(), level.height()) < 64:
+                    break
+                self._pyramid.append(
+                    level.scaled(
+                        level.width() // 2,
+                        level.height() // 2,
+                        QtCore.Qt.IgnoreAspectRatio,
+                        QtCore.Qt.SmoothTransformation,
+                    )
+                )
+            level = self._pyramid[i]
+            i += 1
+        return level
+
+    def _isShapePainted(self, shape):
+        return (shape.selected or not self._hideBackround) and self.isVisible(shape)
+
     def transformPos(self, point):
         """Convert from widget-logical coordinates to painter-logical ones."""
         return point / self.scale - self.offsetToCenter()
 
+    def _requestAiPreview(self, shape):
+        points = shape.vertices
+        key = (
+            self._aiImageId,
+            self.createMode,
+            points.tobytes(),
+            tuple(shape.point_labels),
+        )
+        if key == self._aiPreviewKey or self._aiWorker is None:
+            return
+        self._aiPreviewKey = key
+        self._aiWorker.submit(
+            key,
+            self._predictAiPreview,
+            self.createMode,
+            points.tolist(),
+            list(shape.point_labels),
+            (self.pixmap.height(), self.pixmap.width()),
+        )
+
+    def _predictAiPreview(self, createMode, points, point_labels, imageShape):
+        # run by the worker thread: no access to the widget state
+        if self._aiLowResPreview:
+            return self._predictLowResAiPreview(
+                createMode, points, point_labels, imageShape
+            )
+        if createMode == "ai_polygon":
+            polygon = self._ai_model.predict_polygon_from_points(
+                points=points, point_labels=point_labels
+            )
+            return polygon, None
+        mask = self._ai_model.predict_mask_from_points(
+            points=points, point_labels=point_labels
+        )
+        y1, x1, y2, x2 = imgviz.instances.masks_to_bboxes([mask])[0].astype(int)
+        return None, ((x1, y1, x2, y2), mask[y1 : y2 + 1, x1 : x2 + 1])
+
+    def _predictLowResAiPreview(self, createMode, points, point_labels, imageShape):
+        # the full resolution mask is only computed by finalise()
+        mask = self._ai_model.predict_low_res_mask_from_points(
+            points=points, point_labels=point_labels
+        )
+        height, width = imageShape
+        scale = np.array([width / mask.shape[1], height / mask.shape[0]])
+        polygon = compute_polygon_from_mask(mask)
+        polygon = (polygon + 0.5) * scale - 0.5  # pixel centers
+        if createMode == "ai_polygon" or len(polygon) == 0:
+            return polygon, None
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        y1, y2, x1, x2 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        # the rectangle of the image covered by the crop, scaled by the painter
+        rect = QtCore.QRectF(
+            x1 * scale[0],
+            y1 * scale[1],
+            (x2 - x1) * scale[0],
+            (y2 - y1) * scale[1],
+        )
+        return polygon, (rect, mask[y1:y2, x1:x2])
+
+    def _onAiPredicted(self, key, result):
+        image_id, createMode = key[:2]
+        if (
+            image_id != self._aiImageId
+            or createMode != self.createMode
+            or self.current is None
+        ):
+            return
+        polygon, mask = result
+        preview = None
+        maskImage = None
+        if mask is not None and not self._aiLowResPreview:
+            (x1, y1, x2, y2), mask = mask
+            preview = self.current.copy()
+            preview.setShapeRefined(
+                shape_type="mask",
+                points=[QtCore.QPointF(x1, y1), QtCore.QPointF(x2, y2)],
+                point_labels=[1, 1],
+                mask=mask,
+            )
+        elif polygon is not None and len(polygon) > 2:
+            preview = self.current.copy()
+            preview.setShapeRefined(
+                shape_type="polygon",
+                points=[QtCore.QPointF(point[0], point[1]) for point in polygon],
+                point_labels=[1] * len(polygon),
+            )
+            # the mask, if any, is painted below the outline
+            preview.fill = createMode == "ai_polygon" and self.fillDrawing()
+        if mask is not None and self._aiLowResPreview:
+            rect, mask = mask
+            image = np.zeros(mask.shape + (4,), dtype=np.uint8)
+            image[mask] = self.current.select_fill_color.getRgb()
+            maskImage = (
+                rect,
+                QtGui.QImage(
+                    image.data,
+                    image.shape[1],
+                    image.shape[0],
+                    image.strides[0],
+                    QtGui.QImage.Format_RGBA8888,
+                ).copy(),
+            )
+        if preview is not None:
+            preview.selected = True
+        self._aiPreview = (self.current, preview, maskImage)
+        self.requestRepaint()
+
     def offsetToCenter(self):
         s = self.scale
         area = super(Canvas, self).size()
@@ -1141,7 +1592,7 @@ class Canvas(QtWidgets.QWidget):
             # convert points to polygon by an AI model
             assert self.current.shape_type == "points"
             points = self._ai_model.predict_polygon_from_points(
-                points=[[point.x(), point.y()] for point in self.current.points],
+                points=self.current.vertices.tolist(),
                 point_labels=self.current.point_labels,
             )
             self.current.setShapeRefined(
@@ -1153,7 +1604,7 @@ class Canvas(QtWidgets.QWidget):
             # convert points to mask by an AI model
             assert self.current.shape_type == "points"
             mask = self._ai_model.predict_mask_from_points(
-                points=[[point.x(), point.y()] for point in self.current.points],
+                points=self.current.vertices.tolist(),
                 point_labels=self.current.point_labels,
             )
             y1, x1, y2, x2 = imgviz.instances.masks_to_bboxes([mask])[0].astype(int)
@@ -1166,13 +1617,14 @@ class Canvas(QtWidgets.QWidget):
         self.current.close()
 
         self.shapes.append(self.current)
-        self.storeShapes()
+        self._history.recordAdd([(len(self.shapes) - 1, self.current)])
+        self.invalidateStaticLayer()
         logger.info(f"最终确定形状: {self.current.shape_type}，标签: {self.current.label}。")
         self.current = None
         self.setHiding(False)
         self.newShape.emit()
         self.setEditing(True)  # 确保切换到编辑模式
-        self.update()
+        self.requestRepaint()
 
     def closeEnough(self, p1, p2):
         # d = distance(p1 - p2)
@@ -1276,9 +1728,21 @@ class Canvas(QtWidgets.QWidget):
         ev.accept()
 
     def moveByKeyboard(self, offset):
+        self.transformByKeyboard(
+            lambda shapes: self.boundedMoveShapes(shapes, self.prevPoint + offset)
+        )
+
+    def transformByKeyboard(self, transform):
+        """Call `transform(shapes)` on the selection as part of a keyboard edit.
+
+        Consecutive calls are one undo step, committed on key release.
+        """
         if self.selectedShapes:
-            self.boundedMoveShapes(self.selectedShapes, self.prevPoint + offset)
-            self.repaint()
+            if not self.movingShape:
+                self.beginShapeEdit(self.selectedShapes)
+            dirty = self.shapesRect(self.selectedShapes)
+            transform(self.selectedShapes)
+            self.requestRepaint(dirty.united(self.shapesRect(self.selectedShapes)))
             self.movingShape = True
 
     def keyPressEvent(self, ev):
@@ -1288,7 +1752,7 @@ class Canvas(QtWidgets.QWidget):
             if key == QtCore.Qt.Key_Escape and self.current:
                 self.current = None
                 self.drawingPolygon.emit(False)
-                self.update()
+                self.requestRepaint()
             elif key == QtCore.Qt.Key_Return and self.canCloseShape():
                 self.finalise()
             elif modifiers == QtCore.Qt.AltModifier:
@@ -1302,6 +1766,22 @@ class Canvas(QtWidgets.QWidget):
                 self.moveByKeyboard(QtCore.QPointF(-MOVE_SPEED, 0.0))
             elif key == QtCore.Qt.Key_Right:
                 self.moveByKeyboard(QtCore.QPointF(MOVE_SPEED, 0.0))
+            elif key == QtCore.Qt.Key_BracketLeft:
+                self.transformByKeyboard(
+                    lambda shapes: self.rotateShapes(shapes, -ROTATE_SPEED)
+                )
+            elif key == QtCore.Qt.Key_BracketRight:
+                self.transformByKeyboard(
+                    lambda shapes: self.rotateShapes(shapes, ROTATE_SPEED)
+                )
+            elif key == QtCore.Qt.Key_BraceLeft:  # Shift+[
+                self.transformByKeyboard(
+                    lambda shapes: self.scaleShapes(shapes, 1 / SCALE_SPEED)
+                )
+            elif key == QtCore.Qt.Key_BraceRight:  # Shift+]
+                self.transformByKeyboard(
+                    lambda shapes: self.scaleShapes(shapes, SCALE_SPEED)
+                )
 
     def keyReleaseEvent(self, ev):
         modifiers = ev.modifiers()
@@ -1310,9 +1790,7 @@ class Canvas(QtWidgets.QWidget):
                 self.snapping = True
         elif self.editing():
             if self.movingShape and self.selectedShapes:
-                index = self.shapes.index(self.selectedShapes[0])
-                if self.shapesBackups[-1][index].points != self.shapes[index].points:
-                    self.storeShapes()
+                if self.commitShapeEdit():
                     self.shapeMoved.emit()
 
                 self.movingShape = False
@@ -1339,14 +1817,15 @@ class Canvas(QtWidgets.QWidget):
         # 创建标签
         self.shapes[-1].label = text
         self.shapes[-1].flags = flags
-        self.shapesBackups.pop()
-        self.storeShapes()
         logger.info(f"设置标签为 '{text}'，标记状态为 {flags}。")
         return self.shapes[-1]
 
     def undoLastLine(self):
         assert self.shapes
         self.current = self.shapes.pop()
+        # The shape goes back to being drawn, so its addition is not an edit.
+        self._history.discard()
+        self.invalidateStaticLayer()
         self.current.setOpen()
         self.current.restoreShapeRaw()
         if self.createMode in ["polygon", "linestrip"]:
@@ -1366,37 +1845,52 @@ class Canvas(QtWidgets.QWidget):
         else:
             self.current = None
             self.drawingPolygon.emit(False)
-        self.update()
+        self.requestRepaint()
 
     def loadPixmap(self, pixmap, clear_shapes=True):
         self.pixmap = pixmap
+        self._pyramid = []
+        self._aiImageId += 1
         if self._ai_model:
             self._ai_model.set_image(
                 image=labelme.utils.img_qt_to_arr(self.pixmap.toImage())
             )
         if clear_shapes:
             self.shapes = []
-        self.update()
+        self.invalidateStaticLayer()
+        self.requestRepaint()
     
     def setOriginalImage(self, image):
         self.original_image = image  # 设置原图
-        self.update()  # 更新画布
+        self.requestRepaint()  # 更新画布
 
     def loadShapes(self, shapes, replace=True):
         if replace:
             self.shapes = list(shapes)
         else:
+            self._history.recordAdd(
+                [(len(self.shapes) + i, shape) for i, shape in enumerate(shapes)]
+            )
             self.shapes.extend(shapes)
-        self.storeShapes()
         self.current = None
         self.hShape = None
         self.hVertex = None
         self.hEdge = None
-        self.update()
+        self.invalidateStaticLayer()
+        self.requestRepaint()
 
     def setShapeVisible(self, shape, value):
-        self.visible[shape] = value
-        self.update()
+        self.setShapesVisible([shape], value)
+
+    def setShapesVisible(self, shapes, value):
+        """Show or hide `shapes` at once, with a single repaint."""
+        changed = False
+        for shape in shapes:
+            changed |= shape.visible != value
+            shape.visible = value
+        if changed:
+            self.invalidateStaticLayer()
+            self.requestRepaint()
 
     def overrideCursor(self, cursor):
         self.restoreCursor()
@@ -1409,8 +1903,12 @@ class Canvas(QtWidgets.QWidget):
     def resetState(self):
         self.restoreCursor()
         self.pixmap = None
-        self.shapesBackups = []
-        self.update()
+        self._pyramid = []
+        self._history.clear()
+        self._editStates = {}
+        self._selectionRect = ((), None)
+        self.invalidateStaticLayer()
+        self.requestRepaint()
 
     def findParentScrollArea(self):
        parent = self.parent()
@@ -1473,7 +1971,7 @@ class Canvas(QtWidgets.QWidget):
             # 处理框选
             if self.selecting and ev.buttons() & QtCore.Qt.LeftButton:
                 self.select_rect = QtCore.QRectF(self.select_start, pos).normalized()
-                self.update()
+                self.requestRepaint()
                 return
             
             # 处理选择和高亮，但不允许拖拽
@@ -1492,7 +1990,7 @@ class Canvas(QtWidgets.QWidget):
                         self.overrideCursor(CURSOR_POINT)
                         self.setToolTip(self.tr("Click to select point"))
                         self.setStatusTip(self.toolTip())
-                        self.update()
+                        self.requestRepaint()
                         break
                     elif shape.containsPoint(pos):
                         self.prevhVertex = self.hVertex
@@ -1503,7 +2001,7 @@ class Canvas(QtWidgets.QWidget):
                         self.setToolTip(self.tr("Click to select shape '%s'") % shape.label)
                         self.setStatusTip(self.toolTip())
                         self.overrideCursor(CURSOR_POINT)
-                        self.update()
+                        self.requestRepaint()
                         break
                 else:
                     self.unHighlight()
@@ -1517,7 +2015,7 @@ class Canvas(QtWidgets.QWidget):
 
                 self.overrideCursor(CURSOR_DRAW)
                 if not self.current:
-                    self.repaint()  # draw crosshair
+                    self.requestRepaint()  # draw crosshair
                     return
 
                 if self.outOfPixmap(pos):
@@ -1562,7 +2060,7 @@ class Canvas(QtWidgets.QWidget):
                     self.line.point_labels = [1]
                     self.line.close()
                 assert len(self.line.points) == len(self.line.point_labels)
-                self.repaint()
+                self.requestRepaint()
                 self.current.highlightClear()
                 return
 
@@ -1571,10 +2069,10 @@ class Canvas(QtWidgets.QWidget):
                 if self.selectedShapesCopy and self.prevPoint:
                     self.overrideCursor(CURSOR_MOVE)
                     self.boundedMoveShapes(self.selectedShapesCopy, pos)
-                    self.repaint()
+                    self.requestRepaint()
                 elif self.selectedShapes:
                     self.selectedShapesCopy = [s.copy() for s in self.selectedShapes]
-                    self.repaint()
+                    self.requestRepaint()
                 return
 
             # Polygon/Vertex moving.
@@ -1582,32 +2080,39 @@ class Canvas(QtWidgets.QWidget):
                 # print(self.current_filename)
                 if "Slot_" in self.current_filename:
                     if self.selectedVertex():
+                        dirty = self.shapesRect([self.hShape])
                         self.boundedMoveVertex(pos)
-                        self.repaint()
                         self.movingShape = True
                         self.editingSaveEnable.emit(True)
-                        self.update()  # 更新画布
+                        self.requestRepaint(
+                            dirty.united(self.shapesRect([self.hShape]))
+                        )  # 更新画布
                     elif self.selectedShapes and self.prevPoint:
                         # self.overrideCursor(CURSOR_MOVE)
                         # self.boundedMoveShapes(self.selectedShapes, pos)
-                        # self.repaint()
+                        # self.requestRepaint()
                         # self.movingShape = True
                         pass
                     return
             
             if QtCore.Qt.LeftButton & ev.buttons():
-                print(self.current_filename)
+                # print(self.current_filename)
                 if "2D-OD" in self.current_filename:
                     if self.selectedVertex():
+                        dirty = self.shapesRect([self.hShape])
                         self.boundedMoveVertex_2DOD(pos)
-                        self.repaint()
                         self.movingShape = True
                         self.editingSaveEnable.emit(True)
-                        self.update()  # 更新画布
+                        self.requestRepaint(
+                            dirty.united(self.shapesRect([self.hShape]))
+                        )  # 更新画布
                     elif self.selectedShapes and self.prevPoint:
                         self.overrideCursor(CURSOR_MOVE)
+                        dirty = self.shapesRect(self.selectedShapes)
                         self.boundedMoveShapes(self.selectedShapes, pos)
-                        self.repaint()
+                        self.requestRepaint(
+                            dirty.united(self.shapesRect(self.selectedShapes))
+                        )
                         self.movingShape = True
                         self.editingSaveEnable.emit(True)
                         pass
@@ -1633,12 +2138,14 @@ class Canvas(QtWidgets.QWidget):
                 for shape in self.shapes:
                     if self.isVisible(shape):
                         # 检查形状的所有点是否都在框内
-                        all_points_in_rect = True
-                        for point in shape.points:
-                            if not self.select_rect.contains(point):
-                                all_points_in_rect = False
-                                break
-                        if all_points_in_rect:
+                        rect = self.select_rect.normalized()
+                        x, y = shape.vertices.T
+                        if np.all(
+                            (x >= rect.left())
+                            & (x <= rect.right())
+                            & (y >= rect.top())
+                            & (y <= rect.bottom())
+                        ):
                             selected_shapes.append(shape)
                 
                 if selected_shapes:
@@ -1647,7 +2154,7 @@ class Canvas(QtWidgets.QWidget):
                 self.selecting = False
                 self.select_start = None
                 self.select_rect = None
-                self.update()
+                self.requestRepaint()
             # self.parent().mouseReleaseEvent(ev)
         else:
             # 在选择模式下，保持原有的选择功能
@@ -1658,11 +2165,15 @@ class Canvas(QtWidgets.QWidget):
                 if not menu.exec_(self.mapToGlobal(ev.pos())) and self.selectedShapesCopy:
                     # Cancel the move by deleting the shadow copy.
                     self.selectedShapesCopy = []
-                    self.repaint()
+                    self.requestRepaint()
             elif ev.button() == QtCore.Qt.LeftButton:
                 # 选择模式下左键释放，只处理选择变更
                 if self.hShape is not None and self.hShapeIsSelected:
                     self.selectionChanged.emit(
                         [x for x in self.selectedShapes if x != self.hShape]
                     )
+            # 按下到释放期间的拖拽、增删点记为一次撤销
+            if self.commitShapeEdit():
+                self.shapeMoved.emit()
+            self.movingShape = False
             # self.parent().mouseReleaseEvent(ev)
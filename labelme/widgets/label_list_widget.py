@@ -95,9 +95,11 @@ class LabelListWidgetItem(QtGui.QStandardItem):
 class StandardItemModel(QtGui.QStandardItemModel):
     itemDropped = QtCore.Signal()
 
-    def removeRows(self, *args, **kwargs):
-        ret = super().removeRows(*args, **kwargs)
-        self.itemDropped.emit()
+    def removeRows(self, row, count, parent=QtCore.QModelIndex(), dropped=True):
+        # called by Qt with the defaults to remove the moved rows of a drop
+        ret = super().removeRows(row, count, parent)
+        if dropped:
+            self.itemDropped.emit()
         return ret
 
 
@@ -108,6 +110,8 @@ class LabelListWidget(QtWidgets.QListView):
     def __init__(self):
         super(LabelListWidget, self).__init__()
         self._selectedItems = []
+        # shape -> item, kept in sync with the rows of the model
+        self._itemsByShape = {}
 
         self.setWindowFlags(Qt.Window)
         self.setModel(StandardItemModel())
@@ -117,6 +121,11 @@ class LabelListWidget(QtWidgets.QListView):
         self.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
         self.setDefaultDropAction(Qt.MoveAction)
 
+        self.model().rowsInserted.connect(self._rowsInserted)
+        self.model().dataChanged.connect(self._dataChanged)
+        self.model().rowsAboutToBeRemoved.connect(self._rowsAboutToBeRemoved)
+        self.model().modelReset.connect(self._itemsByShape.clear)
+
         self.doubleClicked.connect(self.itemDoubleClickedEvent)
         self.selectionModel().selectionChanged.connect(self.itemSelectionChangedEvent)
 
@@ -138,6 +147,25 @@ class LabelListWidget(QtWidgets.QListView):
     def itemChanged(self):
         return self.model().itemChanged
 
+    def _rowsInserted(self, parent, first, last):
+        self._indexRows(first, last)
+
+    def _dataChanged(self, topLeft, bottomRight, roles=()):
+        # rows dropped by drag and drop are filled after being inserted
+        self._indexRows(topLeft.row(), bottomRight.row())
+
+    def _indexRows(self, first, last):
+        for row in range(first, last + 1):
+            item = self.model().item(row)
+            if item is not None and item.shape() is not None:
+                self._itemsByShape[item.shape()] = item
+
+    def _rowsAboutToBeRemoved(self, parent, first, last):
+        for row in range(first, last + 1):
+            item = self.model().item(row)
+            if item is not None and self._itemsByShape.get(item.shape()) is item:
+                del self._itemsByShape[item.shape()]
+
     def itemSelectionChangedEvent(self, selected, deselected):
         selected = [self.model().itemFromIndex(i) for i in selected.indexes()]
         deselected = [self.model().itemFromIndex(i) for i in deselected.indexes()]
@@ -155,23 +183,60 @@ class LabelListWidget(QtWidgets.QListView):
     def addItem(self, item):
         if not isinstance(item, LabelListWidgetItem):
             raise TypeError("item must be LabelListWidgetItem")
-        self.model().setItem(self.model().rowCount(), 0, item)
         item.setSizeHint(self.itemDelegate().sizeHint(None, None))
+        # not setItem(): its rowsInserted comes before the item is set
+        self.model().appendRow(item)
+
+    def addItems(self, items):
+        """Append `items` as new rows at once, with a single rowsInserted."""
+        if not items:
+            return
+        for item in items:
+            if not isinstance(item, LabelListWidgetItem):
+                raise TypeError("item must be LabelListWidgetItem")
+        # the hint does not depend on the item, see HTMLDelegate.sizeHint
+        size_hint = self.itemDelegate().sizeHint(None, None)
+        for item in items:
+            item.setSizeHint(size_hint)
+        self.model().invisibleRootItem().appendRows(items)
+
+    def insertItem(self, row, item):
+        if not isinstance(item, LabelListWidgetItem):
+            raise TypeError("item must be LabelListWidgetItem")
+        row = min(max(row, 0), self.model().rowCount())
+        item.setSizeHint(self.itemDelegate().sizeHint(None, None))
+        self.model().insertRow(row, item)
 
     def removeItem(self, item):
         index = self.model().indexFromItem(item)
-        self.model().removeRows(index.row(), 1)
+        # no itemDropped: it would reorder the canvas shapes while the removed
+        # ones are still listed there, and set the file dirty on undo and redo
+        self.model().removeRows(index.row(), 1, dropped=False)
 
     def selectItem(self, item):
         index = self.model().indexFromItem(item)
         self.selectionModel().select(index, QtCore.QItemSelectionModel.Select)
 
+    def selectItems(self, items):
+        """Select `items` at once, with a single selectionChanged signal."""
+        rows = sorted(self.model().indexFromItem(item).row() for item in items)
+        selection = QtCore.QItemSelection()
+        start = 0
+        for i in range(1, len(rows) + 1):
+            # one range per run of consecutive rows
+            if i == len(rows) or rows[i] != rows[i - 1] + 1:
+                selection.select(
+                    self.model().index(rows[start], 0),
+                    self.model().index(rows[i - 1], 0),
+                )
+                start = i
+        self.selectionModel().select(selection, QtCore.QItemSelectionModel.Select)
+
     def findItemByShape(self, shape):
-        for row in range(self.model().rowCount()):
-            item = self.model().item(row, 0)
-            if item.shape() == shape:
-                return item
-        raise ValueError("cannot find shape: {}".format(shape))
+        item = self._itemsByShape.get(shape)
+        if item is None:
+            raise ValueError("cannot find shape: {}".format(shape))
+        return item
 
     def clear(self):
         self.model().clear()
@@ -9,17 +9,25 @@ from .escapable_qlist_widget import EscapableQListWidget
 
 
 class UniqueLabelQListWidget(EscapableQListWidget):
+    def __init__(self, *args, **kwargs):
+        super(UniqueLabelQListWidget, self).__init__(*args, **kwargs)
+        self._itemsByLabel = {}
+
     def mousePressEvent(self, event):
         super(UniqueLabelQListWidget, self).mousePressEvent(event)
         if not self.indexAt(event.pos()).isValid():
             self.clearSelection()
 
+    def addItem(self, item):
+        super(UniqueLabelQListWidget, self).addItem(item)
+        self._itemsByLabel[item.data(Qt.UserRole)] = item
+
+    def clear(self):
+        super(UniqueLabelQListWidget, self).clear()
+        self._itemsByLabel = {}
+
     def findItemByLabel(self, label):
-        for row in range(self.count()):
-            item = self.item(row)
-            if item.data(Qt.UserRole) == label:
-                # print("========widgets.unique_label_qlist_widget.findItemByLabel============", item)
-                return item
+        return self._itemsByLabel.get(label)
 
     def createItemFromLabel(self, label):
         if self.findItemByLabel(label):
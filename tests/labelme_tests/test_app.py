@@ -10,6 +10,7 @@ from pytestqt.qtbot import QtBot
 
 import labelme.app
 import labelme.config
+import labelme.shape
 import labelme.testing
 
 here = osp.dirname(osp.abspath(__file__))
@@ -139,3 +140,26 @@ def test_MainWindow_annotate_jpg(qtbot: QtBot) -> None:
 
     labelme.testing.assert_labelfile_sanity(out_file)
     shutil.rmtree(tmp_dir)
+
+
+@pytest.mark.gui
+def test_MainWindow_showOnlyLabels(qtbot: QtBot) -> None:
+    win: labelme.app.MainWindow = labelme.app.MainWindow()
+    qtbot.addWidget(win)
+
+    win.loadShapes([labelme.shape.Shape(label="line")])
+    win.showOnlyLabels(["line"])
+
+    # a class first seen on a later frame stays hidden
+    road = labelme.shape.Shape(label="Road")
+    win.loadShapes([road], replace=False)
+    assert not win.canvas.isVisible(road)
+    item = win.labelList.findItemByShape(road)
+    assert item.checkState() == Qt.Unchecked
+    assert not item.flags() & Qt.ItemIsUserCheckable
+
+    win.showAllLabels()
+    assert win.canvas.isVisible(road)
+    assert item.checkState() == Qt.Checked
+    assert item.flags() & Qt.ItemIsUserCheckable
+    win.close()
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from labelme.ai._decoder_memo import DecoderMemo
+
+
+def test_DecoderMemo():
+    memo = DecoderMemo(max_items=2)
+    calls = []
+
+    def compute():
+        calls.append(None)
+        return np.zeros((2, 2), dtype=bool)
+
+    mask = memo.get_or_compute("mask", [[10.2, 5.0]], [1], compute)
+    # same point once rounded
+    assert memo.get_or_compute("mask", [[9.8, 5.1]], [1], compute) is mask
+    assert (memo.num_hits, memo.num_misses) == (1, 1)
+    with pytest.raises(ValueError):
+        mask[0, 0] = True  # shared: read-only
+
+    memo.get_or_compute("mask", [[10, 5]], [0], compute)
+    memo.get_or_compute("low_res_mask", [[10, 5]], [1], compute)
+    assert len(calls) == 3
+    assert len(memo) == 2  # least recently used dropped
+    memo.get_or_compute("mask", [[10, 5]], [1], compute)
+    assert len(calls) == 4
+
+    memo.clear()
+    assert len(memo) == 0
+    memo.get_or_compute("mask", [[10, 5]], [1], compute)
+    assert len(calls) == 5
+
+
+def test_DecoderMemo_cleared_while_computing():
+    memo = DecoderMemo()
+
+    def compute():
+        memo.clear()  # e.g. set_image() from another thread
+        return np.zeros((2, 2), dtype=bool)
+
+    memo.get_or_compute("mask", [[1, 1]], [1], compute)
+    assert len(memo) == 0
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+
+from labelme.ai._embedding_cache import EmbeddingCache
+
+
+def test_EmbeddingCache_key():
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+    key = EmbeddingCache.key("encoder.onnx", image)
+    assert key == EmbeddingCache.key("encoder.onnx", image.copy())
+    assert key != EmbeddingCache.key("other.onnx", image)
+    image[0, 0, 0] = 1
+    assert key != EmbeddingCache.key("encoder.onnx", image)
+
+
+def test_EmbeddingCache_disk(tmp_path):
+    embedding = np.arange(256, dtype=np.float32).reshape(1, 4, 8, 8)
+    cache = EmbeddingCache(cache_dir=str(tmp_path), max_bytes=2500)
+    cache.put("a", embedding)
+    assert "a" in cache
+
+    # from another session: memory-mapped from the disk
+    cache = EmbeddingCache(cache_dir=str(tmp_path), max_bytes=2500)
+    loaded = cache.get("a")
+    assert isinstance(loaded, np.memmap)
+    np.testing.assert_array_equal(loaded, embedding)
+
+    # ~1.1KB each, the least recently used is removed
+    cache.put("b", embedding)
+    cache.get("a")
+    cache.put("c", embedding)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert sorted(os.listdir(tmp_path)) == ["a.npy", "c.npy"]
+
+
+def test_EmbeddingCache_memory():
+    cache = EmbeddingCache(max_memory_items=2)
+    for key in "abc":
+        cache.put(key, np.zeros(1))
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
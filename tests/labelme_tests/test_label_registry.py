@@ -0,0 +1,46 @@
+from qtpy import QtGui
+
+from labelme.label_registry import LABEL_COLORMAP
+from labelme.label_registry import LabelRegistry
+from labelme.shape import Shape
+
+
+def test_LabelRegistry_auto():
+    registry = LabelRegistry(shape_color="auto", shift_auto_shape_color=1)
+    assert registry.register("car") == 1
+    assert registry.register("lane") == 2
+    assert registry.register("car") == 1
+    assert registry.rgb("lane") == tuple(LABEL_COLORMAP[3])
+    assert registry.labels() == ["car", "lane"]
+
+    # shapes of a label share the same color objects
+    a, b = Shape(label="car"), Shape(label="car")
+    registry.update_shape_color(a)
+    registry.update_shape_color(b)
+    assert a.line_color is b.line_color
+    assert a.fill_color.getRgb() == tuple(LABEL_COLORMAP[2]) + (128,)
+    # and the same pens and brushes
+    assert a.style is b.style
+    assert a._pen(a.line_color) is b._pen(b.line_color) is a.style.line_pen
+    assert a._pen(a.line_color).width() == Shape.PEN_WIDTH
+    assert a._brush(a.fill_color) is a.style.fill_brush
+    # not for a color that is not the style's
+    other = QtGui.QColor(a.fill_color)
+    assert a._brush(other) is other
+
+
+def test_LabelRegistry_manual():
+    registry = LabelRegistry(
+        shape_color="manual",
+        label_colors={"car": [255, 0, 0]},
+        default_shape_color=[0, 0, 255],
+    )
+    assert registry.rgb("car") == (255, 0, 0)
+    assert registry.rgb("lane") == (0, 0, 255)
+    style = registry.style("car")
+    assert registry.style("car") is style
+
+    registry.configure(shape_color=None)
+    assert registry.style("car") is not style
+    assert registry.rgb("car") == (0, 255, 0)
+    assert registry.style("car").id == 1
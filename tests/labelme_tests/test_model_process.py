@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from labelme.ai._model_process import ModelProcess
+
+
+class _ThresholdModel:
+    """Mask of the pixels brighter than the first point."""
+
+    name = "threshold"
+
+    def set_image(self, image):
+        self._image = image
+
+    def predict_mask_from_points(self, points, point_labels):
+        crash_file = os.environ.get("LABELME_TEST_CRASH_FILE")
+        if crash_file and os.path.exists(crash_file):
+            os.remove(crash_file)
+            os._exit(1)
+        x, y = points[0]
+        return self._image[:, :, 0] > self._image[y, x, 0]
+
+
+class _ChildCrashingModel(_ThresholdModel):
+    def __init__(self):
+        if multiprocessing.parent_process() is not None:
+            os._exit(1)
+
+
+def _make_image():
+    image = np.zeros((4, 6, 3), dtype=np.uint8)
+    image[1:3, 2:5] = 200
+    image[0, 0] = 100
+    return image
+
+
+def test_ModelProcess(tmp_path, monkeypatch):
+    crash_file = tmp_path / "crash"
+    monkeypatch.setenv("LABELME_TEST_CRASH_FILE", str(crash_file))
+    image = _make_image()
+    expected = image[:, :, 0] > 100
+
+    model = ModelProcess(_ThresholdModel)
+    try:
+        model.set_image(image)
+        np.testing.assert_array_equal(
+            model.predict_mask_from_points([[0, 0]], [1]), expected
+        )
+        future = model.submit(
+            "predict_mask_from_points", points=[[0, 0]], point_labels=[1]
+        )
+        np.testing.assert_array_equal(future.result(), expected)
+
+        # restarted with the image after a crash
+        crash_file.touch()
+        np.testing.assert_array_equal(
+            model.predict_mask_from_points([[0, 0]], [1]), expected
+        )
+        assert model._num_restarts == 1
+        assert model._fallback is None
+    finally:
+        model.close()
+
+
+def test_ModelProcess_fallback():
+    image = _make_image()
+    model = ModelProcess(_ChildCrashingModel, max_restarts=1)
+    try:
+        model.set_image(image)
+        np.testing.assert_array_equal(
+            model.predict_mask_from_points([[0, 0]], [1]), image[:, :, 0] > 100
+        )
+        assert model._fallback is not None
+    finally:
+        model.close()
@@ -0,0 +1,132 @@
+import glob
+import json
+import os.path as osp
+import time
+
+import cv2
+import numpy as np
+import pytest
+import skimage.measure
+
+from labelme._automation.polygon_from_mask import compute_polygon_from_mask
+
+here = osp.dirname(osp.abspath(__file__))
+
+
+def _rasterize(polygon, shape):
+    mask = np.zeros(shape, dtype=np.uint8)
+    cv2.fillPoly(mask, [np.round(polygon).astype(np.int32)], 1)
+    return mask.astype(bool)
+
+
+def test_compute_polygon_from_mask():
+    mask = np.zeros((40, 60), dtype=bool)
+    mask[5:15, 10:50] = True  # wider than tall: catches a yx output
+
+    polygon = compute_polygon_from_mask(mask)
+    assert polygon.dtype == np.float32
+    assert sorted(map(tuple, polygon.tolist())) == [
+        (10, 5),
+        (10, 14),
+        (49, 5),
+        (49, 14),
+    ]
+
+    for approximation in ["dp", "simple", "none"]:
+        polygon = compute_polygon_from_mask(mask, approximation=approximation)
+        np.testing.assert_array_equal(_rasterize(polygon, mask.shape), mask)
+
+    assert compute_polygon_from_mask(np.zeros((4, 4), dtype=bool)).shape == (0, 2)
+    with pytest.raises(ValueError):
+        compute_polygon_from_mask(mask, approximation="spline")
+
+
+def test_compute_polygon_from_mask_longest_contour():
+    mask = np.zeros((200, 300), dtype=np.uint8)
+    cv2.ellipse(mask, (180, 90), (90, 50), 30, 0, 360, 1, -1)
+    cv2.circle(mask, (30, 170), 5, 1, -1)  # smaller blob, to be ignored
+    mask = mask.astype(bool)
+
+    polygon = compute_polygon_from_mask(mask)
+    assert (polygon[:, 0] > 60).all()
+    ellipse = mask.copy()
+    ellipse[150:, :60] = False
+    rasterized = _rasterize(polygon, mask.shape)
+    assert (rasterized & ellipse).sum() / (rasterized | ellipse).sum() > 0.98
+
+
+def _compute_polygon_from_mask_skimage(mask):
+    # the implementation replaced by compute_polygon_from_mask()
+    contours = skimage.measure.find_contours(np.pad(mask, pad_width=1))
+    if len(contours) == 0:
+        return np.empty((0, 2), dtype=np.float32)
+    contour = max(
+        contours,
+        key=lambda c: np.linalg.norm(np.r_[c[1:], c[:1]] - c, axis=1).sum(),
+    )
+    polygon = skimage.measure.approximate_polygon(
+        coords=contour, tolerance=np.ptp(contour, axis=0).max() * 0.004
+    )
+    polygon = np.clip(polygon, (0, 0), (mask.shape[0] - 1, mask.shape[1] - 1))
+    return polygon[:-1, ::-1]
+
+
+def _benchmark_masks():
+    masks = []
+    json_files = glob.glob(
+        osp.join(here, "../../examples/**/*.json"), recursive=True
+    ) + glob.glob(osp.join(here, "data/annotated/*.json"))
+    for json_file in sorted(json_files):
+        with open(json_file) as f:
+            data = json.load(f)
+        if "shapes" not in data or "imageHeight" not in data:
+            continue
+        for shape in data["shapes"]:
+            if shape.get("shape_type", "polygon") != "polygon":
+                continue
+            if len(shape["points"]) < 3:
+                continue
+            masks.append(
+                _rasterize(shape["points"], (data["imageHeight"], data["imageWidth"]))
+            )
+    # blobs in AVM sized frames
+    random_state = np.random.default_rng(0)
+    for _ in range(20):
+        mask = np.zeros((1080, 1920), dtype=np.uint8)
+        center = random_state.integers([200, 200], [1920 - 200, 1080 - 200])
+        axes = random_state.integers(20, 180, 2)
+        angle = float(random_state.uniform(0, 180))
+        cv2.ellipse(
+            mask, tuple(map(int, center)), tuple(map(int, axes)), angle, 0, 360, 1, -1
+        )
+        masks.append(mask.astype(bool))
+    return masks
+
+
+@pytest.mark.benchmark
+def test_compute_polygon_from_mask_benchmark():
+    masks = _benchmark_masks()
+    functions = {
+        "skimage find_contours": _compute_polygon_from_mask_skimage,
+        "cv2 dp": compute_polygon_from_mask,
+        "cv2 simple": lambda mask: compute_polygon_from_mask(mask, "simple"),
+        "cv2 none": lambda mask: compute_polygon_from_mask(mask, "none"),
+    }
+    print(f"\n{len(masks)} masks")
+    ious = {}
+    for name, function in functions.items():
+        elapsed_times = []
+        ious[name] = []
+        for mask in masks:
+            t_start = time.perf_counter()
+            polygon = function(mask)
+            elapsed_times.append(time.perf_counter() - t_start)
+            rasterized = _rasterize(polygon, mask.shape)
+            ious[name].append((rasterized & mask).sum() / (rasterized | mask).sum())
+        print(
+            f"{name:24s}"
+            f"mean {np.mean(elapsed_times) * 1e3:5.2f} ms  "
+            f"median {np.median(elapsed_times) * 1e3:5.2f} ms  "
+            f"IoU to the mask min {min(ious[name]):.3f} mean {np.mean(ious[name]):.3f}"
+        )
+    assert np.mean(ious["cv2 dp"]) >= np.mean(ious["skimage find_contours"])
@@ -0,0 +1,52 @@
+import threading
+import types
+
+import numpy as np
+import PIL.Image
+
+import labelme.ai
+from labelme.ai import _embedding_cache
+from labelme.ai import _pre_encoder
+from labelme.ai._embedding_cache import get_embedding_cache
+
+
+class _FakeModel:
+    name = "fake"
+    encoded = []
+
+    def image_key(self, image):
+        return get_embedding_cache().key(self.name, image)
+
+    def encode_image(self, image):
+        self.encoded.append(image.shape)
+        return np.full((1, 2), image.shape[0], dtype=np.float32)
+
+
+def test_pre_encode(tmp_path, monkeypatch):
+    filenames = []
+    for i, height in enumerate([10, 20, 30]):
+        filename = str(tmp_path / ("%d.png" % i))
+        PIL.Image.fromarray(np.zeros((height, 8, 3), dtype=np.uint8)).save(filename)
+        filenames.append(filename)
+    monkeypatch.setattr(labelme.ai, "MODELS", [_FakeModel])
+    # restored after the test, as _pre_encode() configures the cache
+    monkeypatch.setattr(_embedding_cache, "_cache", get_embedding_cache())
+    running = threading.Event()
+    running.set()
+
+    _pre_encoder._pre_encode(
+        model_name="fake",
+        cache_dir=str(tmp_path / "cache"),
+        max_bytes=1 << 20,
+        session_config={},
+        filenames=filenames,
+        cursor=types.SimpleNamespace(value=1),
+        running=running,
+        stopped=threading.Event(),
+    )
+
+    # nearest the cursor first
+    assert [shape[0] for shape in _FakeModel.encoded] == [20, 30, 10]
+    image = _pre_encoder.load_canvas_image(filenames[2])
+    key = _FakeModel().image_key(image)
+    np.testing.assert_array_equal(get_embedding_cache().get(key), [[30, 30]])
@@ -0,0 +1,105 @@
+import concurrent.futures
+import json
+import os.path as osp
+
+import numpy as np
+import PIL.Image
+
+from labelme.cli import preannotate_2dod
+from labelme.label_file import LabelFile
+from labelme.label_file import LabelFileError
+
+
+def _make_frame(folder, name, anno):
+    folder.joinpath("label").mkdir(exist_ok=True)
+    folder.joinpath("image").mkdir(exist_ok=True)
+    folder.joinpath("label", name + ".json").write_text(json.dumps({"anno": anno}))
+    folder.joinpath("image", name + ".jpg").write_bytes(b"")
+
+
+def test_pending_frames(tmp_path):
+    folder = tmp_path / "2D-OD_0001"
+    folder.mkdir()
+    _make_frame(folder, "frame_10", [])
+    _make_frame(folder, "frame_2", [])
+    _make_frame(folder, "frame_3", [{"category": {"type": "car"}}])  # annotated
+    _make_frame(folder, "frame_4", [])
+    folder.joinpath("image", "frame_4.jpg").unlink()  # no image
+
+    frames = preannotate_2dod.pending_frames(str(folder))
+    assert [osp.basename(label_file) for label_file, _ in frames] == [
+        "frame_2.json",
+        "frame_10.json",
+    ]
+    assert frames[0][1] == str(folder / "image" / "frame_2.jpg")
+
+    # done without any detection in a previous run
+    folder.joinpath(preannotate_2dod.DONE_FILENAME).write_text(
+        osp.join("label", "frame_2.json") + "\n"
+    )
+    frames = preannotate_2dod.pending_frames(str(folder))
+    assert [osp.basename(label_file) for label_file, _ in frames] == ["frame_10.json"]
+
+
+def test_preannotate_frames(tmp_path, monkeypatch):
+    folder = tmp_path / "2D-OD_0001"
+    folder.mkdir()
+    for name in ["frame_1", "frame_2"]:
+        _make_frame(folder, name, [])
+        PIL.Image.new("RGB", (64, 48)).save(folder / "image" / (name + ".jpg"))
+    folder.joinpath("vis_avm").mkdir()
+
+    def get_rectangles_from_texts(model, image, texts):
+        assert image.shape == (48, 64, 3)
+        return (
+            np.array([[10, 20, 30, 40], [11, 21, 31, 41]], dtype=np.float32),
+            np.array([0.9, 0.8], dtype=np.float32),
+            np.array([1, 1], dtype=np.int32),
+        )
+
+    save_2dod = LabelFile.save_2dod
+
+    def save_2dod_failing(self, filename, shapes):
+        if osp.basename(filename) == "frame_2.json":
+            raise LabelFileError("disk full")
+        save_2dod(self, filename, shapes)
+
+    monkeypatch.setattr(
+        preannotate_2dod.ai, "get_rectangles_from_texts", get_rectangles_from_texts
+    )
+    monkeypatch.setattr(LabelFile, "save_2dod", save_2dod_failing)
+
+    frames = preannotate_2dod.pending_frames(str(folder))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        num_done = preannotate_2dod.preannotate_frames(
+            executor,
+            str(folder),
+            frames,
+            model="yoloworld",
+            texts=["pillar", "car"],
+            iou_threshold=0.5,
+            score_threshold=0.1,
+            max_num_detections=100,
+        )
+    assert num_done == 1
+
+    # the overlapping box is suppressed
+    data = json.loads(folder.joinpath("label", "frame_1.json").read_text())
+    assert len(data["anno"]) == 1
+    annotation = data["anno"][0]
+    assert annotation["category"]["type"] == "car"
+    assert annotation["data"] == {
+        "x": 10.0,
+        "y": 20.0,
+        "width": 20.0,
+        "height": 20.0,
+        "name": "rect",
+    }
+    assert annotation["attrs"] == {"car": LabelFile().GetCXColor("car")}
+
+    # the frame not saved is left to the next run
+    assert folder.joinpath(preannotate_2dod.DONE_FILENAME).read_text() == (
+        osp.join("label", "frame_1.json") + "\n"
+    )
+    frames = preannotate_2dod.pending_frames(str(folder))
+    assert [osp.basename(label_file) for label_file, _ in frames] == ["frame_2.json"]
@@ -0,0 +1,33 @@
+import threading
+
+from labelme.ai import PredictionWorker
+
+
+def test_PredictionWorker_latest_wins():
+    started = threading.Event()
+    release = threading.Event()
+    done = threading.Event()
+    results = []
+
+    def callback(key, result):
+        results.append((key, result))
+        if key == 3:
+            done.set()
+
+    def predict(value):
+        started.set()
+        release.wait()
+        return value * 10
+
+    worker = PredictionWorker(callback=callback)
+    worker.submit(0, predict, 0)
+    started.wait()
+    # submitted while the first one runs: only the latest is kept
+    for key in [1, 2, 3]:
+        worker.submit(key, predict, key)
+    release.set()
+    assert done.wait(timeout=5)
+    worker.stop()
+
+    assert results == [(0, 0), (3, 30)]
+    assert worker.num_dropped == 2
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+import numpy as np
+import orjson
+import PIL.Image
+
+from labelme._automation.propagate_shapes import PropagateShapesJob
+from labelme._automation.propagate_shapes import propagate_shapes
+from labelme.label_file import LabelFile
+
+
+def _make_frame(root, name):
+    for dirname in ["json", "vis_avm"]:
+        root.joinpath(dirname).mkdir(exist_ok=True)
+    PIL.Image.fromarray(np.zeros((896, 1792, 3), dtype=np.uint8)).save(
+        root / "vis_avm" / (name + ".png")
+    )
+    label_file = str(root / "json" / (name + ".json"))
+    with open(label_file, "wb") as f:
+        f.write(orjson.dumps({"anno": []}))
+    return label_file
+
+
+def _make_shape():
+    return dict(
+        label="Curb",
+        points=[[10.0, 10.0], [20.0, 10.0], [20.0, 20.0]],
+        group_id=None,
+        description="a+b+c",
+        shape_type="polygon",
+        flags={},
+        mask=None,
+    )
+
+
+def test_propagate_shapes(tmp_path):
+    label_files = [_make_frame(tmp_path, "%04d" % i) for i in range(3)]
+    shape = _make_shape()
+    vis_file = tmp_path / "vis_avm" / "0001.png"
+    os.utime(vis_file, (0, 0))
+
+    assert propagate_shapes([shape], label_files[1:]) == label_files[1:]
+    assert LabelFile(label_files[0]).shapes == []
+    for label_file in label_files[1:]:
+        (loaded,) = LabelFile(label_file).shapes
+        assert loaded["label"] == "Curb"
+        assert [list(p) for p in loaded["points"]] == shape["points"]
+    # the annotations only: the vis_avm image is not redrawn
+    assert vis_file.stat().st_mtime == 0
+
+    # already there: not written again
+    assert propagate_shapes([shape], label_files[1:]) == []
+
+
+def test_PropagateShapesJob(tmp_path):
+    label_files = [_make_frame(tmp_path, "%04d" % i) for i in range(4)]
+    done = []
+    job = PropagateShapesJob(
+        shapes=[_make_shape()], label_files=label_files, callback=done.append
+    )
+    # propagated first once waited for
+    waiter = threading.Thread(target=job.wait_for, args=(label_files[3],))
+    waiter.start()
+    t_start = time.time()
+    while job._pending[0] != label_files[3] and time.time() - t_start < 5:
+        time.sleep(0.01)
+    job.start()
+    waiter.join()
+    assert label_files[3] in job.written
+    assert job.written[0] == label_files[3]
+
+    job.join()
+    assert done == [job]
+    assert sorted(job.written) == sorted(job.stale_vis) == label_files
+    assert job.wait_for("not_propagated.json")
@@ -0,0 +1,43 @@
+import threading
+import time
+
+import numpy as np
+
+from labelme.ai._decoder_memo import DecoderMemo
+from labelme.ai.segment_anything_model import SegmentAnythingModel
+
+
+class _SlowEncoderModel(SegmentAnythingModel):
+    def __init__(self):
+        # no ONNX sessions
+        self._encoder_name = "slow_encoder.onnx"
+        self._lock = threading.Lock()
+        self._memo = DecoderMemo()
+        self._thread = None
+
+    def encode_image(self, image):
+        time.sleep(0.1)
+        return image.mean()
+
+
+def test_SegmentAnythingModel_set_image_while_waiting():
+    model = _SlowEncoderModel()
+    images = [np.full((8, 8, 3), value, dtype=np.uint8) for value in [10, 20]]
+
+    model.set_image(images[0])
+    # the prediction worker waits for the embedding of the first image...
+    embeddings = []
+    worker = threading.Thread(
+        target=lambda: embeddings.append(model._get_image_embedding())
+    )
+    worker.start()
+    time.sleep(0.02)
+    # ...while the GUI thread moves on to the next one
+    model.set_image(images[1])
+    worker.join()
+
+    # of either image, depending on which thread got the lock first
+    assert embeddings[0] in [10, 20]
+    # the thread of the second image is still waited for
+    assert model._get_image_embedding() == 20
+    assert model._thread is None
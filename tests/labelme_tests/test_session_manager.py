@@ -0,0 +1,22 @@
+import onnxruntime
+import pytest
+
+from labelme.ai._session_manager import SessionManager
+
+
+def test_SessionManager_options():
+    manager = SessionManager(
+        intra_op_num_threads=2,
+        graph_optimization_level="basic",
+        enable_cpu_mem_arena=False,
+    )
+    options = manager.session_options()
+    assert options.intra_op_num_threads == 2
+    assert (
+        options.graph_optimization_level
+        == onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC
+    )
+    assert not options.enable_cpu_mem_arena
+
+    with pytest.raises(ValueError):
+        SessionManager(graph_optimization_level="fast")
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from qtpy import QtCore
+
+from labelme.shape import Shape
+from labelme.shape import shapes_bounding_rect
+from labelme.shape import transform_shapes
+
+
+def _make_shape():
+    shape = Shape(label="a", shape_type="polygon", flags={"x": False})
+    for x, y in [(0, 0), (10, 0), (10, 10), (0, 10)]:
+        shape.addPoint(QtCore.QPointF(x, y))
+    shape.close()
+    return shape
+
+
+def test_Shape_vertices():
+    shape = _make_shape()
+    assert shape.vertices.shape == (4, 2)
+    assert not shape.vertices.flags.writeable
+    assert shape[2] == QtCore.QPointF(10, 10)
+    assert shape.points[3] == QtCore.QPointF(0, 10)
+
+    shape.moveBy(QtCore.QPointF(1, 2))
+    shape.moveVertexBy(0, QtCore.QPointF(-1, -2))
+    np.testing.assert_array_equal(shape.vertices, [[0, 0], [11, 2], [11, 12], [1, 12]])
+    assert shape.boundingRect() == QtCore.QRectF(0, 0, 11, 12)
+
+    assert shape.nearestVertex(QtCore.QPointF(11, 11), epsilon=2) == 2
+    assert shape.nearestEdge(QtCore.QPointF(6, 1), epsilon=2) == 1
+    assert shape.nearestVertex(QtCore.QPointF(6, 6), epsilon=2) is None
+
+    with pytest.raises(AttributeError):
+        shape.foo = 1
+
+
+def test_Shape_copy():
+    shape = _make_shape()
+    copied = shape.copy()
+    # vertices are shared until one of the shapes is edited
+    assert copied.vertices is shape.vertices
+
+    copied.moveVertexBy(0, QtCore.QPointF(5, 5))
+    copied.point_labels.append(0)
+    copied.flags["x"] = True
+    assert shape[0] == QtCore.QPointF(0, 0)
+    assert copied[0] == QtCore.QPointF(5, 5)
+    assert len(shape.point_labels) == 4
+    assert shape.flags == {"x": False}
+    assert copied.isClosed()
+
+
+def test_transform_shapes():
+    polygon = _make_shape()
+    rectangle = Shape(shape_type="rectangle")
+    rectangle.vertices = [[20, 0], [30, 10]]
+
+    # rotate by 90 degrees about (10, 10)
+    matrix = np.array([[0, -1], [1, 0]])
+    transform_shapes([polygon, rectangle], matrix, offset=(20, 0))
+    np.testing.assert_allclose(polygon.vertices, [[20, 0], [20, 10], [10, 10], [10, 0]])
+    # only the centre of rectangles moves
+    np.testing.assert_allclose(rectangle.vertices, [[10, 20], [20, 30]])
+
+    rect = shapes_bounding_rect([polygon, rectangle])
+    assert rect == QtCore.QRectF(10, 0, 10, 30)
+    assert shapes_bounding_rect([Shape()]) is None
@@ -0,0 +1,91 @@
+from qtpy import QtCore
+
+from labelme.shape import Shape
+from labelme.shape_history import ShapeChange
+from labelme.shape_history import ShapeHistory
+
+
+def _make_shape(label, x):
+    shape = Shape(label=label, shape_type="polygon")
+    for dx, dy in [(0, 0), (10, 0), (10, 10)]:
+        shape.addPoint(QtCore.QPointF(x + dx, dy))
+    shape.close()
+    return shape
+
+
+def test_ShapeHistory_add_remove():
+    a, b, c = _make_shape("a", 0), _make_shape("b", 20), _make_shape("c", 40)
+    shapes = [a, c]
+    history = ShapeHistory()
+
+    shapes.insert(1, b)
+    history.recordAdd([(1, b)])
+    history.recordRemove([(0, a), (2, c)])
+    shapes[:] = [b]
+
+    assert history.undo(shapes)
+    assert shapes == [a, b, c]
+    assert history.undo(shapes)
+    assert shapes == [a, c]
+    assert not history.undo(shapes)
+
+    assert history.redo(shapes)
+    assert history.redo(shapes)
+    assert shapes == [b]
+    assert not history.canRedo()
+
+
+def test_ShapeHistory_change():
+    shape = _make_shape("a", 0)
+    shapes = [shape]
+    history = ShapeHistory()
+
+    before = shape.saveState()
+    assert not history.recordChange([(shape, before, shape.saveState())])
+
+    shape.moveBy(QtCore.QPointF(5, 5))
+    shape.label = "b"
+    assert history.recordChange([(shape, before, shape.saveState())])
+
+    history.undo(shapes)
+    assert shape.label == "a"
+    assert shape.points[0] == QtCore.QPointF(0, 0)
+    history.redo(shapes)
+    assert shape.label == "b"
+    assert shape.points[0] == QtCore.QPointF(5, 5)
+
+    # a new edit drops the redo branch
+    history.undo(shapes)
+    history.recordReorder(shapes, shapes)
+    assert not history.canRedo()
+
+
+def test_ShapeHistory_max_size():
+    shapes = []
+    history = ShapeHistory(max_size=3)
+    for i in range(5):
+        shape = _make_shape(str(i), 20 * i)
+        shapes.append(shape)
+        history.recordAdd([(i, shape)])
+    assert len(history) == 3
+    while history.undo(shapes):
+        pass
+    assert [shape.label for shape in shapes] == ["0", "1"]
+
+
+def test_ShapeHistory_changes():
+    a, b = _make_shape("a", 0), _make_shape("b", 20)
+    shapes = [a]
+    history = ShapeHistory()
+
+    shapes.append(b)
+    history.recordAdd([(1, b)])
+    before = a.saveState()
+    a.label = "c"
+    history.recordChange([(a, before, a.saveState())])
+
+    assert history.undo(shapes) == [ShapeChange("change", a, None)]
+    assert history.undo(shapes) == [ShapeChange("remove", b, 1)]
+    assert history.redo(shapes) == [ShapeChange("add", b, 1)]
+    assert history.undo(shapes) == [ShapeChange("remove", b, 1)]
+    assert history.undo(shapes) == []
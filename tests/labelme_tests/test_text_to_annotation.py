@@ -0,0 +1,66 @@
+import numpy as np
+
+from labelme.ai import text_to_annotation
+
+
+def test_non_maximum_suppression():
+    boxes = np.array(
+        [[0, 0, 10, 10], [1, 1, 10, 10], [0, 0, 10, 10], [50, 50, 60, 60]],
+        dtype=np.float32,
+    )
+    scores = np.array([0.9, 0.8, 0.7, 0.6], dtype=np.float32)
+    labels = np.array([0, 0, 1, 0])
+
+    boxes, scores, labels = text_to_annotation.non_maximum_suppression(
+        boxes=boxes,
+        scores=scores,
+        labels=labels,
+        iou_threshold=0.5,
+        score_threshold=0.1,
+        max_num_detections=100,
+    )
+    # suppressed within its class only
+    assert sorted(zip(scores.tolist(), labels.tolist())) == [
+        (np.float32(0.6), 0),
+        (np.float32(0.7), 1),
+        (np.float32(0.9), 0),
+    ]
+
+    boxes, scores, labels = text_to_annotation.non_maximum_suppression(
+        boxes=np.empty((0, 4), dtype=np.float32),
+        scores=np.empty((0,), dtype=np.float32),
+        labels=np.empty((0,), dtype=np.int32),
+        iou_threshold=0.5,
+        score_threshold=0.1,
+        max_num_detections=100,
+    )
+    assert boxes.shape == (0, 4) and len(scores) == len(labels) == 0
+
+
+def test_merge_detections():
+    boxes, scores, labels = text_to_annotation.merge_detections(
+        boxes=np.array([[0, 0, 10, 10], [50, 50, 60, 60]], dtype=np.float32),
+        scores=np.array([0.9, 0.8], dtype=np.float32),
+        labels=np.array([0, 0]),
+        # corners in any order
+        existing_boxes=np.array([[10, 10, 0, 1]], dtype=np.float32),
+        existing_labels=np.array([0]),
+        iou_threshold=0.5,
+        score_threshold=0.1,
+        max_num_detections=100,
+    )
+    assert boxes.tolist() == [[50, 50, 60, 60]]
+    assert scores.tolist() == [np.float32(0.8)]
+    assert labels.tolist() == [0]
+
+    boxes, _, _ = text_to_annotation.merge_detections(
+        boxes=np.array([[0, 0, 10, 10]], dtype=np.float32),
+        scores=np.array([0.9], dtype=np.float32),
+        labels=np.array([0]),
+        existing_boxes=np.empty((0, 4), dtype=np.float32),
+        existing_labels=np.empty((0,), dtype=np.int64),
+        iou_threshold=0.5,
+        score_threshold=0.1,
+        max_num_detections=100,
+    )
+    assert boxes.tolist() == [[0, 0, 10, 10]]
@@ -0,0 +1,36 @@
+import os.path as osp
+
+from labelme.view_state import VIEW_STATE_FILENAME
+from labelme.view_state import ViewStateStore
+
+
+def test_ViewStateStore_lru():
+    store = ViewStateStore(max_size=2)
+    store.set("a.jpg", "zoom", (0, 100))
+    store.set("b.jpg", "zoom", (0, 120))
+    assert store.get("a.jpg", "zoom") == (0, 100)
+    store.set("c.jpg", "scroll_x", 10)
+    # b.jpg is the least recently used
+    assert "b.jpg" not in store
+    assert len(store) == 2
+    assert store.get("b.jpg", "zoom", "default") == "default"
+    assert store.get(None, "zoom") is None
+
+
+def test_ViewStateStore_persist(tmp_path):
+    directory = str(tmp_path)
+    store = ViewStateStore()
+    store.set(osp.join(directory, "a.jpg"), "brightness_contrast", (60, None))
+    store.set(osp.join(directory, "sub", "b.jpg"), "scroll_y", 5)
+    store.set("/elsewhere/c.jpg", "scroll_y", 1)
+    store.save(directory)
+    assert osp.exists(osp.join(directory, VIEW_STATE_FILENAME))
+
+    store = ViewStateStore()
+    store.load(directory)
+    assert store.get(osp.join(directory, "a.jpg"), "brightness_contrast") == [
+        60,
+        None,
+    ]
+    assert store.get(osp.join(directory, "sub", "b.jpg"), "scroll_y") == 5
+    assert len(store) == 2
@@ -0,0 +1,23 @@
+import numpy as np
+import PIL.Image
+import PIL.ImageEnhance
+
+from labelme.widgets.brightness_contrast_dialog import brightness_contrast_lut
+from labelme.widgets.brightness_contrast_dialog import channel_histograms
+
+
+def test_brightness_contrast_lut():
+    img = np.random.RandomState(0).randint(0, 256, (64, 48, 3), dtype=np.uint8)
+    histograms = channel_histograms(img)
+
+    for brightness, contrast in [(1, 1), (1.5, 1), (1, 0.4), (0.7, 2.2)]:
+        expected = PIL.Image.fromarray(img)
+        if brightness != 1:
+            expected = PIL.ImageEnhance.Brightness(expected).enhance(brightness)
+        if contrast != 1:
+            expected = PIL.ImageEnhance.Contrast(expected).enhance(contrast)
+        expected = np.asarray(expected).astype(int)
+
+        lut = brightness_contrast_lut(brightness, contrast, histograms)
+        # the mean gray level may be off by one from PIL's
+        assert np.abs(lut[img].astype(int) - expected).max() <= np.ceil(contrast)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from labelme.shape import Shape
+from labelme.widgets import Canvas
+
+
+@pytest.mark.gui
+def test_Canvas_visibility(qtbot):
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    road, line1, line2 = Shape(label="Road"), Shape(label="line"), Shape(label="line")
+
+    canvas.setLabelsVisible(["Road"], False)
+    assert not canvas.isVisible(road)
+    assert canvas.isVisible(line1)
+
+    canvas.setShapesVisible([line1], False)
+    assert not canvas.isVisible(line1)
+    assert canvas.isVisible(line2)
+
+    canvas.showAllLabels()
+    assert canvas.isVisible(road)
+    assert canvas.isLabelVisible("line")
+
+
+@pytest.mark.gui
+def test_Canvas_showOnlyLabels(qtbot):
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+
+    canvas.showOnlyLabels(["line"])
+    assert canvas.isVisible(Shape(label="line"))
+    # labels first seen afterwards are hidden too
+    assert not canvas.isVisible(Shape(label="Road"))
+    assert not canvas.isLabelVisible("Background")
+
+    canvas.setLabelsVisible(["Road"], True)
+    assert canvas.isVisible(Shape(label="Road"))
+
+    canvas.showAllLabels()
+    assert canvas.isVisible(Shape(label="Background"))
+    assert canvas.isVisible(Shape(label="curb"))
+
+
+class _LowResModel:
+    name = "low_res"
+
+    def predict_low_res_mask_from_points(self, points, point_labels):
+        mask = np.zeros((50, 100), dtype=bool)
+        mask[5:10, 15:25] = True
+        return mask
+
+
+@pytest.mark.gui
+def test_Canvas_low_res_ai_preview(qtbot):
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    canvas._ai_model = _LowResModel()
+
+    polygon, mask = canvas._predictAiPreview(
+        "ai_polygon", [[40, 15]], [1], imageShape=(100, 200)
+    )
+    assert mask is None
+    assert polygon.min(axis=0).tolist() == [30.5, 10.5]
+    assert polygon.max(axis=0).tolist() == [48.5, 18.5]
+
+    _, (rect, mask) = canvas._predictAiPreview(
+        "ai_mask", [[40, 15]], [1], imageShape=(100, 200)
+    )
+    # painted over the pixels of the mask in the image
+    assert rect.getRect() == (30, 10, 20, 10)
+    assert mask.shape == (5, 10) and mask.all()
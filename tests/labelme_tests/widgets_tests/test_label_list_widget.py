@@ -1,7 +1,9 @@
 # -*- encoding: utf-8 -*-
 
 import pytest
+from qtpy import QtCore
 
+from labelme.shape import Shape
 from labelme.widgets import LabelListWidget
 from labelme.widgets import LabelListWidgetItem
 
@@ -18,3 +20,91 @@ def test_LabelListWidget(qtbot):
     widget.show()
     qtbot.addWidget(widget)
     qtbot.waitExposed(widget)
+
+
+@pytest.mark.gui
+def test_LabelListWidget_findItemByShape(qtbot):
+    widget = LabelListWidget()
+    qtbot.addWidget(widget)
+
+    shapes = [Shape(label=str(i)) for i in range(5)]
+    items = []
+    for shape in shapes:
+        items.append(LabelListWidgetItem(text=shape.label, shape=shape))
+        widget.addItem(items[-1])
+    # indexed as added, not on lookup
+    assert widget._itemsByShape == dict(zip(shapes, items))
+    assert widget.findItemByShape(shapes[3]) is items[3]
+
+    widget.removeItem(items[1])
+    with pytest.raises(ValueError):
+        widget.findItemByShape(shapes[1])
+    assert widget.findItemByShape(shapes[2]) is items[2]
+
+    widget.selectItems([items[0], items[2], items[3]])
+    assert [item.shape() for item in widget.selectedItems()] == [
+        shapes[0],
+        shapes[2],
+        shapes[3],
+    ]
+
+    widget.clear()
+    with pytest.raises(ValueError):
+        widget.findItemByShape(shapes[0])
+
+
+@pytest.mark.gui
+def test_LabelListWidget_addItems(qtbot):
+    widget = LabelListWidget()
+    qtbot.addWidget(widget)
+
+    shapes = [Shape(label=str(i)) for i in range(3)]
+    items = [LabelListWidgetItem(text=s.label, shape=s) for s in shapes]
+    with qtbot.waitSignal(widget.model().rowsInserted) as blocker:
+        widget.addItems(items)
+    assert blocker.args[1:] == [0, 2]
+    assert list(widget) == items
+    assert widget.findItemByShape(shapes[2]) is items[2]
+
+
+@pytest.mark.gui
+def test_LabelListWidget_insertItem(qtbot):
+    widget = LabelListWidget()
+    qtbot.addWidget(widget)
+
+    shapes = [Shape(label=str(i)) for i in range(3)]
+    items = [LabelListWidgetItem(text=s.label, shape=s) for s in shapes]
+    widget.addItems([items[0], items[2]])
+    widget.insertItem(1, items[1])
+    assert list(widget) == items
+    assert widget.findItemByShape(shapes[1]) is items[1]
+
+    with qtbot.assertNotEmitted(widget.itemDropped):
+        widget.removeItem(items[1])
+    assert list(widget) == [items[0], items[2]]
+
+
+@pytest.mark.gui
+def test_LabelListWidget_findItemByShape_dropped(qtbot):
+    widget = LabelListWidget()
+    qtbot.addWidget(widget)
+
+    shapes = [Shape(label=str(i)) for i in range(3)]
+    widget.addItems([LabelListWidgetItem(text=s.label, shape=s) for s in shapes])
+    # an InternalMove drag and drop of the first row to the end
+    model = widget.model()
+    model.dropMimeData(
+        model.mimeData([model.index(0, 0)]),
+        QtCore.Qt.MoveAction,
+        3,
+        0,
+        QtCore.QModelIndex(),
+    )
+    with qtbot.waitSignal(widget.itemDropped):
+        model.removeRows(0, 1)
+    assert [item.text() for item in widget] == ["1", "2", "0"]
+    # the dropped row holds a copy of the shape, indexed once filled
+    assert widget.findItemByShape(widget[2].shape()) is widget[2]
+    assert widget.findItemByShape(shapes[1]) is widget[0]
+    with pytest.raises(ValueError):
+        widget.findItemByShape(shapes[0])